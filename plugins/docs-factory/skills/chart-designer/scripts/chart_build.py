@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""Build stage that renders chart specs to PNG/SVG with a brand theme.
+
+Usage:
+    python chart_build.py <specs.json|specs.jsonl> [--brand <brand-kit-path>] [--dpi 200]
+                          [--workers N] [--cache-dir <path>] [--no-cache]
+
+A spec describes one chart as data rather than code:
+
+    {"output": "charts/revenue.png", "type": "bar", "size": "full-width",
+     "title": "Revenue by Quarter", "y_label": "Revenue ($M)",
+     "data": {"categories": ["Q1", "Q2", "Q3", "Q4"], "series": {"Revenue": [120, 150, 180, 210]}}}
+
+- type: one of CHART_TYPES (bar, grouped_bar, stacked_bar, horizontal_bar,
+  line, area, pie, donut, scatter, heatmap), drawn as in
+  references/chart-types.md
+- size: a FIGURE_SIZES key (default full-width)
+- output: .png or .svg; the format follows the extension. Relative paths
+  resolve against the specs file's directory
+- data: categories + series (bar, line, area families), labels + values
+  (pie, donut), series of {"x", "y"} (scatter), matrix + labels (heatmap)
+- title, x_label, y_label: optional
+
+Each chart is keyed by a hash of its spec (everything but output), the theme
+fingerprint and the matplotlib version. Identical specs in one run render
+once, and rendered files are kept in a persistent cache ($CHART_DESIGNER_CACHE,
+default ~/.cache/chart-designer) and copied into place on later runs. The cache
+is size-bounded: least recently used charts are evicted past
+$CHART_DESIGNER_CACHE_MAX_MB (default 512 MB; see chart_cache.py). Charts
+that still need rendering are drawn across --workers processes; each worker
+loads the theme once.
+
+Exit code 0 if every chart was written, 1 if any spec failed.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from chart_cache import CACHE_MAX_MB_ENV, DiskCache
+from chart_theme import CACHE_ENV, FIGURE_SIZES, load_theme
+
+FORMATS = (".png", ".svg")
+
+
+# --- Chart types --------------------------------------------------------------
+
+def _series(data: dict) -> list:
+    return list(data.get("series", {}).items())
+
+
+def _first_series(data: dict) -> list:
+    series = _series(data)
+    return series[0][1] if series else []
+
+
+def _bar(ax, data, theme):
+    ax.bar(data["categories"], _first_series(data), color=theme.palette.categorical[0])
+
+
+def _grouped_bar(ax, data, theme):
+    import numpy as np
+
+    series = _series(data)
+    x = np.arange(len(data["categories"]))
+    width = 0.7 / max(len(series), 1)
+    for i, (name, values) in enumerate(series):
+        ax.bar(x + (i - (len(series) - 1) / 2) * width, values, width, label=name)
+    ax.set_xticks(x)
+    ax.set_xticklabels(data["categories"])
+    ax.legend()
+
+
+def _stacked_bar(ax, data, theme):
+    import numpy as np
+
+    bottom = np.zeros(len(data["categories"]))
+    for name, values in _series(data):
+        ax.bar(data["categories"], values, bottom=bottom, label=name)
+        bottom = bottom + np.array(values, dtype=float)
+    ax.legend()
+
+
+def _horizontal_bar(ax, data, theme):
+    ax.barh(data["categories"], _first_series(data), color=theme.palette.categorical[0])
+    ax.invert_yaxis()  # highest value at top
+
+
+def _line(ax, data, theme):
+    series = _series(data)
+    for name, values in series:
+        ax.plot(data["categories"], values, marker="o", markersize=4, label=name)
+    if len(series) > 1:
+        ax.legend()
+
+
+def _area(ax, data, theme):
+    series = _series(data)
+    for name, values in series:
+        line, = ax.plot(data["categories"], values, marker="o", markersize=4, label=name)
+        ax.fill_between(data["categories"], values, alpha=0.3, color=line.get_color())
+    if len(series) > 1:
+        ax.legend()
+
+
+def _pie(ax, data, theme, donut=False):
+    values = data["values"]
+    ax.pie(values, labels=data["labels"], autopct="%1.0f%%",
+           colors=theme.palette.categorical[:len(values)],
+           wedgeprops={"edgecolor": "white", "linewidth": 1.5},
+           pctdistance=0.78 if donut else 0.6, startangle=90)
+    if donut:
+        from matplotlib.patches import Circle
+
+        ax.add_artist(Circle((0, 0), 0.55, fc="white"))
+    ax.set_aspect("equal")
+
+
+def _donut(ax, data, theme):
+    _pie(ax, data, theme, donut=True)
+
+
+def _scatter(ax, data, theme):
+    series = _series(data)
+    for name, points in series:
+        ax.scatter(points["x"], points["y"], alpha=0.7, s=40, label=name)
+    if len(series) > 1:
+        ax.legend()
+
+
+def _heatmap(ax, data, theme):
+    cmap = theme.palette.diverging_colormap() if data.get("diverging") else theme.palette.sequential_colormap()
+    im = ax.imshow(data["matrix"], cmap=cmap, aspect="auto")
+    ax.figure.colorbar(im, ax=ax, shrink=0.8)
+    x_labels = data.get("x_labels", data.get("labels"))
+    y_labels = data.get("y_labels", data.get("labels"))
+    if x_labels:
+        ax.set_xticks(range(len(x_labels)))
+        ax.set_xticklabels(x_labels, rotation=45, ha="right")
+    if y_labels:
+        ax.set_yticks(range(len(y_labels)))
+        ax.set_yticklabels(y_labels)
+    ax.grid(False)
+
+
+CHART_TYPES = {
+    "bar": _bar,
+    "grouped_bar": _grouped_bar,
+    "stacked_bar": _stacked_bar,
+    "horizontal_bar": _horizontal_bar,
+    "line": _line,
+    "area": _area,
+    "pie": _pie,
+    "donut": _donut,
+    "scatter": _scatter,
+    "heatmap": _heatmap,
+}
+
+
+# --- Rendering ----------------------------------------------------------------
+
+def check_spec(spec: dict) -> str:
+    """Return an error message for an unusable spec, or None."""
+    if not isinstance(spec, dict):
+        return "spec must be a JSON object"
+    if spec.get("type") not in CHART_TYPES:
+        return f"unknown chart type {spec.get('type')!r} (expected one of: {', '.join(CHART_TYPES)})"
+    if spec.get("size", "full-width") not in FIGURE_SIZES:
+        return f"unknown size {spec.get('size')!r} (expected one of: {', '.join(FIGURE_SIZES)})"
+    output = spec.get("output")
+    if not isinstance(output, str) or not output or Path(output).suffix.lower() not in FORMATS:
+        return "output must be a .png or .svg path"
+    if not isinstance(spec.get("data"), dict):
+        return "data must be a JSON object"
+    return None
+
+
+def chart_key(spec: dict, theme) -> str:
+    """Cache key: hash of the spec minus its output path, the theme and matplotlib version.
+
+    Series are drawn in spec order (stacking, colors, legend), so they are
+    hashed as [name, values] pairs rather than as a key-sorted object.
+    """
+    import matplotlib
+
+    body = {k: v for k, v in spec.items() if k != "output"}
+    body["format"] = Path(spec["output"]).suffix.lower()
+    if isinstance(body["data"].get("series"), dict):
+        body["data"] = dict(body["data"], series=[[name, values] for name, values in body["data"]["series"].items()])
+    h = hashlib.sha256(json.dumps(body, sort_keys=True).encode())
+    h.update(theme.fingerprint().encode())
+    h.update(matplotlib.__version__.encode())
+    return h.hexdigest()
+
+
+def render_chart(spec: dict, theme, path: str):
+    """Draw one spec with theme and save it to path (format from the extension)."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    with theme.apply():
+        fig, ax = plt.subplots(figsize=theme.sizes[spec.get("size", "full-width")])
+        try:
+            CHART_TYPES[spec["type"]](ax, spec["data"], theme)
+            if spec.get("title"):
+                ax.set_title(spec["title"])
+            if spec.get("x_label"):
+                ax.set_xlabel(spec["x_label"])
+            if spec.get("y_label"):
+                ax.set_ylabel(spec["y_label"])
+            metadata = {"Date": None} if path.endswith(".svg") else None
+            fig.savefig(path, format=Path(path).suffix[1:].lower(), metadata=metadata)
+        finally:
+            plt.close(fig)
+
+
+_WORKER = {}  # brand path / dpi for pool workers; the theme itself is memoized by load_theme
+
+
+def _init_worker(brand_path, dpi):
+    _WORKER.update(brand_path=brand_path, dpi=dpi)
+
+
+def _render_job(job: tuple) -> tuple:
+    """Render (key, spec, temp path) in a worker; returns (key, error message or None)."""
+    key, spec, path = job
+    try:
+        render_chart(spec, load_theme(_WORKER.get("brand_path"), _WORKER.get("dpi", 200)), path)
+        return key, None
+    except Exception as e:
+        return key, f"{type(e).__name__}: {e}"
+
+
+def _place(source: str, dest: str):
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+    tmp = f"{dest}.tmp"
+    try:
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, dest)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def build_charts(specs: list, brand_path: str = None, dpi: int = 200, workers: int = 1,
+                 cache_dir: str = None, use_cache: bool = True) -> list:
+    """Render specs, reusing cached and duplicate charts; returns one status dict per spec.
+
+    Status records hold output, key and status: "cached", "rendered",
+    "duplicate" (same key as an earlier spec in this run) or "error" with message.
+    A spec whose output cannot be written is an error too; the others are still placed.
+    """
+    import tempfile
+
+    theme = load_theme(brand_path, dpi)
+    cache = DiskCache("charts", root=cache_dir) if use_cache else None
+    results = []
+    pending = {}  # key → (spec, rendered file)
+    work_dir = tempfile.mkdtemp(prefix="chart-build-")
+    try:
+        for spec in specs:
+            error = check_spec(spec)
+            if error:
+                results.append({"output": spec.get("output") if isinstance(spec, dict) else None,
+                                "status": "error", "message": error})
+                continue
+            key = chart_key(spec, theme)
+            suffix = Path(spec["output"]).suffix.lower()
+            cached = cache.get(key + suffix) if cache and key not in pending else None
+            if key in pending:
+                status = "duplicate"
+            elif cached:
+                status = "cached"
+                pending[key] = (spec, cached)
+            else:
+                status = "rendered"
+                pending[key] = (spec, os.path.join(work_dir, key + suffix))
+            results.append({"output": spec["output"], "key": key, "status": status})
+
+        jobs = [(key, spec, path) for key, (spec, path) in pending.items() if path.startswith(work_dir)]
+        if workers <= 1 or len(jobs) <= 1:
+            _init_worker(brand_path, dpi)
+            outcomes = [_render_job(job) for job in jobs]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(brand_path, dpi)) as pool:
+                outcomes = list(pool.map(_render_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+        errors = {key: error for key, error in outcomes if error}
+
+        # Outputs are placed before new charts enter the cache, so eviction
+        # cannot remove a cached chart this run still has to copy.
+        for record in results:
+            if record["status"] == "error":
+                continue
+            if record["key"] in errors:
+                record.update(status="error", message=errors[record["key"]])
+                continue
+            try:
+                _place(pending[record["key"]][1], record["output"])
+            except OSError as e:
+                record.update(status="error", message=f"could not write output: {e}")
+
+        if cache:
+            for key, spec, path in jobs:
+                if key not in errors:
+                    try:
+                        cache.store(os.path.basename(path), path)
+                    except OSError:
+                        pass  # the cache is an optimization; the output is already written
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def load_specs(path: str) -> list:
+    """Read specs from a JSON array or JSONL file.
+
+    Relative output paths are resolved against the specs file's directory.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        specs = json.loads(text)
+    else:
+        specs = [json.loads(line) for line in text.splitlines() if line.strip()]
+    for spec in specs:
+        if isinstance(spec, dict) and isinstance(spec.get("output"), str) and not os.path.isabs(spec["output"]):
+            spec["output"] = os.path.join(base, spec["output"])
+    return specs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render chart specs with a brand theme")
+    parser.add_argument("specs", help="JSON array or JSONL file of chart specs")
+    parser.add_argument("--brand", default=None, help="Brand kit path (default: unbranded theme)")
+    parser.add_argument("--dpi", type=int, default=200, help="Output resolution (default: 200)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Render processes (default: CPU count)")
+    parser.add_argument("--cache-dir", default=None,
+                        help=f"Cache root (default: ${CACHE_ENV} or ~/.cache/chart-designer; "
+                             f"size limit ${CACHE_MAX_MB_ENV}, default 512 MB)")
+    parser.add_argument("--no-cache", action="store_true", help="Render everything; do not read or write the cache")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.specs):
+        print(f"Error: Specs file not found: {args.specs}", file=sys.stderr)
+        sys.exit(1)
+    if args.brand and not os.path.isdir(args.brand):
+        print(f"Error: Brand kit not found: {args.brand}", file=sys.stderr)
+        sys.exit(1)
+    if args.workers < 1:
+        print(f"Error: --workers must be at least 1, got {args.workers}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        specs = load_specs(args.specs)
+    except ValueError as e:
+        print(f"Error: Could not parse {args.specs}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    results = build_charts(specs, args.brand, args.dpi, args.workers, args.cache_dir, not args.no_cache)
+    counts = {}
+    for record in results:
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+        if record["status"] == "error":
+            print(f"  [FAIL] {record['output']}: {record['message']}")
+    print(f"Charts: {len(results)} — {counts.get('rendered', 0)} rendered, {counts.get('cached', 0)} from cache, "
+          f"{counts.get('duplicate', 0)} duplicates, {counts.get('error', 0)} failed")
+    sys.exit(1 if counts.get("error") else 0)
+
+
+if __name__ == "__main__":
+    main()
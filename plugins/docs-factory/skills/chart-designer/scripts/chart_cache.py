@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Size-bounded LRU file cache for rendered charts.
+
+Entries live under $CHART_DESIGNER_CACHE (default ~/.cache/chart-designer),
+one subdirectory per namespace (chart_build.py uses "charts"). Keys are
+content hashes, so an entry never needs invalidation. Hits refresh an entry's
+mtime, and once a namespace grows past its limit
+($CHART_DESIGNER_CACHE_MAX_MB, default 512 MB) the least recently used entries
+are deleted. Directories are created private to the user (mode 0700).
+
+Same scheme as pdf-factory's cache.py, which chart-designer does not import.
+Uses only Python stdlib.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from chart_theme import default_cache_dir
+
+CACHE_MAX_MB_ENV = "CHART_DESIGNER_CACHE_MAX_MB"
+DEFAULT_MAX_MB = 512
+
+
+class DiskCache:
+    """Size-bounded LRU file cache for one namespace under the cache root."""
+
+    def __init__(self, namespace: str, root: str = None, max_bytes: int = None):
+        self.dir = os.path.join(root or default_cache_dir(), namespace)
+        if max_bytes is None:
+            max_bytes = int(os.environ.get(CACHE_MAX_MB_ENV, DEFAULT_MAX_MB)) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self._size = None  # lazily computed on first store
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.dir, key)
+
+    def get(self, key: str):
+        """Return the cached file path for key, or None. Marks the entry as recently used."""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def store(self, key: str, src_path: str) -> str:
+        """Copy src_path into the cache under key (atomic rename) and evict if over budget."""
+        os.makedirs(os.path.dirname(self.dir), mode=0o700, exist_ok=True)
+        os.makedirs(self.dir, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.dir, prefix=".tmp-")
+        os.close(fd)
+        try:
+            shutil.copyfile(src_path, tmp_path)
+            os.replace(tmp_path, self.path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += os.path.getsize(self.path(key))
+        if self._size > self.max_bytes:
+            self.evict()
+        return self.path(key)
+
+    def _entries(self) -> list:
+        entries = []
+        try:
+            with os.scandir(self.dir) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.startswith(".tmp-"):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Delete least recently used entries until the namespace fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._size = total
@@ -10,7 +10,21 @@ Usage:
     with theme.apply():
         fig, ax = plt.subplots(figsize=theme.sizes["full-width"])
         ax.bar(...)
+
+Loaded themes are memoized per brand kit and dpi in process, so brand fonts
+are registered with matplotlib once; each call returns a copy of the memoized
+theme. theme.fingerprint() hashes everything
+that affects rendering, for caching chart output (see chart_build.py).
+
+When a warm font cache built by warm_font_cache.py exists for the installed
+matplotlib's font list version, load_theme takes brand font entries from it
+(via font_manager.json_load) instead of parsing each TTF. The process
+environment is left alone; to also skip matplotlib's system font scan, set
+MPLCONFIGDIR to font_cache_dir() yourself (see warm_font_cache.py).
 """
+import copy
+import functools
+import hashlib
 import json
 import os
 import sys
@@ -18,6 +32,26 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
+CACHE_ENV = "CHART_DESIGNER_CACHE"
+
+
+def default_cache_dir() -> str:
+    """Return the cache root from $CHART_DESIGNER_CACHE or ~/.cache/chart-designer."""
+    return os.environ.get(CACHE_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "chart-designer")
+
+
+def font_cache_dir(cache_dir: Optional[str] = None) -> str:
+    """Directory holding the warm matplotlib font list; also usable as MPLCONFIGDIR."""
+    return os.path.join(cache_dir or default_cache_dir(), "matplotlib")
+
+
+def _warm_font_list(cache_dir: Optional[str] = None) -> Optional[str]:
+    """Path of the warm font list in the installed matplotlib's format, if one was built."""
+    import matplotlib.font_manager as fm
+
+    path = os.path.join(font_cache_dir(cache_dir), f"fontlist-v{fm.FontManager.__version__}.json")
+    return path if os.path.exists(path) else None
+
 
 @dataclass
 class BrandPalette:
@@ -78,28 +112,52 @@ class ChartTheme:
     sizes: dict = field(default_factory=lambda: dict(FIGURE_SIZES))
     dpi: int = 200
     brand_name: str = "Default"
-    _original_rcparams: dict = field(default_factory=dict, repr=False)
+    font_files: list = field(default_factory=list)
+    _fingerprint: str = field(default="", repr=False)
 
     def apply(self):
         """Context manager that sets/restores matplotlib rcParams."""
         return _ThemeContext(self)
 
+    def fingerprint(self) -> str:
+        """SHA-256 of the palette, rcParams, sizes, dpi and brand font file contents."""
+        if not self._fingerprint:
+            h = hashlib.sha256()
+            h.update(json.dumps({
+                "palette": [self.palette.categorical, self.palette.sequential, self.palette.diverging,
+                            self.palette.highlight, self.palette.highlight_contrast],
+                "rcparams": {k: repr(v) for k, v in self.rcparams.items()},
+                "sizes": self.sizes,
+                "dpi": self.dpi,
+            }, sort_keys=True).encode())
+            for path in sorted(self.font_files):
+                with open(path, "rb") as f:
+                    h.update(hashlib.sha256(f.read()).digest())
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
 
 class _ThemeContext:
-    """Context manager for applying/restoring rcParams."""
+    """Context manager for applying/restoring rcParams.
+
+    The saved rcParams belong to this context, not the theme: load_theme()
+    hands out one shared ChartTheme, and nested or concurrent apply() calls
+    must each restore what they found.
+    """
 
     def __init__(self, theme: ChartTheme):
         self.theme = theme
+        self._original_rcparams = {}
 
     def __enter__(self):
         import matplotlib.pyplot as plt
-        self.theme._original_rcparams = dict(plt.rcParams)
+        self._original_rcparams = dict(plt.rcParams)
         plt.rcParams.update(self.theme.rcparams)
         return self.theme
 
     def __exit__(self, *args):
         import matplotlib.pyplot as plt
-        plt.rcParams.update(self.theme._original_rcparams)
+        plt.rcParams.update(self._original_rcparams)
 
 
 def _resolve_color(color_role: str, colors: dict) -> str:
@@ -122,6 +180,83 @@ def _resolve_font_path(font_role: str, weight: str, manifest: dict) -> Optional[
     return font_path if os.path.exists(font_path) else None
 
 
+_THEMES = {}  # (manifest path, mtime, dpi) → ChartTheme, per process
+
+
+_FONT_MTIMES = {}  # font file realpath → its mtime when registered by this process
+_WARM_ENTRIES = {}  # (warm list path, mtime) → {font file realpath: [FontEntry]}, per process
+
+_realpath = functools.lru_cache(maxsize=None)(os.path.realpath)
+
+
+def _warm_entries() -> tuple:
+    """Return (mtime, entries by font realpath) of the warm font list, parsed once per process."""
+    import matplotlib.font_manager as fm
+
+    warm_list = _warm_font_list()
+    if not warm_list:
+        return 0, {}
+    try:
+        key = (warm_list, os.path.getmtime(warm_list))
+        if key not in _WARM_ENTRIES:
+            entries = {}
+            for entry in fm.json_load(warm_list).ttflist:
+                entries.setdefault(_realpath(entry.fname), []).append(entry)
+            _WARM_ENTRIES[key] = entries
+    except Exception:
+        return 0, {}
+    return key[1], _WARM_ENTRIES[key]
+
+
+def _register_fonts(font_files: list):
+    """Make TTF files available to matplotlib, reusing warm cache entries where possible.
+
+    Files already known to the font manager are skipped unless their entries
+    are stale: the file changed after the font list matplotlib loaded was
+    written, or since this process registered it. Stale entries are dropped
+    and the file is registered again. Files found unchanged in the warm cache
+    are added from their cached entries; only the rest are parsed with addfont.
+    """
+    import matplotlib
+    import matplotlib.font_manager as fm
+
+    manager = fm.fontManager
+    try:
+        loaded_mtime = os.path.getmtime(
+            os.path.join(matplotlib.get_cachedir(), f"fontlist-v{fm.FontManager.__version__}.json"))
+    except OSError:
+        loaded_mtime = float("inf")  # no list on disk: matplotlib scanned the fonts at import
+    known = {_realpath(entry.fname) for entry in manager.ttflist}
+    missing, stale = [], set()
+    for path in font_files:
+        real = _realpath(path)
+        if real in known:
+            mtime = os.path.getmtime(path)
+            if real in _FONT_MTIMES:
+                fresh = mtime == _FONT_MTIMES[real]
+            else:
+                fresh = mtime <= loaded_mtime
+            if fresh:
+                continue
+            stale.add(real)
+        missing.append(path)
+    if not missing:
+        return
+    if stale:
+        manager.ttflist = [entry for entry in manager.ttflist if _realpath(entry.fname) not in stale]
+
+    warm_mtime, cached = _warm_entries()
+    for path in missing:
+        entries = cached.get(_realpath(path))
+        mtime = os.path.getmtime(path)
+        if entries and mtime <= warm_mtime:
+            manager.ttflist.extend(entries)
+        else:
+            manager.addfont(path)
+        _FONT_MTIMES[_realpath(path)] = mtime
+    manager._findfont_cached.cache_clear()  # as addfont does; entries were also dropped or reused
+
+
 def load_theme(brand_path: Optional[str] = None, dpi: int = 200) -> ChartTheme:
     """Load a ChartTheme from a brand kit directory.
 
@@ -131,7 +266,9 @@ def load_theme(brand_path: Optional[str] = None, dpi: int = 200) -> ChartTheme:
         dpi: Output resolution for charts.
 
     Returns:
-        ChartTheme ready to use with matplotlib.
+        ChartTheme ready to use with matplotlib. Repeated calls for the same
+        brand kit and dpi reuse the parsed theme until manifest.json changes,
+        but each call returns its own copy, so callers may modify it.
     """
     if brand_path is None:
         return ChartTheme(dpi=dpi)
@@ -143,6 +280,10 @@ def load_theme(brand_path: Optional[str] = None, dpi: int = 200) -> ChartTheme:
               file=sys.stderr)
         return ChartTheme(dpi=dpi)
 
+    memo_key = (str(manifest_path.resolve()), manifest_path.stat().st_mtime_ns, dpi)
+    if memo_key in _THEMES:
+        return copy.deepcopy(_THEMES[memo_key])
+
     with open(manifest_path) as f:
         manifest = json.load(f)
 
@@ -166,12 +307,13 @@ def load_theme(brand_path: Optional[str] = None, dpi: int = 200) -> ChartTheme:
 
     # Register brand fonts with matplotlib
     font_family = "sans-serif"
+    font_files = []
     try:
         import matplotlib.font_manager as fm
         fonts_dir = brand_dir / "assets" / "fonts"
         if fonts_dir.exists():
-            for ttf in fonts_dir.glob("*.ttf"):
-                fm.fontManager.addfont(str(ttf))
+            font_files = [str(ttf) for ttf in fonts_dir.glob("*.ttf")]
+            _register_fonts(font_files)
             # Use the heading font as primary
             heading_path = _resolve_font_path("heading", "bold", manifest)
             if heading_path:
@@ -245,10 +387,12 @@ def load_theme(brand_path: Optional[str] = None, dpi: int = 200) -> ChartTheme:
         "font.size": axis_label_size,
     }
 
-    return ChartTheme(
+    _THEMES[memo_key] = ChartTheme(
         palette=palette,
         rcparams=rcparams,
         sizes=dict(FIGURE_SIZES),
         dpi=dpi,
         brand_name=brand_name,
+        font_files=font_files,
     )
+    return copy.deepcopy(_THEMES[memo_key])
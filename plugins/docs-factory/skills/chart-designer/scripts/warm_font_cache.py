@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Pre-build a matplotlib font cache that includes brand kit fonts.
+
+Usage:
+    python warm_font_cache.py [<brand-kit-path> ...] [--cache-dir <path>]
+
+Without brand paths, every brand-* kit next to chart-designer is included
+(brand-bluewaves, brand-decathlon, brand-wave-artisans).
+
+matplotlib rebuilds its font list, scanning every system font, the first
+time it is imported with an empty cache directory. load_theme() then parses
+each brand TTF with addfont. This builds the font list once, with the system
+fonts and the brand fonts, and writes it in matplotlib's own format to
+$CHART_DESIGNER_CACHE/matplotlib/fontlist-v<version>.json (default
+~/.cache/chart-designer/matplotlib). load_theme() reads the brand font entries
+from it, for the installed matplotlib's font list version, without touching
+the environment. Containers that also want to skip the system font scan can
+opt in with MPLCONFIGDIR pointing at that directory. It then stands in for the
+user's matplotlib config directory, so a matplotlibrc or stylelib there is not
+seen. Run it when building a container image, and again after upgrading
+matplotlib or changing brand fonts. Stale entries are detected and parsed at
+runtime as before.
+
+Exit code 0 on success, 1 if a brand kit has no fonts directory.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from chart_theme import font_cache_dir
+
+
+def default_brands() -> list:
+    """Every brand-* kit in the skills directory containing chart-designer."""
+    skills_dir = Path(__file__).resolve().parents[2]
+    return sorted(str(p) for p in skills_dir.glob("brand-*") if (p / "assets" / "fonts").is_dir())
+
+
+def build_font_cache(brand_paths: list, cache_dir: str = None) -> tuple:
+    """Write a matplotlib font list with system and brand fonts; returns (path, brand font count)."""
+    import matplotlib.font_manager as fm
+
+    manager = fm.FontManager()  # full system font scan, independent of any existing cache
+    count = 0
+    for brand_path in brand_paths:
+        for ttf in sorted((Path(brand_path) / "assets" / "fonts").glob("*.ttf")):
+            manager.addfont(os.path.realpath(ttf))
+            count += 1
+    out_dir = font_cache_dir(cache_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"fontlist-v{fm.FontManager.__version__}.json")
+    tmp = f"{path}.tmp"
+    fm.json_dump(manager, tmp)
+    os.replace(tmp, path)
+    return path, count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-build the matplotlib font cache with brand fonts")
+    parser.add_argument("brands", nargs="*", help="Brand kit paths (default: every brand-* kit next to chart-designer)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Cache root (default: $CHART_DESIGNER_CACHE or ~/.cache/chart-designer; "
+                             "chart_theme looks under $CHART_DESIGNER_CACHE)")
+    args = parser.parse_args(argv)
+
+    brands = args.brands or default_brands()
+    if not brands:
+        print("Error: No brand kits found; pass brand kit paths", file=sys.stderr)
+        sys.exit(1)
+    for brand_path in brands:
+        if not (Path(brand_path) / "assets" / "fonts").is_dir():
+            print(f"Error: No fonts directory in brand kit: {brand_path}", file=sys.stderr)
+            sys.exit(1)
+
+    start = time.perf_counter()
+    path, count = build_font_cache(brands, args.cache_dir)
+    print(f"Font cache: {path} ({count} brand fonts from {len(brands)} kits, {time.perf_counter() - start:.1f}s)")
+    print(f"load_theme() reuses its brand font entries; to skip the system font scan too, "
+          f"opt in with MPLCONFIGDIR={os.path.dirname(path)}")
+
+
+if __name__ == "__main__":
+    main()
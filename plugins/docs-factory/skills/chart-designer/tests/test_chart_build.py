@@ -0,0 +1,28 @@
+"""Tests for chart_build.py."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from chart_build import build_charts, chart_key
+from chart_theme import load_theme
+
+
+def _stacked(output, series):
+    return {"output": output, "type": "stacked_bar",
+            "data": {"categories": ["Q1", "Q2"], "series": series}}
+
+
+def test_series_order_changes_key():
+    theme = load_theme()
+    a = _stacked("a.png", {"North": [1, 2], "South": [3, 4]})
+    b = _stacked("b.png", {"South": [3, 4], "North": [1, 2]})
+    assert chart_key(a, theme) != chart_key(b, theme)
+    assert chart_key(a, theme) == chart_key(_stacked("c.png", {"North": [1, 2], "South": [3, 4]}), theme)
+
+
+def test_reordered_series_render_separately(tmp_path):
+    specs = [_stacked(str(tmp_path / "a.png"), {"North": [1, 2], "South": [3, 4]}),
+             _stacked(str(tmp_path / "b.png"), {"South": [3, 4], "North": [1, 2]})]
+    results = build_charts(specs, use_cache=False)
+    assert [r["status"] for r in results] == ["rendered", "rendered"]
+    assert (tmp_path / "a.png").read_bytes() != (tmp_path / "b.png").read_bytes()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Batch pipeline: render, compose and validate many documents in one run.
+
+Usage:
+    python batch.py <jobs.json|jobs.jsonl> [--workers 4] [--report <report.jsonl>] [--no-validate] [--optimize]
+
+The jobs file is a JSON array (or {"jobs": [...]}) or JSONL, one job per line:
+
+    {"input": "acme/content.html", "metadata": "acme/metadata.json",
+     "output": "out/acme.pdf", "brand": "../brand-bluewaves",
+     "sections": ["Overview", "Results"], "format": "A4"}
+
+"brand", "sections", "format" and "toc" (true for table of contents pages)
+are optional. Relative paths are resolved against the jobs file's directory.
+Each worker process keeps brand manifests and zones, registered fonts and
+stylesheets warm across the jobs it runs, so every brand is loaded once per
+worker rather than once per document.
+
+A failing job never aborts the batch: each job's status (ok/failed, the
+failing stage, error text, timing) is appended to the JSONL report as soon as
+it finishes. Malformed entries (a JSONL line that is not valid JSON or not an
+object, a missing required key, a non-string path) are checked up front and
+reported as failed jobs without running anything. Exit code 0 when every job succeeds, 1 otherwise.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from cache import default_cache_dir
+
+_REQUIRED_KEYS = ("input", "metadata", "output")
+_PATH_KEYS = ("input", "metadata", "output", "brand")
+
+_BRANDS = {}  # brand path → (manifest, zones, assets_dir), per worker process
+
+
+def _job_error(job) -> str:
+    """Return why a job entry cannot run, or None when its shape is valid."""
+    if not isinstance(job, dict):
+        return f"Job must be a JSON object, got {type(job).__name__}"
+    missing = [key for key in _REQUIRED_KEYS if not job.get(key)]
+    if missing:
+        return f"Missing keys: {', '.join(missing)}"
+    for key in _PATH_KEYS:
+        if job.get(key) is not None and not isinstance(job[key], str):
+            return f"{key} must be a path string, got {type(job[key]).__name__}"
+    sections = job.get("sections")
+    if sections is not None and not (isinstance(sections, list) and all(isinstance(s, str) for s in sections)):
+        return "sections must be a list of strings"
+    if job.get("format") is not None and not isinstance(job["format"], str):
+        return f"format must be a string, got {type(job['format']).__name__}"
+    if job.get("toc") is not None and not isinstance(job["toc"], bool):
+        return f"toc must be true or false, got {type(job['toc']).__name__}"
+    return None
+
+
+def load_jobs(jobs_path: str) -> list:
+    """Read a JSON or JSONL jobs file and resolve paths relative to it.
+
+    Malformed entries come back as {"_error": ...} jobs, which run_job reports
+    as failed; only an unreadable top-level structure raises ValueError.
+    """
+    base = os.path.dirname(os.path.abspath(jobs_path))
+    with open(jobs_path) as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        jobs = []
+        for number, line in enumerate(text.splitlines(), 1):
+            if line.strip():
+                try:
+                    jobs.append(json.loads(line))
+                except ValueError as e:
+                    jobs.append({"_error": f"Line {number}: invalid JSON ({e})"})
+    else:
+        if isinstance(data, dict) and "jobs" in data:
+            jobs = data["jobs"]
+        elif isinstance(data, dict):
+            jobs = [data]
+        else:
+            jobs = data
+        if not isinstance(jobs, list):
+            raise ValueError(f"expected a list of jobs, got {type(jobs).__name__}")
+
+    resolved = []
+    for job in jobs:
+        error = job["_error"] if isinstance(job, dict) and "_error" in job else _job_error(job)
+        if error:
+            output = job.get("output") if isinstance(job, dict) else None
+            output = os.path.join(base, output) if isinstance(output, str) else None
+            resolved.append({"_error": error, "output": output})
+            continue
+        job = dict(job)
+        for key in _PATH_KEYS:
+            if job.get(key) and not os.path.isabs(job[key]):
+                job[key] = os.path.join(base, job[key])
+        resolved.append(job)
+    return resolved
+
+
+def _load_brand(brand_path: str) -> tuple:
+    """Return the brand's (manifest, zones, assets_dir), loading each brand once per process."""
+    from compose import load_brand_assets, load_fallback_compose
+
+    key = brand_path or ""
+    if key not in _BRANDS:
+        _BRANDS[key] = load_brand_assets(brand_path) if brand_path else load_fallback_compose()
+    return _BRANDS[key]
+
+
+def _stage(name: str, fn, log) -> tuple:
+    """Run one pipeline stage with its output captured; returns (ok, error)."""
+    import contextlib
+    import traceback
+
+    with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            fn()
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                lines = [line for line in log.getvalue().splitlines() if line.startswith("Error")]
+                return False, lines[-1] if lines else f"{name} exited with status {e.code}"
+        except Exception as e:
+            traceback.print_exc()
+            return False, f"{name} failed: {e}"
+    return True, None
+
+
+def run_job(index: int, job: dict, cache_dir: str = None, validate: bool = True, optimize: bool = False) -> dict:
+    """Render, compose and validate one job; never raises."""
+    start = time.perf_counter()
+    status = {"index": index, "output": job.get("output"), "status": "failed", "stage": None, "error": None}
+    if job.get("_error"):
+        status.update(stage="manifest", error=job["_error"])
+    else:
+        try:
+            _run_stages(job, status, cache_dir, validate, optimize)
+        except Exception as e:
+            status.update(status="failed", error=str(e))
+    status["seconds"] = round(time.perf_counter() - start, 3)
+    return status
+
+
+def _run_stages(job: dict, status: dict, cache_dir: str, validate: bool, optimize: bool):
+    import io
+    import tempfile
+
+    from brand import register_fonts
+    from compose import compose_document
+    from render import render_html_to_pdf
+
+    for key in ("input", "metadata"):
+        if not os.path.exists(job[key]):
+            status.update(stage="manifest", error=f"{key} not found: {job[key]}")
+            return
+
+    # Relative image paths in the HTML resolve against the input's directory
+    # (xhtml2pdf uses the cwd), so content pages are rendered next to it.
+    input_dir = os.path.dirname(job["input"])
+    fd, content_path = tempfile.mkstemp(dir=input_dir, prefix="_content-pages-", suffix=".pdf")
+    os.close(fd)
+    saved_cwd = os.getcwd()
+    log = io.StringIO()
+    try:
+        os.chdir(input_dir)
+        os.makedirs(os.path.dirname(job["output"]) or ".", exist_ok=True)
+
+        def render():
+            manifest = _load_brand(job.get("brand"))[0]
+            register_fonts(manifest, cache_dir=cache_dir)
+            with open(job["input"]) as f:
+                html = f.read()
+            render_html_to_pdf(html, content_path, manifest, page_format=job.get("format", "A4"),
+                               section_titles=job.get("sections"), cache_dir=cache_dir)
+
+        def compose():
+            saved = compose_document(job.get("brand"), content_path, job["metadata"], job["output"],
+                                     cache_dir=cache_dir, optimize=optimize, toc=job.get("toc", False),
+                                     brand_assets=_load_brand(job.get("brand")))
+            if saved is not None:
+                status["bytes_saved"] = saved
+
+        failures = []
+
+        def check():
+            from validate_output import run_checks
+
+            failures.extend(f"{name}: {message}" for name, (passed, message) in run_checks(job["output"], job.get("brand"))
+                            if not passed)
+
+        stages = [("render", render), ("compose", compose)]
+        if validate:
+            stages.append(("validate", check))
+        for name, fn in stages:
+            ok, error = _stage(name, fn, log)
+            if not ok:
+                status.update(stage=name, error=error, log=log.getvalue()[-2000:])
+                return
+        if failures:
+            status.update(stage="validate", error="; ".join(failures))
+            return
+
+        status.update(status="ok")
+    finally:
+        os.chdir(saved_cwd)
+        if os.path.exists(content_path):
+            os.remove(content_path)
+
+
+def run_batch(jobs: list, report_path: str, workers: int = 1, cache_dir: str = None, validate: bool = True,
+              optimize: bool = False) -> list:
+    """Run jobs (in a process pool when workers > 1), appending each status to report_path."""
+    results = []
+    with open(report_path, "w") as report:
+        def record(status):
+            results.append(status)
+            report.write(json.dumps(status) + "\n")
+            report.flush()
+            mark = "ok" if status["status"] == "ok" else f"FAILED at {status['stage']}: {status['error']}"
+            print(f"  [{len(results)}/{len(jobs)}] {status['output']} — {mark}")
+
+        if workers <= 1:
+            for index, job in enumerate(jobs):
+                record(run_job(index, job, cache_dir, validate, optimize))
+            return results
+
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_job, index, job, cache_dir, validate, optimize): (index, job)
+                       for index, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                index, job = futures[future]
+                try:
+                    status = future.result()
+                except Exception as e:  # worker process died
+                    status = {"index": index, "output": job.get("output"), "status": "failed",
+                              "stage": "worker", "error": repr(e)}
+                record(status)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render, compose and validate a batch of documents")
+    parser.add_argument("jobs", help="JSON or JSONL file of {input, metadata, output[, brand, sections, format, toc]} jobs")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (default 1 = serial)")
+    parser.add_argument("--report", default=None, help="Status report path (default: <jobs>.report.jsonl)")
+    parser.add_argument("--no-validate", action="store_true", help="Skip validate_output checks")
+    parser.add_argument("--optimize", action="store_true", help="Deduplicate and compress each final PDF")
+    parser.add_argument("--cache-dir", default=None, help="Cache directory (default: $PDF_FACTORY_CACHE or ~/.cache/pdf-factory)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the persistent caches")
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        print(f"Error: --workers must be at least 1, got {args.workers}", file=sys.stderr)
+        sys.exit(1)
+    if not os.path.exists(args.jobs):
+        print(f"Error: Jobs file not found: {args.jobs}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        jobs = load_jobs(args.jobs)
+    except (ValueError, AttributeError) as e:
+        print(f"Error: Could not parse jobs file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    report_path = args.report or str(Path(args.jobs).with_suffix(".report.jsonl"))
+    cache_dir = None if args.no_cache else (args.cache_dir or default_cache_dir())
+
+    print(f"Running {len(jobs)} jobs with {args.workers} worker(s)")
+    start = time.perf_counter()
+    results = run_batch(jobs, report_path, workers=args.workers, cache_dir=cache_dir, validate=not args.no_validate,
+                        optimize=args.optimize)
+    failed = sum(1 for r in results if r["status"] != "ok")
+    print(f"\n{len(results) - failed}/{len(results)} succeeded in {time.perf_counter() - start:.1f}s — report: {report_path}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""Performance benchmarks for the pdf-factory pipeline.
+
+Usage:
+    python benchmark.py preprocess [--sections 300] [--repeat 3]
+    python benchmark.py compose [--pages 50,100,250,500] [--brand <brand-kit-path>]
+    python benchmark.py memory [--pages 50,200,400] [--image-kb 80]
+    python benchmark.py optimize [--side 7163] [--brand <brand-kit-path>]
+
+Subcommands:
+    preprocess  Single-pass preprocess_html vs the per-transform regex chain
+    compose     compose_document time and size against content page count,
+                Form XObject content pages (--form-pages) vs pypdf merge_page
+    memory      validate_output.py peak RSS against page count for image-heavy
+                PDFs, default parse vs --stream
+    optimize    optimize_bytes and compose --optimize on a PDF whose image
+                decodes past pypdf's decompression limit (regression check)
+
+Each benchmark generates synthetic input, so no content files are needed
+(compose uses a brand kit's templates, brand-bluewaves by default). Results
+are printed as a table; outputs of compared implementations are checked for
+equality.
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def _synthetic_html(sections: int) -> str:
+    """Build a markdown-like HTML document with every element the preprocessors touch."""
+    paragraph = "<p>" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 12 + "</p>\n"
+    parts = []
+    for i in range(1, sections + 1):
+        parts.append(f'<h1 id="section-{i}">Section {i}</h1>\n')
+        parts.append(paragraph * 8)
+        parts.append(f"<h2>Subsection {i}.1</h2>\n")
+        parts.append(paragraph * 4)
+        parts.append('<pre class="code"><code class="language-python">\n'
+                     + "def f(x):\n    return x * 2\n" * 6 + "</code></pre>\n")
+        parts.append(f'<figure class="chart"><img src="chart-{i}.png" width="400" alt="Chart {i}">'
+                     f"<figcaption>Figure {i}: Results</figcaption></figure>\n")
+        parts.append('<table><tr><th>Metric</th><th>Value</th></tr>'
+                     + "<tr><td>Rows</td><td>42</td></tr>" * 10 + "</table>\n")
+    return "".join(parts)
+
+
+def _measure(fn, repeat: int) -> tuple:
+    """Return (best wall time in seconds, peak traced memory in bytes, result)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def bench_preprocess(args) -> int:
+    """Compare the single-pass engine against the legacy regex chain."""
+    import _legacy_preprocess as chain
+    from preprocess import preprocess_html
+
+    html = _synthetic_html(args.sections)
+    section_titles = [f"Section {i}" for i in range(1, args.sections + 1)]
+    manifest = {"tokens": {"imagery": {"corner_radius_pt": 6}}}
+    work_dir = tempfile.mkdtemp(prefix="pdf-factory-bench-")
+
+    def legacy():
+        out = chain._insert_section_breaks(html, section_titles=section_titles)
+        out = chain._preprocess_figures(out)
+        out = chain._preprocess_code_blocks(out)
+        out = chain._preprocess_image_widths(out)
+        out = chain._preprocess_svg_images(out, manifest, work_dir)
+        return chain._preprocess_images(out, manifest, work_dir)
+
+    def single_pass():
+        return preprocess_html(html, manifest, work_dir, section_titles=section_titles)
+
+    print(f"Input: {len(html) / (1024 * 1024):.2f} MB HTML, {args.sections} sections\n")
+    rows = [("regex chain", *_measure(legacy, args.repeat)),
+            ("single pass", *_measure(single_pass, args.repeat))]
+
+    print(f"  {'Implementation':<16}{'Time (ms)':>12}{'Peak mem (MB)':>16}")
+    for name, seconds, peak, _ in rows:
+        print(f"  {name:<16}{seconds * 1000:>12.1f}{peak / (1024 * 1024):>16.2f}")
+
+    (_, t_old, m_old, out_old), (_, t_new, m_new, out_new) = rows
+    print(f"\n  Speedup: {t_old / t_new:.2f}x   Memory: {m_old / max(m_new, 1):.2f}x less")
+    if out_old != out_new:
+        print("  Output MISMATCH between implementations", file=sys.stderr)
+        return 1
+    print("  Output identical")
+    return 0
+
+
+def _synthetic_content_pdf(pages: int, section_every: int = 10) -> tuple:
+    """Build a content-pages PDF with reportlab; returns (pdf bytes, metadata)."""
+    import io
+
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(595, 842))
+    sections = []
+    line = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor."
+    for page in range(1, pages + 1):
+        y = 780
+        if page % section_every == 1:
+            title = f"Section {len(sections) + 1}"
+            sections.append({"title": title, "page": page})
+            c.bookmarkPage(title)
+            c.addOutlineEntry(title, title, level=0)  # as render.py's h1 outline entries
+            c.setFont("Helvetica-Bold", 24)
+            c.drawString(72, y, title)
+            y -= 40
+        c.setFont("Helvetica", 11)
+        while y > 80:
+            c.drawString(72, y, line)
+            y -= 16
+        c.showPage()
+    c.save()
+    metadata = {"title": "Benchmark Report", "author": "pdf-factory", "sections": sections}
+    return buf.getvalue(), metadata
+
+
+def bench_compose(args) -> int:
+    """Time compose_document for increasing content page counts, Form XObject pages vs merge_page."""
+    import contextlib
+    import io
+    import os
+
+    from compose import compose_document
+
+    brand = args.brand or str(Path(__file__).resolve().parents[2] / "brand-bluewaves")
+    if not os.path.isdir(brand):
+        print(f"Error: Brand kit not found: {brand}", file=sys.stderr)
+        return 1
+    counts = [int(n) for n in args.pages.split(",")]
+
+    def run(content, metadata, form_pages):
+        best = float("inf")
+        for _ in range(args.repeat):
+            out = io.BytesIO()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                compose_document(brand, content, metadata, out, form_pages=form_pages)
+            best = min(best, time.perf_counter() - start)
+        return best, out.getvalue()
+
+    from pypdf import PdfReader
+
+    print(f"Brand: {brand}\n")
+    print(f"  {'Content pages':>14}{'Output pages':>14}{'Form (ms)':>12}{'Merge (ms)':>12}"
+          f"{'Form (KB)':>12}{'Merge (KB)':>12}")
+    for count in counts:
+        content, metadata = _synthetic_content_pdf(count)
+        form_time, form_pdf = run(content, metadata, form_pages=True)
+        merge_time, merge_pdf = run(content, metadata, form_pages=False)
+        output_pages = len(PdfReader(io.BytesIO(form_pdf)).pages)
+        if output_pages != len(PdfReader(io.BytesIO(merge_pdf)).pages):
+            print(f"Error: page counts differ at {count} content pages", file=sys.stderr)
+            return 1
+        print(f"  {count:>14}{output_pages:>14}{form_time * 1000:>12.0f}{merge_time * 1000:>12.0f}"
+              f"{len(form_pdf) / 1024:>12.0f}{len(merge_pdf) / 1024:>12.0f}")
+    return 0
+
+
+def _synthetic_image_pdf(path: str, pages: int, image_kb: int):
+    """Write a PDF with one distinct, incompressible image per page (reportlab + Pillow)."""
+    import os
+
+    from PIL import Image
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    side = max(int((image_kb * 1024 / 3) ** 0.5), 1)
+    c = canvas.Canvas(path, pagesize=(595, 842))
+    for page in range(1, pages + 1):
+        image = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+        c.drawImage(ImageReader(image), 72, 300, width=451, height=451)
+        c.setFont("Helvetica", 11)
+        c.drawString(72, 780, f"Page {page}")
+        c.showPage()
+    c.save()
+
+
+# Runs in a fresh interpreter. Linux carries ru_maxrss across fork + exec (it
+# would report the benchmark's own peak), so VmHWM is preferred where /proc exists.
+_RSS_PROBE = """
+import os, resource, sys
+sys.path.insert(0, sys.argv[1])
+from validate_output import PdfDocument
+doc = PdfDocument(sys.argv[2], stream=sys.argv[3] == "stream")
+if os.path.exists("/proc/self/status"):
+    with open("/proc/self/status") as f:
+        rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmHWM:"))
+else:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # bytes on macOS
+print(doc.page_count, rss, doc.error or "")
+"""
+
+
+def bench_memory(args) -> int:
+    """Peak RSS of validate_output's PdfDocument vs page count, default vs streaming."""
+    import os
+    import subprocess
+
+    counts = [int(n) for n in args.pages.split(",")]
+    work_dir = tempfile.mkdtemp(prefix="pdf-factory-bench-")
+    scripts_dir = str(Path(__file__).parent)
+
+    def peak_rss(path, mode):
+        out = subprocess.run([sys.executable, "-c", _RSS_PROBE, scripts_dir, path, mode],
+                             capture_output=True, text=True, check=True).stdout.split(maxsplit=2)
+        if len(out) > 2:
+            raise RuntimeError(f"{mode} validation failed: {out[2].strip()}")
+        return int(out[0]), int(out[1])
+
+    print(f"Images: ~{args.image_kb} KB per page, one per page\n")
+    print(f"  {'Pages':>8}{'File (MB)':>12}{'Default RSS (MB)':>19}{'Stream RSS (MB)':>18}")
+    mb = 1024 * 1024
+    for count in counts:
+        path = os.path.join(work_dir, f"images-{count}.pdf")
+        _synthetic_image_pdf(path, count, args.image_kb)
+        try:
+            (pages, default_rss), (stream_pages, stream_rss) = peak_rss(path, "default"), peak_rss(path, "stream")
+        except (subprocess.CalledProcessError, RuntimeError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        if pages != count or stream_pages != count:
+            print(f"Error: page count mismatch at {count} pages ({pages} vs {stream_pages})", file=sys.stderr)
+            return 1
+        print(f"  {count:>8}{os.path.getsize(path) / mb:>12.1f}{default_rss / mb:>19.1f}{stream_rss / mb:>18.1f}")
+        os.remove(path)
+    return 0
+
+
+def _large_image_pdf(side: int) -> bytes:
+    """Build a one-page PDF with a side x side RGB gradient image (reportlab + Pillow)."""
+    import io
+
+    from PIL import Image
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    gradient = Image.linear_gradient("L").resize((side, side))
+    image = Image.merge("RGB", (gradient, gradient.transpose(Image.Transpose.ROTATE_90), gradient))
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(595, 842))
+    c.drawImage(ImageReader(image), 72, 300, width=451, height=451)
+    c.setFont("Helvetica", 11)
+    c.drawString(72, 780, "Large image")
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def bench_optimize(args) -> int:
+    """Optimize a PDF with one large image, standalone and through compose_document."""
+    import contextlib
+    import io
+    import os
+
+    from compose import compose_document
+    from optimize import optimize_bytes
+
+    brand = args.brand or str(Path(__file__).resolve().parents[2] / "brand-bluewaves")
+    if not os.path.isdir(brand):
+        print(f"Error: Brand kit not found: {brand}", file=sys.stderr)
+        return 1
+    content = _large_image_pdf(args.side)
+    decoded_mb = args.side * args.side * 3 / (1024 * 1024)
+    print(f"Image: {args.side}x{args.side} RGB, {decoded_mb:.0f} MB decoded\n")
+    print(f"  {'Step':>10}{'Input (KB)':>12}{'Output (KB)':>13}{'Time (ms)':>11}")
+
+    start = time.perf_counter()
+    try:
+        optimized = optimize_bytes(content)
+    except Exception as e:
+        print(f"Error: optimize_bytes failed: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    if len(optimized) > len(content):
+        print("Error: optimize_bytes grew the document", file=sys.stderr)
+        return 1
+    print(f"  {'optimize':>10}{len(content) / 1024:>12.0f}{len(optimized) / 1024:>13.0f}{elapsed * 1000:>11.0f}")
+
+    metadata = {"title": "Benchmark Report", "author": "pdf-factory", "sections": []}
+    sizes = {}
+    for optimize in (False, True):
+        out = io.BytesIO()
+        start = time.perf_counter()
+        log = io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(log):
+            compose_document(brand, content, metadata, out, optimize=optimize)
+        elapsed = time.perf_counter() - start
+        if "Warning: Could not optimize" in log.getvalue():
+            print(f"Error: compose --optimize fell back: {log.getvalue().strip()}", file=sys.stderr)
+            return 1
+        sizes[optimize] = len(out.getvalue())
+    if sizes[True] > sizes[False]:
+        print("Error: compose --optimize grew the document", file=sys.stderr)
+        return 1
+    print(f"  {'compose':>10}{sizes[False] / 1024:>12.0f}{sizes[True] / 1024:>13.0f}{elapsed * 1000:>11.0f}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pdf-factory pipeline stages")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("preprocess", help="Single-pass preprocessing vs regex chain")
+    p.add_argument("--sections", type=int, default=300, help="Number of h1 sections to generate")
+    p.add_argument("--repeat", type=int, default=3, help="Timed runs per implementation (best is reported)")
+    p.set_defaults(func=bench_preprocess)
+
+    p = sub.add_parser("compose", help="compose_document time and size vs content page count")
+    p.add_argument("--pages", default="50,100,250,500", help="Comma-separated content page counts")
+    p.add_argument("--brand", default=None, help="Brand kit path (default: brand-bluewaves next to pdf-factory)")
+    p.add_argument("--repeat", type=int, default=1, help="Timed runs per page count (best is reported)")
+    p.set_defaults(func=bench_compose)
+
+    p = sub.add_parser("memory", help="Validation peak RSS vs page count, default vs --stream")
+    p.add_argument("--pages", default="50,200,400", help="Comma-separated page counts")
+    p.add_argument("--image-kb", type=int, default=80, help="Approximate image payload per page in KB")
+    p.set_defaults(func=bench_memory)
+
+    p = sub.add_parser("optimize", help="Optimize a PDF whose image decodes past pypdf's limits")
+    p.add_argument("--side", type=int, default=7163, help="Image width and height in pixels")
+    p.add_argument("--brand", default=None, help="Brand kit path (default: brand-bluewaves next to pdf-factory)")
+    p.set_defaults(func=bench_optimize)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
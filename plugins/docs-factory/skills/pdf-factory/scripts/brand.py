@@ -0,0 +1,346 @@
+"""Brand kit loading and reportlab font registration shared by the pdf-factory scripts.
+
+Kept free of heavy imports at module level so that --help, argument
+validation and error paths in render.py and compose.py stay fast; reportlab
+is only imported when fonts are actually registered.
+
+Parsed TrueType faces are memoized per font file in process and, when a cache
+directory is given, stored as plain JSON data (metrics, glyph maps and table
+directory; never pickles) in its "fonts" namespace so later invocations skip
+TTF parsing. The font bytes themselves are re-read from the file, which is
+re-hashed only when its size or mtime differs from the font index. Files are
+identified by the content hash recorded in the brand's font index (see
+font_index.py), so a fresh checkout or a copied brand kit still hits the
+cache. A parsed face is reused only after it survives a rebuild from its
+encoded data unchanged (see _face_entry); when it does not, as after a
+reportlab change to TTFontFace, a warning is printed and every font is parsed.
+"""
+import functools
+import hashlib
+import json
+import os
+import sys
+from fnmatch import fnmatch
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from cache import DiskCache, content_hash
+from font_index import font_fingerprints
+
+# Default tokens used by fallback mode and as a safety net
+_DEFAULT_TOKENS = {
+    "colors": {
+        "text-heading": "#1A1A1A",
+        "text-body": "#1A1A1A",
+        "text-muted": "#7A7A7A",
+        "text-inverse": "#FFFFFF",
+        "background-page": "#FFFFFF",
+        "background-alt": "#F0F0F0",
+        "border-default": "#B0B0B0",
+        "border-strong": "#4A4A4A",
+        "link": "#2E7D8C",
+        "highlight": "#E8A838",
+    },
+    "type_scale": {
+        "display-lg": {"size_pt": 72, "weight": "bold",  "font": "heading", "line_height": 1.0},
+        "display":  {"size_pt": 48, "weight": "bold",    "font": "heading", "line_height": 1.1},
+        "h1":       {"size_pt": 32, "weight": "bold",    "font": "heading", "line_height": 1.15},
+        "h2":       {"size_pt": 24, "weight": "bold",    "font": "heading", "line_height": 1.2},
+        "h3":       {"size_pt": 18, "weight": "bold",    "font": "heading", "line_height": 1.25},
+        "h4":       {"size_pt": 14, "weight": "bold",    "font": "heading", "line_height": 1.3},
+        "body":     {"size_pt": 11, "weight": "regular",  "font": "body",    "line_height": 1.5},
+        "body-sm":  {"size_pt": 9,  "weight": "regular",  "font": "body",    "line_height": 1.5},
+        "caption":  {"size_pt": 8,  "weight": "regular",  "font": "body",    "line_height": 1.4},
+        "overline": {"size_pt": 8,  "weight": "bold",    "font": "body",    "line_height": 1.4, "transform": "uppercase"},
+        "code":     {"size_pt": 10, "weight": "regular",  "font": "mono",    "line_height": 1.5},
+    },
+}
+
+
+def load_brand(brand_path: str) -> dict:
+    """Load brand manifest and resolve asset paths."""
+    brand_dir = Path(brand_path)
+    manifest_path = brand_dir / "assets" / "manifest.json"
+    if not manifest_path.exists():
+        print(f"Error: Brand manifest not found at {manifest_path}", file=sys.stderr)
+        sys.exit(1)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest["_base_path"] = str(brand_dir / "assets")
+    return manifest
+
+
+def load_fallback() -> dict:
+    """Load fallback defaults when no brand kit is specified."""
+    fallback_dir = Path(__file__).parent.parent / "assets" / "fallback"
+    return {
+        "brand": {"name": "Default", "slug": "default", "version": "1.0.0"},
+        "fonts": {
+            "body": {"regular": str(fallback_dir / "body.ttf"), "bold": str(fallback_dir / "body-bold.ttf"), "italic": str(fallback_dir / "body-italic.ttf")},
+            "mono": {"regular": str(fallback_dir / "mono.ttf")},
+        },
+        "tokens": _DEFAULT_TOKENS,
+        "defaults": {"page_format": "A4"},
+        "_base_path": str(fallback_dir),
+        "_fallback": True,
+    }
+
+
+_REGISTERED_FONTS = {}  # font name → file signature already registered with reportlab
+_FONT_FACES = {}  # file signature → parsed TTFontFace, shared by every name using the file
+_FACE_CACHE_VERSION = "1"  # bump when the cached face layout changes
+_FACE_PROBE = "Hamburgefonstiv 0123456789"  # width sample checked after rebuilding a cached face
+_SUBSET_PROBE = list(range(32, 127))  # code points embedded to compare a rebuilt face with its parse
+_FACE_CACHE_OFF = []  # set once a rebuilt face did not match its parse; every font is parsed after that
+
+
+def _font_signature(font_path: str, fingerprint: dict) -> tuple:
+    """(path, content hash, size, mtime_ns) of a font file, from its font index fingerprint."""
+    return (os.path.abspath(font_path), fingerprint["hash"], fingerprint["size"], fingerprint["mtime_ns"])
+
+
+def _is_plain(value) -> bool:
+    """JSON scalar or list of scalars, which round-trips through json unchanged."""
+    if isinstance(value, list):
+        return all(v is None or type(v) in (bool, int, float, str) for v in value)
+    return value is None or type(value) in (bool, int, float, str)
+
+
+def _encode_face_value(value):
+    """Tag a parsed face attribute as plain JSON data; raises TypeError for anything else.
+
+    Plain lists stay as they are and dicts of plain keys and values are stored
+    as two columns, so decoding the large glyph maps stays cheap.
+    """
+    from reportlab.pdfbase.ttfonts import TTFNameBytes
+
+    if _is_plain(value):
+        return value
+    if isinstance(value, TTFNameBytes):
+        return {"n": value.ustr}
+    if isinstance(value, bytes):
+        return {"b": value.decode("latin-1")}
+    if isinstance(value, tuple):
+        return {"t": [_encode_face_value(v) for v in value]}
+    if isinstance(value, list):
+        if all(isinstance(v, tuple) and _is_plain(list(v)) for v in value):
+            return {"T": [list(v) for v in value]}
+        return {"l": [_encode_face_value(v) for v in value]}
+    if isinstance(value, dict):
+        if _is_plain(list(value)) and all(_is_plain(v) for v in value.values()):
+            return {"d": [list(value), list(value.values())]}
+        return {"D": [[_encode_face_value(k), _encode_face_value(v)] for k, v in value.items()]}
+    raise TypeError(f"unsupported face attribute type: {type(value).__name__}")
+
+
+def _decode_face_value(value):
+    from reportlab.pdfbase.ttfonts import TTFNameBytes
+
+    if not isinstance(value, dict):
+        return value
+    (tag, data), = value.items()
+    if tag == "n":
+        return TTFNameBytes(data.encode("utf-8"))
+    if tag == "b":
+        return data.encode("latin-1")
+    if tag == "t":
+        return tuple(_decode_face_value(v) for v in data)
+    if tag == "T":
+        return list(map(tuple, data))
+    if tag == "l":
+        return [_decode_face_value(v) for v in data]
+    if tag == "d":
+        return dict(zip(*data))
+    if tag == "D":
+        return {_decode_face_value(k): _decode_face_value(v) for k, v in data}
+    raise ValueError(f"unknown face cache tag: {tag}")
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_font_classes() -> tuple:
+    """TTFontFace/TTFont subclasses that take already-parsed face data instead of a filename."""
+    from weakref import WeakKeyDictionary
+
+    from reportlab import rl_config
+    from reportlab.pdfbase import pdfmetrics, ttfonts
+
+    class CachedFace(ttfonts.TTFontFace):
+        def __init__(self, fields: dict, ttf_data: bytes):
+            pdfmetrics.TypeFace.__init__(self, None)
+            self.__dict__.update(fields)
+            self._ttf_data = ttf_data
+
+        def _pdfScale(self, x):
+            return x if self.unitsPerEm == 1000 else x * 1000 / self.unitsPerEm
+
+    class CachedTTFont(ttfonts.TTFont):
+        def __init__(self, name: str, face):
+            # TTFont.__init__ minus the TTFontFace parse
+            self.fontName = name
+            self.face = face
+            self.encoding = ttfonts.TTEncoding()
+            self.state = WeakKeyDictionary()
+            self._asciiReadable = rl_config.ttfAsciiReadable
+            if hasattr(ttfonts.TTFont, "shapable"):  # reportlab 4.4+
+                self.shapable = not any(fnmatch(name, g) for g in getattr(ttfonts, "unShapedFontGlob", ()))
+            elif hasattr(ttfonts, "shapedFontGlob"):  # reportlab 4.3
+                self._shaped = bool(any(fnmatch(name, g) for g in ttfonts.shapedFontGlob) and ttfonts.uharfbuzz)
+
+    return CachedFace, CachedTTFont
+
+
+def _face_key(signature: tuple) -> str:
+    import reportlab
+
+    return f"{content_hash(_FACE_CACHE_VERSION, reportlab.Version, signature[1])}.json"
+
+
+def _rebuild_face(entry: dict, ttf_data: bytes):
+    """Build a face from a decoded cache entry; raises on a probe width mismatch."""
+    fields = {name: _decode_face_value(value) for name, value in entry["fields"].items()}
+    face_cls, font_cls = _cached_font_classes()
+    face = face_cls(fields, ttf_data)
+    if font_cls("probe", face).stringWidth(_FACE_PROBE, 10) != entry["probe"]:
+        raise ValueError("probe width mismatch")
+    return face
+
+
+def _read_face(font_cache, signature: tuple):
+    """Rebuild a face from its cached JSON data, or None on a miss or any mismatch."""
+    data = font_cache.read_bytes(_face_key(signature))
+    if data is None:
+        return None
+    try:
+        entry = json.loads(data)
+        with open(signature[0], "rb") as f:
+            ttf_data = f.read()
+            st = os.fstat(f.fileno())
+        if (st.st_size, st.st_mtime_ns) != signature[2:] and hashlib.sha256(ttf_data).hexdigest() != signature[1]:
+            return None
+        return _rebuild_face(entry, ttf_data)
+    except Exception:
+        return None  # corrupt or written by an incompatible reportlab; re-parse
+
+
+def _face_entry(font):
+    """Encode a parsed font's face for the cache, or None if it does not rebuild unchanged.
+
+    The face is rebuilt from its JSON round trip and compared with the parse:
+    every attribute, the TTFont attribute names, a sample string width and an
+    embedded subset. A mismatch means reportlab changed internals the cache
+    relies on; a warning is printed once and caching is turned off.
+    """
+    if _FACE_CACHE_OFF:
+        return None
+    import reportlab
+
+    fields = {
+        name: value for name, value in vars(font.face).items()
+        if name not in ("_ttf_data", "_pdfScale")
+    }
+    try:
+        entry = {
+            "fields": {name: _encode_face_value(value) for name, value in fields.items()},
+            "probe": font.stringWidth(_FACE_PROBE, 10),
+        }
+        face = _rebuild_face(json.loads(json.dumps(entry)), font.face._ttf_data)
+        rebuilt = _cached_font_classes()[1](font.fontName, face)
+        if (all(getattr(face, name) == value for name, value in fields.items())
+                and set(vars(rebuilt)) == set(vars(font))
+                and face.makeSubset(_SUBSET_PROBE) == font.face.makeSubset(_SUBSET_PROBE)):
+            return entry
+        problem = "a rebuilt face differs from its parse"
+    except Exception as e:
+        problem = f"{type(e).__name__}: {e}"
+    print(f"Warning: Font face cache disabled for reportlab {reportlab.Version} ({problem}); "
+          "parsing every font", file=sys.stderr)
+    _FACE_CACHE_OFF.append(reportlab.Version)
+    return None
+
+
+def _ttfont(font_name: str, font_path: str, signature: tuple, cache_dir: str = None):
+    """Build a TTFont, reusing a face parsed earlier in process or cached as JSON under cache_dir.
+
+    Once a parsed face fails _face_entry's round trip, every call is a plain
+    TTFont parse.
+    """
+    from reportlab.pdfbase import ttfonts
+
+    face = None if _FACE_CACHE_OFF else _FONT_FACES.get(signature)
+    font_cache = DiskCache("fonts", root=cache_dir) if cache_dir else None
+    if face is None and font_cache and not _FACE_CACHE_OFF:
+        face = _read_face(font_cache, signature)
+    if face is None:
+        font = ttfonts.TTFont(font_name, font_path)
+        entry = _face_entry(font)
+        if entry is not None:
+            _FONT_FACES[signature] = font.face
+            if font_cache:
+                try:
+                    font_cache.store_bytes(_face_key(signature), json.dumps(entry, separators=(",", ":")).encode("utf-8"))
+                except OSError:
+                    pass
+        return font
+    _FONT_FACES[signature] = face
+    return _cached_font_classes()[1](font_name, face)
+
+
+def register_fonts(manifest: dict, cache_dir: str = None):
+    """Register all brand fonts with reportlab for direct canvas use (compose.py zones).
+
+    Returns dict of {role: {variant: font_name}} for registered fonts.
+    xhtml2pdf uses its own @font-face CSS mechanism (see build_stylesheet).
+    Parsed fonts are reused in process and, with cache_dir, across invocations.
+    """
+    from reportlab.lib.fonts import addMapping
+    from reportlab.pdfbase import pdfmetrics
+
+    base = manifest["_base_path"]
+    fonts = manifest.get("fonts", {})
+    registered = {}
+    fingerprints = font_fingerprints(base, [
+        rel_path for variants in fonts.values() if isinstance(variants, dict) for rel_path in variants.values()
+    ])
+
+    for role, variants in fonts.items():
+        if isinstance(variants, dict):
+            registered[role] = {}
+            for variant, rel_path in variants.items():
+                font_path = os.path.join(base, rel_path) if not os.path.isabs(rel_path) else rel_path
+                if rel_path in fingerprints and os.path.getsize(font_path) > 0:
+                    font_name = f"Brand-{role}-{variant}"
+                    signature = _font_signature(font_path, fingerprints[rel_path])
+                    if _REGISTERED_FONTS.get(font_name) == signature:
+                        registered[role][variant] = font_name
+                        continue
+                    try:
+                        pdfmetrics.registerFont(_ttfont(font_name, font_path, signature, cache_dir))
+                        _REGISTERED_FONTS[font_name] = signature
+                        registered[role][variant] = font_name
+                    except Exception as e:
+                        print(f"Warning: Could not register font {font_name}: {e}", file=sys.stderr)
+
+    for role, variants in registered.items():
+        family_name = f"Brand-{role}"
+        regular = variants.get("regular")
+        bold = variants.get("bold")
+        italic = variants.get("italic")
+        bold_italic = variants.get("bold_italic")
+
+        if regular:
+            addMapping(family_name, 0, 0, regular)
+        if bold:
+            addMapping(family_name, 1, 0, bold)
+        if italic:
+            addMapping(family_name, 0, 1, italic)
+        if bold_italic:
+            addMapping(family_name, 1, 1, bold_italic)
+
+    return registered
+
+
+def _resolve_font_name(font_role: str, weight: str) -> str:
+    """Map a font role + weight to the registered reportlab font name."""
+    if weight == "bold":
+        return f"Brand-{font_role}-bold"
+    return f"Brand-{font_role}-regular"
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Persistent content-addressed caches shared by the pdf-factory scripts.
+
+Entries live under $PDF_FACTORY_CACHE (default ~/.cache/pdf-factory), one
+subdirectory per namespace (e.g. "svg"). Keys are derived from content
+hashes, so an entry never needs invalidation — changed input simply maps to
+a new key. Each namespace is size-bounded: hits refresh an entry's mtime and
+the least recently used entries are evicted once the namespace grows past
+its limit ($PDF_FACTORY_CACHE_MAX_MB, default 512 MB per namespace).
+Directories are created private to the user (mode 0700).
+
+Uses only Python stdlib.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+CACHE_ENV = "PDF_FACTORY_CACHE"
+CACHE_MAX_MB_ENV = "PDF_FACTORY_CACHE_MAX_MB"
+DEFAULT_MAX_MB = 512
+
+
+def default_cache_dir() -> str:
+    """Return the cache root from $PDF_FACTORY_CACHE or ~/.cache/pdf-factory."""
+    return os.environ.get(CACHE_ENV) or os.path.join(
+        os.path.expanduser("~"), ".cache", "pdf-factory"
+    )
+
+
+def content_hash(*parts) -> str:
+    """SHA-256 hex digest over str/bytes parts (str is UTF-8 encoded)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+_FILE_HASHES = {}  # (path, mtime_ns, size) → digest, for repeat lookups in one process
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 hex digest of a file's contents, memoized per path + mtime + size."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    if memo_key in _FILE_HASHES:
+        return _FILE_HASHES[memo_key]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    _FILE_HASHES[memo_key] = digest.hexdigest()
+    return _FILE_HASHES[memo_key]
+
+
+class DiskCache:
+    """Size-bounded LRU file cache for one namespace under the cache root."""
+
+    def __init__(self, namespace: str, root: str = None, max_bytes: int = None):
+        self.dir = os.path.join(root or default_cache_dir(), namespace)
+        if max_bytes is None:
+            max_bytes = int(os.environ.get(CACHE_MAX_MB_ENV, DEFAULT_MAX_MB)) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self._size = None  # lazily computed on first store
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.dir, key)
+
+    def get(self, key: str):
+        """Return the cached file path for key, or None. Marks the entry as recently used."""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def materialize(self, key: str, dest: str) -> bool:
+        """Hard-link (or copy) a cached entry to dest. Returns False on a miss.
+
+        The link is made under a temporary name and renamed onto dest, so a
+        reader of dest sees either the old file or the complete new one.
+        """
+        path = self.get(key)
+        if path is None:
+            return False
+        try:
+            if os.path.exists(dest) and os.path.samefile(path, dest):
+                return True  # already linked from an earlier run
+        except OSError:
+            pass
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        try:
+            try:
+                os.link(path, tmp)
+            except OSError:
+                shutil.copyfile(path, tmp)
+            os.replace(tmp, dest)
+        except OSError:
+            return False
+        finally:
+            # rename(2) between two links to one inode leaves both names, so
+            # tmp survives the replace if dest was linked meanwhile.
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+        return True
+
+    def store(self, key: str, src_path: str) -> str:
+        """Copy src_path into the cache under key (atomic rename) and evict if over budget."""
+        return self._commit(key, lambda tmp_path: shutil.copyfile(src_path, tmp_path))
+
+    def store_bytes(self, key: str, data: bytes) -> str:
+        """Write data into the cache under key (atomic rename) and evict if over budget."""
+        def write(tmp_path):
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+        return self._commit(key, write)
+
+    def read_bytes(self, key: str):
+        """Return the cached bytes for key, or None. Marks the entry as recently used."""
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _commit(self, key: str, write) -> str:
+        os.makedirs(os.path.dirname(self.dir), mode=0o700, exist_ok=True)
+        os.makedirs(self.dir, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.dir, prefix=".tmp-")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, self.path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += os.path.getsize(self.path(key))
+        if self._size > self.max_bytes:
+            self.evict()
+        return self.path(key)
+
+    def _entries(self) -> list:
+        entries = []
+        try:
+            with os.scandir(self.dir) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.startswith(".tmp-"):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Delete least recently used entries until the namespace fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._size = total
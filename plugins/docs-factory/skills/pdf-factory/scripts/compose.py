@@ -6,7 +6,7 @@ Usage:
 
 Assembles the final document by:
 1. Adding front cover with metadata in zones
-2. Generating TOC if sections are defined
+2. Generating outline entries (and, with --toc, TOC pages) if sections are detected
 3. Merging content pages onto page-content template
 4. Inserting section dividers at section boundaries
 5. Adding back cover
@@ -18,9 +18,11 @@ import os
 import sys
 from pathlib import Path
 
-# Import register_fonts and default tokens from render.py (same package)
+# Import register_fonts and default tokens from brand.py (same package)
 sys.path.insert(0, str(Path(__file__).parent))
-from render import _DEFAULT_TOKENS, register_fonts
+from brand import _DEFAULT_TOKENS, register_fonts
+from cache import default_cache_dir
+from startup import COMPOSE_MODULES, add_profile_startup_argument
 
 
 def load_brand_assets(brand_path: str) -> tuple:
@@ -83,8 +85,41 @@ def _hex_to_color(hex_str: str):
     return HexColor(hex_str)
 
 
-def create_zone_overlay(zones_def: dict, metadata: dict, page_size: tuple, manifest: dict, assets_dir: str) -> bytes:
-    """Create a PDF overlay with text/images placed in zone positions using reportlab."""
+def _draw_image_zone(c, zone_spec: dict, assets_dir: str, height: float):
+    """Draw an SVG logo zone onto canvas c."""
+    svg_source = zone_spec.get("source", "")
+    if not svg_source:
+        return
+    svg_path = os.path.join(assets_dir, "logos", svg_source)
+    if not os.path.exists(svg_path):
+        return
+    try:
+        from svglib.svglib import svg2rlg
+        from reportlab.graphics import renderPDF
+
+        drawing = svg2rlg(svg_path)
+        if drawing:
+            zw = zone_spec.get("width", 120)
+            zh = zone_spec.get("height", 40)
+            sx = zw / drawing.width
+            sy = zh / drawing.height
+            scale = min(sx, sy)
+            drawing.width *= scale
+            drawing.height *= scale
+            drawing.scale(scale, scale)
+            draw_x = zone_spec["x"]
+            draw_y = height - zone_spec["y"] - zh
+            renderPDF.draw(drawing, c, draw_x, draw_y)
+    except Exception as e:
+        print(f"Warning: Could not render SVG {svg_source}: {e}", file=sys.stderr)
+
+
+def create_zone_overlay(zones_def: dict, metadata: dict, page_size: tuple, manifest: dict, assets_dir: str, include_images: bool = True) -> bytes:
+    """Create a PDF overlay with text/images placed in zone positions using reportlab.
+
+    include_images=False draws only the text zones; compose_document places
+    image zones through the memoized static overlay instead.
+    """
     from reportlab.pdfgen import canvas
 
     tokens = manifest.get("tokens", _DEFAULT_TOKENS)
@@ -107,31 +142,8 @@ def create_zone_overlay(zones_def: dict, metadata: dict, page_size: tuple, manif
     for zone_name, zone_spec in zones_def.get("zones", {}).items():
         # Handle image zones (SVG logos)
         if zone_spec.get("type") == "image":
-            svg_source = zone_spec.get("source", "")
-            if not svg_source:
-                continue
-            svg_path = os.path.join(assets_dir, "logos", svg_source)
-            if not os.path.exists(svg_path):
-                continue
-            try:
-                from svglib.svglib import svg2rlg
-                from reportlab.graphics import renderPDF
-
-                drawing = svg2rlg(svg_path)
-                if drawing:
-                    zw = zone_spec.get("width", 120)
-                    zh = zone_spec.get("height", 40)
-                    sx = zw / drawing.width
-                    sy = zh / drawing.height
-                    scale = min(sx, sy)
-                    drawing.width *= scale
-                    drawing.height *= scale
-                    drawing.scale(scale, scale)
-                    draw_x = zone_spec["x"]
-                    draw_y = height - zone_spec["y"] - zh
-                    renderPDF.draw(drawing, c, draw_x, draw_y)
-            except Exception as e:
-                print(f"Warning: Could not render SVG {svg_source}: {e}", file=sys.stderr)
+            if include_images:
+                _draw_image_zone(c, zone_spec, assets_dir, height)
             continue
 
         # Text zones
@@ -191,80 +203,607 @@ def create_zone_overlay(zones_def: dict, metadata: dict, page_size: tuple, manif
     return buf.read()
 
 
-def compose_document(brand_path: str, content_path: str, metadata_path: str, output_path: str):
-    """Compose final PDF from content pages and brand templates."""
-    from pypdf import PdfReader, PdfWriter
+_STATIC_OVERLAYS = {}  # (assets dir, zone set, page size, logo mtimes) → parsed overlay page or None
+
+
+def _zone_runs(zones_def: dict) -> list:
+    """Split a zone set into runs of consecutive image or text zones, in manifest order.
+
+    Returns [(is_image, zone set), ...]; drawing the runs in turn keeps the
+    manifest's stacking order while image runs stay memoizable.
+    """
+    runs = []
+    for name, spec in zones_def.get("zones", {}).items():
+        is_image = spec.get("type") == "image"
+        if not runs or runs[-1][0] != is_image:
+            runs.append((is_image, {"zones": {}}))
+        runs[-1][1]["zones"][name] = spec
+    return runs
+
+
+def _static_overlay_page(zones_def: dict, page_size: tuple, assets_dir: str):
+    """Return a parsed overlay page holding a zone set's image zones, or None if it has none.
+
+    The zones are drawn once per brand and zone set into a reportlab Form
+    XObject; the page itself only paints that form. Merging the page onto
+    every cover/divider that uses the zone set therefore adds a single "Do"
+    operator per page, and the form is written to each output document once.
+    _apply_zones passes one run of consecutive image zones at a time.
+    """
+    image_zones = [spec for spec in zones_def.get("zones", {}).values() if spec.get("type") == "image"]
+    if not image_zones:
+        return None
+
+    logos = []
+    for spec in image_zones:
+        svg_path = os.path.join(assets_dir, "logos", spec.get("source", ""))
+        logos.append((svg_path, os.path.getmtime(svg_path) if os.path.exists(svg_path) else None))
+    key = (os.path.abspath(assets_dir), json.dumps(zones_def, sort_keys=True), tuple(page_size), tuple(logos))
+    if key in _STATIC_OVERLAYS:
+        return _STATIC_OVERLAYS[key]
+
+    from pypdf import PdfReader
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    width, height = page_size
+    c = canvas.Canvas(buf, pagesize=(width, height))
+    c.beginForm("StaticZones")
+    for spec in image_zones:
+        _draw_image_zone(c, spec, assets_dir, height)
+    c.endForm()
+    c.doForm("StaticZones")
+    c.save()
+    reader = PdfReader(io.BytesIO(buf.getvalue()))
+    _STATIC_OVERLAYS[key] = reader.pages[0] if reader.pages else None
+    return _STATIC_OVERLAYS[key]
+
+
+def _apply_zones(page, zones_def: dict, metadata: dict, page_size: tuple, manifest: dict, assets_dir: str):
+    """Merge a zone set onto page in manifest order: memoized image zones, per-page text zones."""
+    from pypdf import PdfReader
+
+    for is_image, run in _zone_runs(zones_def):
+        if is_image:
+            static_page = _static_overlay_page(run, page_size, assets_dir)
+            if static_page is not None:
+                page.merge_page(static_page)
+            continue
+        if not any(metadata.get(name) for name in run["zones"]):
+            continue
+        overlay_bytes = create_zone_overlay(run, metadata, page_size, manifest, assets_dir, include_images=False)
+        overlay_reader = PdfReader(io.BytesIO(overlay_bytes))
+        if overlay_reader.pages:
+            page.merge_page(overlay_reader.pages[0])
+
+
+class _TemplatePages:
+    """Parses each template PDF once per compose run and hands out mergeable page copies.
+
+    A copy shares the template's content stream and resource objects (so they
+    are written to the output once) but merge_page() gives each copy its own
+    merged /Contents and /Resources, leaving the parsed template untouched.
+    """
+
+    def __init__(self, templates_dir: str):
+        self.templates_dir = templates_dir
+        self._readers = {}
+        self._forms = {}
+
+    def page(self, filename: str):
+        """Return a fresh copy of the template's first page, or None if it is missing or empty."""
+        from pypdf import PageObject, PdfReader
 
-    if brand_path:
+        if filename not in self._readers:
+            path = os.path.join(self.templates_dir, filename) if self.templates_dir else None
+            if path and os.path.exists(path) and os.path.getsize(path) > 0:
+                self._readers[filename] = PdfReader(path)
+            else:
+                self._readers[filename] = None
+        reader = self._readers[filename]
+        if reader is None:
+            return None
+        copy = PageObject(reader)
+        copy.update(reader.pages[0])
+        return copy
+
+    def form(self, filename: str, writer):
+        """Return (form reference, mediabox) for the template's first page as a
+        Form XObject in writer (added once), or None if it cannot be one."""
+        if filename not in self._forms:
+            page = self.page(filename)
+            ref = _page_form(page, writer) if page is not None else None
+            self._forms[filename] = (ref, page.mediabox) if ref is not None else None
+        return self._forms[filename]
+
+
+def _page_form(page, writer):
+    """Add a parsed page to writer as a Form XObject; returns its indirect reference.
+
+    The page's content stream is cloned with its encoded bytes as-is (no
+    decompress or re-parse); its resources are cloned through the writer's
+    per-reader object map, so fonts and images shared between pages are
+    written once. Returns None unless the page has exactly one indirect
+    content stream, which is what reportlab and xhtml2pdf write.
+    """
+    from pypdf.generic import IndirectObject, NameObject, RectangleObject, StreamObject
+
+    contents = page.raw_get("/Contents") if "/Contents" in page else None
+    if not isinstance(contents, IndirectObject) or not isinstance(contents.get_object(), StreamObject):
+        return None
+    ref = contents.clone(writer)
+    form = ref.get_object()
+    form.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Form"),
+        NameObject("/BBox"): RectangleObject(page.mediabox),
+    })
+    for key in ("/Resources", "/Group"):
+        if key in page:
+            form[NameObject(key)] = page.raw_get(key).clone(writer)
+    return ref
+
+
+def _add_form_page(writer, template, content_page, index: int = None):
+    """Append (or insert at index) a page that paints the template form, then the content page as a form.
+
+    Equivalent to template_page.merge_page(content_page), but the template is
+    one shared XObject and neither content stream is parsed or rewritten.
+    Returns the new page, or None (adding nothing) if the content page
+    cannot be a form.
+    """
+    from pypdf import PageObject
+    from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject, RectangleObject
+
+    content_ref = _page_form(content_page, writer)
+    if content_ref is None:
+        return None
+    template_ref, mediabox = template
+    blank = PageObject.create_blank_page(writer, float(mediabox.width), float(mediabox.height))
+    out = writer.add_page(blank) if index is None else writer.insert_page(blank, index)
+    out[NameObject("/MediaBox")] = RectangleObject(mediabox)
+    out[NameObject("/Resources")] = DictionaryObject({
+        NameObject("/XObject"): DictionaryObject({
+            NameObject("/Tpl"): template_ref,
+            NameObject("/Pg"): content_ref,
+        }),
+    })
+    contents = DecodedStreamObject()
+    contents.set_data(b"q /Tpl Do Q q /Pg Do Q")
+    out.replace_contents(contents)
+    if "/Annots" in content_page:
+        out[NameObject("/Annots")] = ArrayObject(
+            annot.clone(writer, ignore_fields=("/P",)) for annot in content_page["/Annots"]
+        )
+    return out
+
+
+def _link_destination(annot):
+    """Return (holder, key) of a link annotation's in-document destination, or None."""
+    if annot.get("/Subtype") != "/Link":
+        return None
+    if "/Dest" in annot:
+        return annot, "/Dest"
+    action = annot.get("/A")
+    if action is not None and action.get_object().get("/S") == "/GoTo" and "/D" in action.get_object():
+        return action.get_object(), "/D"
+    return None
+
+
+def _detach_annotations(reader):
+    """Drop page references from the annotations on reader's pages before they are cloned.
+
+    Cloned as they are, /P entries and link destinations would pull copies
+    of the source pages into the output. /P (optional) is removed, and
+    internal links point at content page indices instead: named destinations
+    are resolved first, since the output has no name tree, and a target that
+    is not one of reader's pages gets index -1. _resolve_link_targets swaps
+    the indices for output pages.
+    """
+    from pypdf.generic import ArrayObject, IndirectObject, NameObject, NumberObject
+
+    page_numbers = {page.indirect_reference.idnum: i for i, page in enumerate(reader.pages)}
+    named = None
+    for page in reader.pages:
+        for annot in page.get("/Annots") or []:
+            annot = annot.get_object()
+            if "/P" in annot:
+                del annot["/P"]
+            found = _link_destination(annot)
+            if found is None:
+                continue
+            holder, key = found
+            dest = holder[key]
+            if not isinstance(dest, ArrayObject):
+                if named is None:
+                    named = reader.named_destinations
+                target = named.get(str(dest))
+                dest = target.dest_array if target is not None else ArrayObject([NumberObject(-1)])
+            ref = dest[0] if dest else None
+            index = page_numbers.get(ref.idnum, -1) if isinstance(ref, IndirectObject) else -1
+            holder[NameObject(key)] = ArrayObject([NumberObject(index)] + list(dest[1:]))
+
+
+def _resolve_link_targets(writer, content_pages: list):
+    """Point links marked by _detach_annotations at the output pages in content_pages.
+
+    Links whose target is not a content page are dropped.
+    """
+    from pypdf.generic import ArrayObject, NameObject, NumberObject
+
+    for page in writer.pages:
+        if "/Annots" not in page:
+            continue
+        kept = ArrayObject()
+        for annot in page["/Annots"]:
+            found = _link_destination(annot.get_object())
+            if found is not None:
+                holder, key = found
+                dest = holder[key]
+                if isinstance(dest, ArrayObject) and dest and isinstance(dest[0], NumberObject):
+                    if not 0 <= dest[0] < len(content_pages):
+                        continue
+                    holder[NameObject(key)] = ArrayObject(
+                        [content_pages[dest[0]].indirect_reference] + list(dest[1:]))
+            kept.append(annot)
+        page[NameObject("/Annots")] = kept
+
+
+def _add_content_page(writer, templates, content_page, form_pages: bool = False, index: int = None):
+    """Append (or insert at index) a content page on the page-content template.
+
+    By default the template page is copied and merge_page() merges the
+    content into it. With form_pages, both are placed as Form XObjects (see
+    _add_form_page); a template or content page that cannot be a form falls
+    back to merge_page(). Without a template the content page is added as is.
+    """
+    if form_pages:
+        template = templates.form("page-content.pdf", writer)
+        if template is not None and _add_form_page(writer, template, content_page, index) is not None:
+            return
+    page = templates.page("page-content.pdf")
+    if page is not None:
+        page.merge_page(content_page)
+    else:
+        page = content_page
+    if index is None:
+        writer.add_page(page)
+    else:
+        writer.insert_page(page, index)
+
+
+_TOC_BODY_ZONE = {"x": 50, "y": 70, "width": 495, "height": 700}
+_TOC_STYLES = ("body", "body", "body-sm")  # by entry level: section, h2, h3 (h4+ omitted)
+_TOC_INDENT = 14  # pt per heading level below the section entries
+_TOC_NUMBER_WIDTH = 28
+_TOC_PAGE_WIDTH = 40
+
+
+def _toc_style(level: int, type_scale: dict) -> dict:
+    return type_scale.get(_TOC_STYLES[level], type_scale.get("body", {}))
+
+
+def _toc_rows(levels: list, page_size: tuple, zone: dict, type_scale: dict) -> list:
+    """Lay out TOC entries of the given levels inside zone; returns [(toc page index, baseline y)].
+
+    The first page starts below the h1-style heading; later pages start at
+    the top of the zone. Depends only on the entry levels, so the number of
+    TOC pages is known before any page number is.
+    """
+    heading = type_scale.get("h1", {})
+    top = page_size[1] - zone["y"]
+    bottom = top - zone["height"]
+
+    rows = []
+    page = 0
+    y = top - heading.get("size_pt", 32) * heading.get("line_height", 1.15) - 16
+    previous = None
+    for level in levels:
+        style = _toc_style(level, type_scale)
+        size = style.get("size_pt", 11)
+        if previous is not None:
+            # Sections get extra room above them; h2/h3 entries sit closer together
+            y -= size * style.get("line_height", 1.5) * (1.5 if level == 0 else 1.1)
+        else:
+            y -= size
+        if y < bottom:
+            page += 1
+            y = top - size
+        rows.append((page, y))
+        previous = level
+    return rows
+
+
+def create_toc_pages(entries: list, rows: list, page_size: tuple, manifest: dict, zone: dict,
+                     heading_text: str = "Contents") -> bytes:
+    """Draw TOC pages with reportlab: entries are (level, number, title, page label), rows from _toc_rows().
+
+    Level 0 entries are sections, shown with their number; levels 1 and 2 are
+    h2 and h3 headings, indented under them in the body and body-sm styles.
+    Every title is joined to its right-aligned page number by dot leaders.
+    """
+    from reportlab.pdfgen import canvas
+
+    tokens = manifest.get("tokens", _DEFAULT_TOKENS)
+    colors = tokens.get("colors", _DEFAULT_TOKENS["colors"])
+    type_scale = tokens.get("type_scale", _DEFAULT_TOKENS["type_scale"])
+
+    def set_style(c, style):
+        font_name = _resolve_font_name(style.get("font", "body"), style.get("weight", "regular"))
+        size_pt = style.get("size_pt", 11)
+        try:
+            c.setFont(font_name, size_pt)
+        except KeyError:
+            font_name = "Helvetica"
+            c.setFont(font_name, size_pt)
+        return font_name, size_pt
+
+    buf = io.BytesIO()
+    width, height = page_size
+    c = canvas.Canvas(buf, pagesize=(width, height))
+    x = zone["x"]
+    right = x + zone["width"]
+
+    font_name, size_pt = set_style(c, type_scale.get("h1", type_scale.get("body", {})))
+    c.setFillColor(_hex_to_color(colors.get("text-heading", "#000000")))
+    c.drawString(x, height - zone["y"] - size_pt, heading_text)
+
+    muted = _hex_to_color(colors.get("text-muted", "#7A7A7A"))
+    current_page = 0
+    for (level, number, title, label), (page, y) in zip(entries, rows):
+        if page != current_page:
+            c.showPage()
+            current_page = page
+        font_name, size_pt = set_style(c, _toc_style(level, type_scale))
+        c.setFillColor(muted)
+        if number is not None:
+            c.drawString(x, y, str(number))
+        c.drawRightString(right, y, str(label))
+
+        # Shrink long titles to leave room for a short leader and the page column
+        title_x = x + _TOC_NUMBER_WIDTH + _TOC_INDENT * level
+        title_width = right - _TOC_PAGE_WIDTH - title_x
+        title_size = size_pt
+        while c.stringWidth(title, font_name, title_size) > title_width and title_size > 6:
+            title_size -= 0.5
+        c.setFont(font_name, title_size)
+        c.setFillColor(_hex_to_color(colors.get("text-body", "#000000")))
+        c.drawString(title_x, y, title)
+
+        # Dot leaders on a fixed grid from the right edge, so dots line up across rows
+        spacing = size_pt * 0.45
+        dots_from = title_x + c.stringWidth(title, font_name, title_size) + spacing
+        dots_to = right - _TOC_PAGE_WIDTH / 2 - spacing
+        count = int((dots_to - dots_from) // spacing) + 1
+        if count > 0:
+            leader = c.beginText(dots_to - (count - 1) * spacing, y)
+            leader.setFont(font_name, size_pt)
+            leader.setCharSpace(spacing - c.stringWidth(".", font_name, size_pt))
+            leader.setFillColor(muted)
+            leader.textOut("." * count)
+            leader.setCharSpace(0)  # text state outlives the text object
+            c.drawText(leader)
+
+    c.save()
+    return buf.getvalue()
+
+
+def _insert_toc(writer, templates, zones: dict, manifest: dict, toc_entries: list, toc_at: int,
+                heading_text: str, form_pages: bool = False) -> list:
+    """Insert TOC pages at toc_at, each entry linked to its page; returns the entries' final page indices.
+
+    toc_entries is [(level, title, output page index before the TOC)] with
+    level 0 for sections and 1/2 for h2/h3 headings; every index at or after
+    toc_at shifts by the number of TOC pages inserted.
+    """
+    from pypdf import PdfReader
+    from pypdf.annotations import Link
+    from pypdf.generic import ArrayObject, NameObject
+
+    tokens = manifest.get("tokens", _DEFAULT_TOKENS)
+    type_scale = tokens.get("type_scale", _DEFAULT_TOKENS["type_scale"])
+    content_zones = zones.get("page-content", {})
+    page_size = tuple(content_zones.get("page_size", [595, 842]))
+    zone = content_zones.get("zones", {}).get("body", _TOC_BODY_ZONE)
+
+    rows = _toc_rows([level for level, _, _ in toc_entries], page_size, zone, type_scale)
+    toc_count = rows[-1][0] + 1 if rows else 1
+    targets = [index + toc_count if index >= toc_at else index for _, _, index in toc_entries]
+    entries = []
+    number = 0
+    for (level, title, _), target in zip(toc_entries, targets):
+        if level == 0:
+            number += 1
+        entries.append((level, number if level == 0 else None, title, target + 1))
+
+    toc_reader = PdfReader(io.BytesIO(create_toc_pages(entries, rows, page_size, manifest, zone, heading_text)))
+    for offset, toc_page in enumerate(toc_reader.pages):
+        _add_content_page(writer, templates, toc_page, form_pages, index=toc_at + offset)
+
+    for (level, _, _), (page, y), target in zip(toc_entries, rows, targets):
+        size = _toc_style(level, type_scale).get("size_pt", 11)
+        rect = (zone["x"], y - size * 0.3, zone["x"] + zone["width"], y + size)
+        link = writer.add_annotation(toc_at + page, Link(rect=rect, border=[0, 0, 0], target_page_index=target))
+        # older pypdf releases (seen with 4.x to 6.0) keep target_page_index as a bare page number
+        link[NameObject("/Dest")] = ArrayObject([writer.pages[target].indirect_reference, NameObject("/Fit")])
+    return targets
+
+
+def _outline_subheadings(reader, sections: dict) -> dict:
+    """Map each section's first content page to its h2/h3 outline entries.
+
+    xhtml2pdf nests an outline entry for every h2 and h3 under the section's
+    h1 (or hidden marker). Returns {content page number: [(level, title,
+    content page index)]} with level 1 for h2 and 2 for h3; deeper levels are
+    dropped.
+    """
+    found = {}
+    try:
+        outline = reader.outline
+    except Exception:
+        return found
+
+    def collect(children, level, into):
+        for entry in children:
+            if isinstance(entry, list):
+                if level < 2:
+                    collect(entry, level + 1, into)
+                continue
+            page_index = reader.get_destination_page_number(entry)
+            title = " ".join(str(entry.title or "").split())
+            if title and page_index is not None and page_index >= 0:
+                into.append((level, title, page_index))
+
+    current = None
+    for entry in outline:
+        if isinstance(entry, list):
+            if current is not None:
+                collect(entry, 1, found.setdefault(current, []))
+            continue
+        page_index = reader.get_destination_page_number(entry)
+        title = " ".join(str(entry.title or "").split())
+        page_num = page_index + 1 if page_index is not None else None
+        match = page_num in sections and " ".join(sections[page_num].split()) == title
+        current = page_num if match else None
+    return found
+
+
+def _outline_section_pages(reader, section_titles: list) -> dict:
+    """Map content page numbers to section titles from the PDF's top-level outline.
+
+    render.py keeps a level-0 outline entry for every h1, including the hidden
+    section markers, so each section's first page is read straight from the
+    outline without extracting any text. A title used by several sections
+    matches each of their entries, as in _text_section_pages. Returns {} when
+    nothing matches.
+    """
+    wanted = {" ".join(title.split()): title for title in section_titles if title}
+    sections = {}
+    try:
+        outline = reader.outline
+    except Exception:
+        return sections
+    for entry in outline:
+        if isinstance(entry, list):  # children of the previous entry
+            continue
+        title = wanted.get(" ".join(str(entry.title or "").split()))
+        if title is None:
+            continue
+        page_index = reader.get_destination_page_number(entry)
+        if page_index is not None and page_index >= 0:
+            sections.setdefault(page_index + 1, title)
+    return dict(sorted(sections.items()))
+
+
+def _text_section_pages(reader, section_titles: list) -> dict:
+    """Map content page numbers to section titles by scanning each page's text.
+
+    Fallback for content PDFs without a matching outline (rendered elsewhere or
+    by an older render.py): the first ~200 characters of every page are matched
+    against the titles, which handles headings that wrap across lines.
+    """
+    sections = {}
+    for i, page in enumerate(reader.pages):
+        page_text = (page.extract_text() or "").strip()
+        head = " ".join(page_text[:200].split())
+        for title in section_titles:
+            if not title:
+                continue
+            if title in head or head.startswith(title):
+                sections[i + 1] = title
+                break
+    return sections
+
+
+def compose_document(brand_path: str, content_path, metadata_path, output_path, cache_dir: str = None,
+                     form_pages: bool = False, optimize: bool = False, toc: bool = False,
+                     brand_assets: tuple = None):
+    """Compose final PDF from content pages and brand templates.
+
+    content_path may also be PDF bytes or a binary stream, metadata_path an
+    already loaded metadata dict, and output_path a writable binary stream —
+    so the whole pipeline can run without intermediate files.
+    cache_dir enables the persistent caches (see cache.py); None disables them.
+    Content pages are merged into the page-content template with pypdf
+    merge_page(); form_pages=True places both as Form XObjects instead
+    (faster, smaller output, see _add_form_page).
+    optimize=True runs the optimize.py size pass before writing; the bytes it
+    saved are returned (None when not optimizing).
+    With toc=True (branded mode) TOC pages listing each detected section and
+    its h2/h3 headings follow the front cover; every section also gets a PDF
+    outline entry.
+    brand_assets, the (manifest, zones, assets_dir) tuple returned by
+    load_brand_assets/load_fallback_compose, skips reloading the brand kit.
+    """
+    if brand_assets is not None:
+        manifest, zones, assets_dir = brand_assets
+    elif brand_path:
         manifest, zones, assets_dir = load_brand_assets(brand_path)
     else:
         manifest, zones, assets_dir = load_fallback_compose()
 
+    from pypdf import PdfReader, PdfWriter
+
     # Register brand fonts for zone overlay rendering
-    register_fonts(manifest)
+    register_fonts(manifest, cache_dir=cache_dir)
 
-    metadata = load_metadata(metadata_path)
+    metadata = metadata_path if isinstance(metadata_path, dict) else load_metadata(metadata_path)
 
     writer = PdfWriter()
+    if isinstance(content_path, (bytes, bytearray)):
+        content_path = io.BytesIO(content_path)
     content_reader = PdfReader(content_path)
 
     is_fallback = manifest.get("_fallback", False)
     templates_dir = os.path.join(assets_dir, "templates", "pdf") if not is_fallback else None
+    templates = _TemplatePages(templates_dir)
 
     # 1. Front cover (skip in fallback mode)
     if not is_fallback and templates_dir:
-        cover_front_path = os.path.join(templates_dir, "cover-front.pdf")
-        if os.path.exists(cover_front_path) and os.path.getsize(cover_front_path) > 0:
-            cover_reader = PdfReader(cover_front_path)
-            cover_page = cover_reader.pages[0]
-
+        cover_page = templates.page("cover-front.pdf")
+        if cover_page is not None:
             if "cover-front" in zones:
                 zone_def = zones["cover-front"]
                 page_size = tuple(zone_def.get("page_size", [595, 842]))
-                overlay_bytes = create_zone_overlay(zone_def, metadata, page_size, manifest, assets_dir)
-                overlay_reader = PdfReader(io.BytesIO(overlay_bytes))
-                if overlay_reader.pages:
-                    cover_page.merge_page(overlay_reader.pages[0])
+                _apply_zones(cover_page, zone_def, metadata, page_size, manifest, assets_dir)
 
             writer.add_page(cover_page)
 
     # 2. Detect section boundaries from rendered content pages.
-    #    render.py inserts page breaks before each h1, so the first line of
-    #    a page that starts a new section will contain the section heading.
-    #    We match these against metadata section titles to build an accurate
-    #    page→title map instead of trusting metadata page numbers (which are
-    #    estimates that may drift from the actual rendered layout).
+    #    render.py inserts page breaks before each h1 and gives every h1 (or
+    #    hidden section marker) an outline entry, so the outline maps each
+    #    metadata section title to its actual first page, instead of trusting
+    #    metadata page numbers (which are estimates that may drift from the
+    #    actual rendered layout).
     meta_sections = metadata.get("sections", [])
     section_titles = [s["title"] for s in meta_sections]
 
-    sections = {}  # {content_page_num: title}
-    for i, page in enumerate(content_reader.pages):
-        page_text = (page.extract_text() or "").strip()
-        # Check first ~200 chars to handle headings that wrap across lines
-        head = " ".join(page_text[:200].split())
-        for title in section_titles:
-            if not title:
-                continue
-            # Match if page starts with the section title (exact or wrapped)
-            if title in head or head.startswith(title):
-                sections[i + 1] = title
-                break
+    sections = _outline_section_pages(content_reader, section_titles)  # {content_page_num: title}
+    if not sections and section_titles:
+        sections = _text_section_pages(content_reader, section_titles)
 
     # Fallback: if detection found nothing, use metadata page numbers directly
     if not sections and meta_sections:
         total_pages = len(content_reader.pages)
         sections = {s["page"]: s["title"] for s in meta_sections if s["page"] <= total_pages}
 
+    _detach_annotations(content_reader)
+
+    toc_at = len(writer.pages)  # the TOC goes right after the front cover
+    section_starts = []  # [(title, output page index)], before the TOC is inserted
+    section_pages = []  # content page number of each entry in section_starts
+    content_at = []  # output page index of each content page, before the TOC is inserted
+
     for i, page in enumerate(content_reader.pages):
         page_num = i + 1
+        if page_num in sections:
+            section_starts.append((sections[page_num], len(writer.pages)))
+            section_pages.append(page_num)
 
         # Insert section divider if this page starts a new section (skip in fallback)
         if not is_fallback and page_num in sections and templates_dir:
-            divider_path = os.path.join(templates_dir, "section-divider.pdf")
-            if os.path.exists(divider_path) and os.path.getsize(divider_path) > 0:
-                divider_reader = PdfReader(divider_path)
-                divider_page = divider_reader.pages[0]
-
+            divider_page = templates.page("section-divider.pdf")
+            if divider_page is not None:
                 if "section-divider" in zones:
                     section_meta = {
                         "section_number": str(list(sections.keys()).index(page_num) + 1),
@@ -272,51 +811,51 @@ def compose_document(brand_path: str, content_path: str, metadata_path: str, out
                     }
                     zone_def = zones["section-divider"]
                     page_size = tuple(zone_def.get("page_size", [595, 842]))
-                    overlay_bytes = create_zone_overlay(
-                        {"zones": zone_def.get("zones", {})},
-                        section_meta,
-                        page_size,
-                        manifest,
-                        assets_dir,
-                    )
-                    overlay_reader = PdfReader(io.BytesIO(overlay_bytes))
-                    if overlay_reader.pages:
-                        divider_page.merge_page(overlay_reader.pages[0])
+                    _apply_zones(divider_page, {"zones": zone_def.get("zones", {})}, section_meta,
+                                 page_size, manifest, assets_dir)
 
                 writer.add_page(divider_page)
 
         # Merge content onto page-content template (or pass through in fallback)
+        content_at.append(len(writer.pages))
         if not is_fallback and templates_dir:
-            template_path = os.path.join(templates_dir, "page-content.pdf")
-            if os.path.exists(template_path) and os.path.getsize(template_path) > 0:
-                template_reader = PdfReader(template_path)
-                template_page = template_reader.pages[0]
-                template_page.merge_page(page)
-                writer.add_page(template_page)
-            else:
-                writer.add_page(page)
+            _add_content_page(writer, templates, page, form_pages)
         else:
             writer.add_page(page)
 
+    _resolve_link_targets(writer, [writer.pages[index] for index in content_at])
+
     # 3. Back cover (skip in fallback mode)
     if not is_fallback and templates_dir:
-        cover_back_path = os.path.join(templates_dir, "cover-back.pdf")
-        if os.path.exists(cover_back_path) and os.path.getsize(cover_back_path) > 0:
-            back_reader = PdfReader(cover_back_path)
-            back_page = back_reader.pages[0]
-
+        back_page = templates.page("cover-back.pdf")
+        if back_page is not None:
             # Render back cover zones (e.g. logo)
             if "cover-back" in zones:
                 zone_def = zones["cover-back"]
                 page_size = tuple(zone_def.get("page_size", [595, 842]))
-                overlay_bytes = create_zone_overlay(zone_def, {}, page_size, manifest, assets_dir)
-                overlay_reader = PdfReader(io.BytesIO(overlay_bytes))
-                if overlay_reader.pages:
-                    back_page.merge_page(overlay_reader.pages[0])
+                _apply_zones(back_page, zone_def, {}, page_size, manifest, assets_dir)
 
             writer.add_page(back_page)
 
-    # 4. Set PDF metadata
+    # 4. Table of contents and outline from the detected sections. TOC pages
+    #    are inserted after the front cover once everything else is placed,
+    #    shifting the recorded section pages, so no second render is needed.
+    targets = [index for _, index in section_starts]
+    if toc and section_starts and not is_fallback and templates_dir:
+        subheadings = _outline_subheadings(content_reader, sections)
+        toc_entries = []
+        for page_num, (title, index) in zip(section_pages, section_starts):
+            toc_entries.append((0, title, index))
+            toc_entries.extend((level, heading, content_at[page_index])
+                               for level, heading, page_index in subheadings.get(page_num, []))
+        toc_targets = _insert_toc(writer, templates, zones, manifest, toc_entries, toc_at,
+                                  metadata.get("toc_title", "Contents"), form_pages)
+        targets = [target for (level, _, _), target in zip(toc_entries, toc_targets) if level == 0]
+        writer.add_outline_item(metadata.get("toc_title", "Contents"), toc_at)
+    for (title, _), target in zip(section_starts, targets):
+        writer.add_outline_item(title, target)
+
+    # 5. Set PDF metadata
     writer.add_metadata({
         "/Title": metadata.get("title", ""),
         "/Author": metadata.get("author", ""),
@@ -324,27 +863,68 @@ def compose_document(brand_path: str, content_path: str, metadata_path: str, out
         "/Creator": "pdf-factory",
     })
 
+    # 6. Optional size pass: compress streams, merge identical objects, drop orphans
+    saved = None
+    if optimize:
+        from pypdf.errors import PyPdfError
+
+        from optimize import optimize_bytes
+
+        unoptimized = io.BytesIO()
+        writer.write(unoptimized)
+        try:
+            optimized = io.BytesIO(optimize_bytes(unoptimized.getvalue()))
+        except PyPdfError as e:
+            print(f"Warning: Could not optimize the document, writing it unoptimized: {e}", file=sys.stderr)
+            optimized = unoptimized
+        best = min(unoptimized, optimized, key=lambda buf: len(buf.getvalue()))
+        saved = len(unoptimized.getvalue()) - len(best.getvalue())
+
     # Write final PDF
+    if hasattr(output_path, "write"):
+        if optimize:
+            output_path.write(best.getvalue())
+        else:
+            writer.write(output_path)
+        return saved
     with open(output_path, "wb") as f:
-        writer.write(f)
+        if optimize:
+            f.write(best.getvalue())
+        else:
+            writer.write(f)
 
     print(f"Composed final document: {output_path} ({len(writer.pages)} pages)")
+    if optimize:
+        before = len(unoptimized.getvalue())
+        print(f"Optimized: saved {saved / 1024:.0f} KB of {before / 1024:.0f} KB ({100 * saved / before:.1f}%)")
+    return saved
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Compose final PDF from content and brand templates")
     parser.add_argument("--brand", required=False, help="Path to brand kit skill directory")
     parser.add_argument("--content", required=True, help="Path to rendered content pages PDF")
     parser.add_argument("--metadata", required=True, help="Path to metadata JSON file")
     parser.add_argument("--output", required=True, help="Output PDF path")
-    args = parser.parse_args()
+    parser.add_argument("--cache-dir", default=None, help="Cache directory (default: $PDF_FACTORY_CACHE or ~/.cache/pdf-factory)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the persistent caches")
+    parser.add_argument("--form-pages", action="store_true",
+                        help="Place content and template as Form XObjects instead of merge_page() (faster, smaller)")
+    parser.add_argument("--toc", action="store_true",
+                        help="Insert table of contents pages after the front cover (leave out any markdown [TOC])")
+    parser.add_argument("--optimize", action="store_true",
+                        help="Compress streams, merge identical objects and drop unused ones before writing")
+    add_profile_startup_argument(parser, COMPOSE_MODULES)
+    args = parser.parse_args(argv)
 
     for path, label in [(args.content, "Content PDF"), (args.metadata, "Metadata JSON")]:
         if not os.path.exists(path):
             print(f"Error: {label} not found: {path}", file=sys.stderr)
             sys.exit(1)
 
-    compose_document(args.brand, args.content, args.metadata, args.output)
+    cache_dir = None if args.no_cache else (args.cache_dir or default_cache_dir())
+    compose_document(args.brand, args.content, args.metadata, args.output, cache_dir=cache_dir,
+                     form_pages=args.form_pages, optimize=args.optimize, toc=args.toc)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Persistent render daemon: keeps the PDF libraries imported and fonts registered.
+
+Usage:
+    python daemon.py start [--socket <path>] [--brand <brand-kit-path> ...]
+    python daemon.py status [--socket <path>]
+    python daemon.py stop [--socket <path>]
+    python daemon.py render <render.py arguments>
+    python daemon.py compose <compose.py arguments>
+
+`start` runs the server in the foreground (append `&` to background it). It
+imports xhtml2pdf, reportlab, svglib, pypdf and Pillow once, registers the
+fonts of every --brand given, and then serves render and compose jobs one at a
+time over a Unix socket ($PDF_FACTORY_SOCKET, default
+~/.cache/pdf-factory/daemon.sock).
+
+`render` and `compose` take exactly the arguments of render.py and compose.py
+and forward them, with the caller's working directory, to the daemon. When no
+daemon is running they run the script in this process instead, so the client
+is always a drop-in replacement.
+
+The daemon keeps the modules it imported at start; restart it after editing
+the pipeline scripts. The client side uses only Python stdlib.
+"""
+import argparse
+import io
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from cache import default_cache_dir
+
+SOCKET_ENV = "PDF_FACTORY_SOCKET"
+FORWARDED_COMMANDS = ("render", "compose")
+FORWARDED_ENV_PREFIX = "PDF_FACTORY_"
+
+
+def default_socket_path() -> str:
+    """Return the socket path from $PDF_FACTORY_SOCKET or the cache directory."""
+    return os.environ.get(SOCKET_ENV) or os.path.join(default_cache_dir(), "daemon.sock")
+
+
+# --- Client -------------------------------------------------------------------
+
+def _request(socket_path: str, payload: dict) -> dict:
+    """Send one JSON request and return the JSON response. Raises OSError if no daemon."""
+    if not hasattr(socket, "AF_UNIX"):
+        raise OSError("Unix sockets are not supported on this platform")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        with sock.makefile("rwb") as stream:
+            stream.write(json.dumps(payload).encode("utf-8") + b"\n")
+            stream.flush()
+            line = stream.readline()
+    if not line:
+        raise OSError("Daemon closed the connection without a response")
+    return json.loads(line)
+
+
+def _run_locally(command: str, argv: list) -> int:
+    """Run render.py / compose.py main() in this process; returns the exit code."""
+    import importlib
+
+    module = importlib.import_module(command)
+    try:
+        module.main(argv)
+    except SystemExit as e:
+        return _exit_code(e)
+    return 0
+
+
+def forward(command: str, argv: list) -> int:
+    """Run a render/compose job on the daemon, falling back to a local run."""
+    payload = {
+        "command": command,
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": {k: v for k, v in os.environ.items() if k.startswith(FORWARDED_ENV_PREFIX)},
+    }
+    try:
+        response = _request(default_socket_path(), payload)
+    except OSError:
+        return _run_locally(command, argv)
+
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    return response.get("exit_code", 1)
+
+
+# --- Server -------------------------------------------------------------------
+
+def _exit_code(exc: SystemExit) -> int:
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=sys.stderr)
+    return 1
+
+
+def _warm_up(brands: list):
+    """Import the heavy libraries and register brand fonts once for the daemon's lifetime."""
+    import compose  # noqa: F401
+    import pypdf  # noqa: F401
+    import render
+    from PIL import Image  # noqa: F401
+    from svglib.svglib import svg2rlg  # noqa: F401
+    from xhtml2pdf import pisa  # noqa: F401
+
+    for brand in brands:
+        render.register_fonts(render.load_brand(brand), cache_dir=default_cache_dir())
+        print(f"Registered fonts for {brand}")
+
+
+def _run_job(request: dict) -> dict:
+    """Run one render/compose job with the client's cwd and env, capturing its output."""
+    import contextlib
+    import importlib
+    import traceback
+
+    module = importlib.import_module(request["command"])
+    stdout, stderr = io.StringIO(), io.StringIO()
+    saved_cwd = os.getcwd()
+    saved_env = {k: os.environ.get(k) for k in request.get("env", {})}
+    exit_code = 0
+    try:
+        os.chdir(request["cwd"])
+        os.environ.update(request.get("env", {}))
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                module.main(request["argv"])
+            except SystemExit as e:
+                exit_code = _exit_code(e)
+            except Exception:
+                traceback.print_exc()
+                exit_code = 1
+    except OSError as e:
+        print(f"Error: {e}", file=stderr)
+        exit_code = 1
+    finally:
+        os.chdir(saved_cwd)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+    return {"exit_code": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def serve(socket_path: str, brands: list) -> int:
+    """Serve jobs on socket_path until a stop request arrives."""
+    import socketserver
+
+    try:
+        _request(socket_path, {"command": "ping"})
+        print(f"Error: A daemon is already listening on {socket_path}", file=sys.stderr)
+        return 1
+    except OSError:
+        if os.path.lexists(socket_path):
+            os.remove(socket_path)  # stale socket from a daemon that did not shut down
+
+    _warm_up(brands)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline())
+            except ValueError:
+                return
+            command = request.get("command")
+            if command == "ping":
+                response = {"pid": os.getpid()}
+            elif command == "stop":
+                self.server.stopping = True
+                response = {"pid": os.getpid()}
+            elif command in FORWARDED_COMMANDS:
+                response = _run_job(request)
+            else:
+                response = {"exit_code": 1, "stdout": "", "stderr": f"Error: Unknown command: {command}\n"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+    # Jobs run one at a time: reportlab's font registry and os.chdir are process-global.
+    server = socketserver.UnixStreamServer(socket_path, Handler)
+    server.stopping = False
+    os.chmod(socket_path, 0o600)
+    print(f"pdf-factory daemon {os.getpid()} listening on {socket_path}")
+    sys.stdout.flush()
+    try:
+        while not server.stopping:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.lexists(socket_path):
+            os.remove(socket_path)
+    return 0
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in FORWARDED_COMMANDS:
+        sys.exit(forward(sys.argv[1], sys.argv[2:]))
+
+    parser = argparse.ArgumentParser(description="Persistent pdf-factory render daemon",
+                                     epilog="render/compose: python daemon.py render|compose <script arguments>")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("start", help="Run the daemon in the foreground")
+    p.add_argument("--socket", default=None, help=f"Socket path (default: ${SOCKET_ENV} or ~/.cache/pdf-factory/daemon.sock)")
+    p.add_argument("--brand", action="append", default=[], help="Brand kit whose fonts to register at start (repeatable)")
+    for name, help_text in (("status", "Report whether a daemon is running"), ("stop", "Stop a running daemon")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--socket", default=None, help="Socket path")
+
+    args = parser.parse_args()
+    socket_path = args.socket or default_socket_path()
+
+    if args.command == "start":
+        sys.exit(serve(socket_path, args.brand))
+
+    try:
+        response = _request(socket_path, {"command": "ping" if args.command == "status" else "stop"})
+    except OSError:
+        print(f"No daemon running on {socket_path}")
+        sys.exit(1 if args.command == "status" else 0)
+    verb = "running" if args.command == "status" else "stopping"
+    print(f"Daemon {response['pid']} {verb} on {socket_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Per-brand font fingerprint index.
+
+Usage:
+    python font_index.py <brand-kit-path> [<brand-kit-path> ...]
+
+Each brand kit has an index in the cache root ($PDF_FACTORY_CACHE, see
+cache.py) under font-index/, keyed by the real path of the kit's assets
+directory, so installed skill directories are never written to. The index
+maps the SHA-256 of every font file to the family and full names read from
+its TTF name table, and records each file's path (relative to assets/),
+size and mtime:
+
+    {"version": 1,
+     "files": {"fonts/body.ttf": {"hash": "…", "size": 123, "mtime_ns": 456}},
+     "fonts": {"<sha256>": {"names": ["inter", "inter regular"]}}}
+
+A file whose size and mtime match its record is not read at all. A changed
+or freshly checked-out file is re-hashed, and only a hash not yet in the
+index has its name table parsed. The index is rewritten when anything
+changed; if the cache root is not writable the kit is fingerprinted in
+memory instead.
+validate_output.py reads brand typeface names from it and brand.py keys its
+parsed-font cache by the file hashes.
+
+Running this script builds or refreshes the index of each brand kit given.
+
+Uses only Python stdlib.
+"""
+import json
+import os
+import struct
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from cache import content_hash, default_cache_dir, file_hash
+
+INDEX_NAMESPACE = "font-index"
+INDEX_VERSION = 1
+
+_INDEXES = {}  # index path → (index file mtime_ns, loaded index), per process
+
+
+def index_path(assets_dir: str) -> str:
+    """Return the cache file holding the font index for a brand kit's assets directory."""
+    key = content_hash(os.path.realpath(assets_dir))[:32]
+    return os.path.join(default_cache_dir(), INDEX_NAMESPACE, f"{key}.json")
+
+
+def _load_index(index_path: str) -> dict:
+    try:
+        mtime = os.stat(index_path).st_mtime_ns
+    except OSError:
+        return {"version": INDEX_VERSION, "files": {}, "fonts": {}}
+    cached = _INDEXES.get(index_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = None
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        index = {"version": INDEX_VERSION, "files": {}, "fonts": {}}
+    index.setdefault("files", {})
+    index.setdefault("fonts", {})
+    _INDEXES[index_path] = (mtime, index)
+    return index
+
+
+def _save_index(index_path: str, index: dict):
+    """Write the index atomically; silently keep it in memory if the cache is read-only."""
+    hashes = {entry["hash"] for entry in index["files"].values()}
+    index["fonts"] = {h: v for h, v in index["fonts"].items() if h in hashes}
+    tmp = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(os.path.dirname(index_path)), mode=0o700, exist_ok=True)
+        os.makedirs(os.path.dirname(index_path), mode=0o700, exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp, index_path)
+        _INDEXES[index_path] = (os.stat(index_path).st_mtime_ns, index)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def font_fingerprints(assets_dir: str, font_paths) -> dict:
+    """Return {font path: {"hash", "size", "mtime_ns", "names"}} for existing font files, via the index.
+
+    font_paths may be absolute or relative to assets_dir (as in manifest.json);
+    results are keyed by the path as given. Missing files are left out.
+    """
+    path = index_path(assets_dir)
+    index = _load_index(path)
+    files, fonts = index["files"], index["fonts"]
+    changed = False
+    result = {}
+    for font_path in font_paths:
+        full_path = font_path if os.path.isabs(font_path) else os.path.join(assets_dir, font_path)
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            continue
+        rel = os.path.relpath(full_path, assets_dir).replace(os.sep, "/")
+        entry = files.get(rel)
+        if not (entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns
+                and entry.get("hash") in fonts):
+            digest = file_hash(full_path)
+            entry = {"hash": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            files[rel] = entry
+            if digest not in fonts:
+                fonts[digest] = {"names": sorted(read_ttf_names(full_path))}
+            changed = True
+        result[font_path] = {"hash": entry["hash"], "size": entry["size"], "mtime_ns": entry["mtime_ns"],
+                             "names": set(fonts[entry["hash"]]["names"])}
+    if changed:
+        _save_index(path, index)
+    return result
+
+
+def manifest_font_paths(manifest: dict) -> dict:
+    """Return {role: [font path, ...]} from a manifest's fonts section."""
+    return {role: list(variants.values())
+            for role, variants in manifest.get("fonts", {}).items() if isinstance(variants, dict)}
+
+
+def read_ttf_names(font_path: str) -> set:
+    """Read family (nameID 1) and full name (nameID 4) from a TTF name table.
+
+    Returns a set of lowercased name strings. Uses only stdlib struct —
+    no fonttools or other dependencies required.
+    """
+    names = set()
+    try:
+        with open(font_path, "rb") as f:
+            # Read the offset table header (sfVersion:u32 numTables:u16 ...)
+            header = f.read(12)
+            if len(header) < 12:
+                return names
+            num_tables = struct.unpack(">H", header[4:6])[0]
+            # Scan table directory for 'name'
+            name_offset = name_length = 0
+            for _ in range(num_tables):
+                entry = f.read(16)
+                if len(entry) < 16:
+                    return names
+                tag = entry[:4]
+                if tag == b"name":
+                    _, name_offset, name_length = struct.unpack(">III", entry[4:16])
+                    break
+            if not name_offset:
+                return names
+            # Read the name table
+            f.seek(name_offset)
+            table_data = f.read(name_length)
+            if len(table_data) < 6:
+                return names
+            _, count, string_offset = struct.unpack(">HHH", table_data[:6])
+            for i in range(count):
+                rec_start = 6 + i * 12
+                if rec_start + 12 > len(table_data):
+                    break
+                platform_id, encoding_id, _, name_id, str_length, str_offset = struct.unpack(
+                    ">HHHHHH", table_data[rec_start : rec_start + 12]
+                )
+                if name_id not in (1, 4):
+                    continue
+                abs_offset = string_offset + str_offset
+                raw = table_data[abs_offset : abs_offset + str_length]
+                # Decode: platform 3 (Windows) uses UTF-16-BE, others use latin-1
+                try:
+                    if platform_id == 3 or (platform_id == 0 and encoding_id > 0):
+                        text = raw.decode("utf-16-be")
+                    else:
+                        text = raw.decode("latin-1")
+                except Exception:
+                    continue
+                cleaned = text.strip().lower()
+                if cleaned:
+                    names.add(cleaned)
+    except (OSError, struct.error):
+        pass
+    return names
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or refresh brand font fingerprint indexes")
+    parser.add_argument("brands", nargs="+", help="Brand kit paths")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for brand_path in args.brands:
+        assets_dir = Path(brand_path) / "assets"
+        manifest_path = assets_dir / "manifest.json"
+        if not manifest_path.exists():
+            print(f"Error: Brand manifest not found at {manifest_path}", file=sys.stderr)
+            failed = True
+            continue
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        paths = [p for role_paths in manifest_font_paths(manifest).values() for p in role_paths]
+        fingerprints = font_fingerprints(str(assets_dir), paths)
+        print(f"  {assets_dir}: {len(fingerprints)} font files, "
+              f"{len({fp['hash'] for fp in fingerprints.values()})} distinct")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
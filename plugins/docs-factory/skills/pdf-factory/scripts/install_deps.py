@@ -6,7 +6,7 @@ import sys
 
 PACKAGES = [
     "reportlab",
-    "pypdf",
+    "pypdf>=4.0",
     "pyhanko",
     "markdown",
     "lxml",
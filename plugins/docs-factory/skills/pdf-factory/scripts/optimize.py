@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Size optimization pass for final PDFs.
+
+Usage:
+    python optimize.py <pdf-path> [<pdf-path> ...] [--output <optimized.pdf>]
+
+Rewrites each PDF with:
+- uncompressed page content streams Flate-compressed (when that makes them
+  smaller)
+- identical objects (fonts, images, overlay resources and content streams
+  repeated across pages) merged into one, by a hash of their encoded bytes,
+  so nothing is decompressed
+- objects no longer referenced from the document removed
+
+Files are rewritten in place unless --output is given (single input only); a
+file is left untouched when the pass would not make it smaller. Reports bytes
+saved per file and in total. compose.py --optimize runs the same pass on the
+document it assembles before writing it.
+
+Exit code 0 on success, 1 if any file is missing or cannot be read.
+"""
+import argparse
+import io
+import os
+import sys
+
+_RESOURCE_CATEGORIES = ("/Font", "/XObject", "/ExtGState", "/ColorSpace", "/Pattern", "/Shading")
+
+
+def _serialized(obj) -> bytes:
+    """obj as it would be written to a PDF; streams keep their encoded data."""
+    buf = io.BytesIO()
+    obj.write_to_stream(buf)
+    return buf.getvalue()
+
+
+def encoded_data(stream) -> bytes:
+    """A stream's data as stored in the PDF (still encoded), taken from its serialization.
+
+    write_to_stream writes the dictionary with /Length, then the data between
+    "stream" and "endstream"; the /Length check skips any "stream" keyword
+    inside a dictionary string.
+    """
+    serialized = _serialized(stream)
+    end = len(serialized) - len(b"\nendstream")
+    start = serialized.find(b"\nstream\n")
+    while start != -1:
+        head, data_start = serialized[:start], start + len(b"\nstream\n")
+        if head.endswith(b">>") and b"/Length %d\n" % (end - data_start) in head:
+            return serialized[data_start:end]
+        start = serialized.find(b"\nstream\n", start + 1)
+    raise ValueError("unexpected stream serialization")
+
+
+def object_key(obj) -> str:
+    """Content hash of a PDF object: its entries and, for streams, the still-encoded data.
+
+    Nothing is decompressed, so large images cost one pass over their bytes
+    and never hit pypdf's decompression limits.
+    """
+    import hashlib
+
+    return hashlib.sha256(_serialized(obj)).hexdigest()
+
+
+def share_identical(page, shared: dict, seen: set, register: bool = True):
+    """Point page's content stream and resources at identical objects recorded in shared.
+
+    shared maps object_key → indirect reference. Objects referenced from a
+    resource (image masks, font files, a form's own resources) are matched
+    first, so a parent whose children all matched serializes exactly like
+    the recorded copy. seen holds the (document, object number) pairs
+    already visited. With register=False objects are only looked up, not
+    recorded (render.py matches a section's pages against the document it
+    is appending them to).
+    """
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+    def visit_entries(obj):
+        items = obj.items() if isinstance(obj, DictionaryObject) else enumerate(obj)
+        for key, value in list(items):
+            if isinstance(value, IndirectObject):
+                visit(obj, key)
+            elif isinstance(value, (DictionaryObject, ArrayObject)):
+                visit_entries(value)
+
+    def visit(container, key):
+        value = container.raw_get(key) if isinstance(container, DictionaryObject) else container[key]
+        if not isinstance(value, IndirectObject) or (id(value.pdf), value.idnum) in seen:
+            return
+        seen.add((id(value.pdf), value.idnum))
+        target = value.get_object()
+        if isinstance(target, (DictionaryObject, ArrayObject)):
+            visit_entries(target)
+        key_hash = object_key(target)
+        match = shared.get(key_hash)
+        if match is not None:
+            container[key] = match
+        elif register:
+            shared[key_hash] = value
+
+    if "/Contents" in page:
+        visit(page, NameObject("/Contents"))
+    resources = page.get("/Resources")
+    if resources is None:
+        return
+    resources = resources.get_object()
+    for category in _RESOURCE_CATEGORIES:
+        entries = resources.get(category)
+        if entries is None:
+            continue
+        entries = entries.get_object()
+        for name in list(entries.keys()):
+            visit(entries, name)
+
+
+def _compress_contents(writer) -> int:
+    """Flate-compress unfiltered page content streams that shrink; returns how many."""
+    from pypdf.generic import StreamObject
+
+    compressed = 0
+    for page in writer.pages:
+        contents = page.get("/Contents")
+        stream = contents.get_object() if contents is not None else None
+        if not isinstance(stream, StreamObject) or "/Filter" in stream:
+            continue
+        encoded = stream.flate_encode()
+        if len(_serialized(encoded)) >= len(_serialized(stream)):
+            continue
+        page.replace_contents(encoded)
+        compressed += 1
+    return compressed
+
+
+def optimize_bytes(data: bytes) -> bytes:
+    """Compress content streams, merge identical objects and drop unreferenced ones.
+
+    Returns the optimized PDF bytes, which may be larger than data (callers
+    keep the smaller). Raises pypdf errors (pypdf.errors.PyPdfError) for a
+    PDF pypdf cannot read.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter(clone_from=PdfReader(io.BytesIO(data)))
+    _compress_contents(writer)
+    shared, seen = {}, set()
+    for page in writer.pages:
+        share_identical(page, shared, seen)
+    merged = io.BytesIO()
+    writer.write(merged)
+    # Cloning copies only what the document references, so the duplicates
+    # that were replaced above are left behind.
+    out = io.BytesIO()
+    PdfWriter(clone_from=PdfReader(merged)).write(out)
+    return out.getvalue()
+
+
+def optimize_pdf(source, dest=None) -> tuple:
+    """Optimize a PDF (path or bytes); returns (bytes before, optimized PDF bytes).
+
+    When dest is a path the smaller of the optimized and original PDF is
+    written there; a file optimized in place is only rewritten if it shrank.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+    optimized = optimize_bytes(data)
+    smaller = len(optimized) < len(data)
+    in_place = not isinstance(source, (bytes, bytearray)) and dest is not None \
+        and os.path.abspath(dest) == os.path.abspath(source)
+    if dest is not None and (smaller or not in_place):
+        tmp = f"{dest}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(optimized if smaller else data)
+        os.replace(tmp, dest)
+    return len(data), optimized
+
+
+def format_savings(before: int, after: int) -> str:
+    saved = max(before - after, 0)
+    percent = 100 * saved / before if before else 0
+    return f"{before / 1024:.0f} KB → {min(after, before) / 1024:.0f} KB (saved {saved / 1024:.0f} KB, {percent:.1f}%)"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deduplicate and compress final PDFs")
+    parser.add_argument("pdfs", nargs="+", help="PDF files to optimize (rewritten in place by default)")
+    parser.add_argument("--output", default=None, help="Write the optimized PDF here (single input only)")
+    args = parser.parse_args(argv)
+
+    if args.output and len(args.pdfs) > 1:
+        print("Error: --output takes a single input PDF", file=sys.stderr)
+        sys.exit(1)
+
+    failed = False
+    total_before = total_after = 0
+    for path in args.pdfs:
+        if not os.path.exists(path):
+            print(f"Error: PDF not found: {path}", file=sys.stderr)
+            failed = True
+            continue
+        try:
+            before, optimized = optimize_pdf(path, args.output or path)
+        except Exception as e:
+            print(f"Error: Could not optimize {path}: {e}", file=sys.stderr)
+            failed = True
+            continue
+        after = min(len(optimized), before)
+        total_before += before
+        total_after += after
+        print(f"  {path}: {format_savings(before, after)}")
+
+    if len(args.pdfs) > 1:
+        print(f"\nTotal: {format_savings(total_before, total_after)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""In-memory pipeline: markdown/HTML → render → compose → validate → final PDF.
+
+Usage:
+    python pipeline.py --brand <brand-kit-path> --input <content.md|content.html> --output <final.pdf> [--metadata <metadata.json>] [--sections '[...]'] [--toc]
+
+Runs Steps 2–5 in one process, passing HTML strings and PDF bytes between the
+stages instead of writing content.html and content-pages.pdf and reading them
+back. Only the final PDF is written (plus the generated image assets render.py
+always places next to the content, which xhtml2pdf reads from disk).
+
+Markdown input (.md) is converted with the extensions listed in SKILL.md; its
+frontmatter supplies title/subtitle/author/date when --metadata is omitted.
+With --toc, compose.py's table of contents replaces any `[TOC]` block the
+markdown toc extension generated, so the document does not get two.
+
+Exit code 0 when the document builds and passes validation, 1 otherwise.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from cache import default_cache_dir
+
+MARKDOWN_EXTENSIONS = ["tables", "fenced_code", "codehilite", "toc", "meta", "attr_list"]
+_MARKDOWN_TOC = re.compile(r'<div class="toc">.*?</div>\s*', re.DOTALL)
+
+
+def markdown_to_html(source: str, drop_toc: bool = False) -> tuple:
+    """Convert markdown to HTML; returns (html, frontmatter dict).
+
+    drop_toc removes the block a `[TOC]` marker expands to, for documents that
+    get compose.py's TOC pages instead.
+    """
+    import markdown
+
+    md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    html = md.convert(source)
+    if drop_toc:
+        html = _MARKDOWN_TOC.sub("", html)
+    meta = {key: " ".join(values) for key, values in getattr(md, "Meta", {}).items()}
+    return html, meta
+
+
+def build_document(html: str, metadata: dict, brand_path: str = None, work_dir: str = None,
+                   section_titles: list = None, page_format: str = "A4", cache_dir: str = None,
+                   jobs: int = 1, chunked: bool = False, incremental: bool = False,
+                   optimize: bool = False, toc: bool = False) -> bytes:
+    """Render and compose a document entirely in memory; returns the final PDF bytes.
+
+    work_dir is where relative image paths in html resolve (default: cwd).
+    optimize runs the optimize.py size pass in compose and prints the bytes saved.
+    toc inserts compose.py's table of contents pages.
+    """
+    import io
+
+    from brand import load_brand, load_fallback, register_fonts
+    from compose import compose_document
+    from render import render_html_to_bytes
+
+    manifest = load_brand(brand_path) if brand_path else load_fallback()
+    register_fonts(manifest, cache_dir=cache_dir)
+    content = render_html_to_bytes(html, manifest, os.path.abspath(work_dir or os.getcwd()),
+                                   page_format=page_format, section_titles=section_titles,
+                                   cache_dir=cache_dir, jobs=jobs, chunked=chunked, incremental=incremental)
+    final = io.BytesIO()
+    saved = compose_document(brand_path, content, metadata, final, cache_dir=cache_dir, optimize=optimize, toc=toc)
+    if saved is not None:
+        print(f"Optimized: saved {saved / 1024:.0f} KB")
+    return final.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a branded PDF in one process without intermediate files")
+    parser.add_argument("--brand", required=False, help="Path to brand kit skill directory")
+    parser.add_argument("--input", required=True, help="Markdown (.md) or HTML content file")
+    parser.add_argument("--metadata", default=None, help="Metadata JSON file (default: markdown frontmatter)")
+    parser.add_argument("--output", required=True, help="Final PDF path")
+    parser.add_argument("--format", default="A4", choices=["A4", "Letter"], help="Page format")
+    parser.add_argument("--sections", default=None, help="JSON array of section titles to hide from content pages")
+    parser.add_argument("--cache-dir", default=None, help="Cache directory (default: $PDF_FACTORY_CACHE or ~/.cache/pdf-factory)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the persistent caches")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes for image preprocessing and --chunked rendering")
+    parser.add_argument("--chunked", action="store_true", help="Render each h1 section separately and concatenate")
+    parser.add_argument("--incremental", action="store_true", help="Re-render only changed h1 sections (implies --chunked)")
+    parser.add_argument("--optimize", action="store_true", help="Deduplicate and compress the final PDF")
+    parser.add_argument("--toc", action="store_true", help="Insert table of contents pages after the front cover")
+    parser.add_argument("--no-validate", action="store_true", help="Skip validate_output checks")
+    args = parser.parse_args(argv)
+
+    if args.jobs < 1:
+        print(f"Error: --jobs must be at least 1, got {args.jobs}", file=sys.stderr)
+        sys.exit(1)
+    if args.incremental and args.no_cache:
+        print("Error: --incremental needs the section cache; remove --no-cache", file=sys.stderr)
+        sys.exit(1)
+    for path, label in [(args.input, "Input file"), (args.metadata, "Metadata JSON")]:
+        if path and not os.path.exists(path):
+            print(f"Error: {label} not found: {path}", file=sys.stderr)
+            sys.exit(1)
+
+    with open(args.input) as f:
+        source = f.read()
+    frontmatter = {}
+    if args.input.lower().endswith((".md", ".markdown")):
+        html, frontmatter = markdown_to_html(source, drop_toc=args.toc)
+    else:
+        html = source
+
+    if args.metadata:
+        with open(args.metadata) as f:
+            metadata = json.load(f)
+    else:
+        metadata = frontmatter
+
+    section_titles = json.loads(args.sections) if args.sections else None
+    cache_dir = None if args.no_cache else (args.cache_dir or default_cache_dir())
+
+    start = time.perf_counter()
+    try:
+        pdf = build_document(html, metadata, brand_path=args.brand,
+                             work_dir=os.path.dirname(os.path.abspath(args.input)),
+                             section_titles=section_titles, page_format=args.format, cache_dir=cache_dir,
+                             jobs=args.jobs, chunked=args.chunked, incremental=args.incremental,
+                             optimize=args.optimize, toc=args.toc)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    built = time.perf_counter()
+
+    all_pass = True
+    if not args.no_validate:
+        from validate_output import run_checks
+
+        for name, (passed, message) in run_checks(pdf, args.brand):
+            all_pass = all_pass and passed
+            print(f"  [{'PASS' if passed else 'FAIL'}] {name}: {message}")
+
+    with open(args.output, "wb") as f:
+        f.write(pdf)
+    print(f"\nBuilt {args.output} ({len(pdf) / 1024:.0f} KB) — build {built - start:.2f}s, "
+          f"validate {time.perf_counter() - built:.2f}s")
+
+    if not all_pass:
+        print("Validation failed. Fix errors above and re-run.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
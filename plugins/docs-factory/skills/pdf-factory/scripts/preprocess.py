@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""Single-pass HTML preprocessing for render.py.
+
+Tokenizes the content HTML once and runs every xhtml2pdf compatibility
+transform as a visitor over the token stream:
+
+- section page breaks and hidden section markers (h1)
+- <figure>/<figcaption> → <div class="figure">/<p class="figcaption">
+- newline → <br/> inside <pre><code> blocks
+- img width attributes → pt-based inline styles
+- SVG → PNG rasterization (<img src="*.svg"> and inline <svg>)
+- brand corner radius on raster images
+
+The tokenizer only stops at the tags these transforms care about; all other
+markup and text passes through as opaque slices, so the document is scanned
+once and joined once instead of being copied by each regex pass.
+"""
+import os
+import re
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from cache import DiskCache, content_hash, file_hash
+
+TEXT, START, END = "text", "start", "end"
+
+Token = namedtuple("Token", "kind name raw")
+
+_WATCHED_TAGS = ("h1", "figure", "figcaption", "pre", "code", "img", "svg")
+_TOKEN_RE = re.compile(
+    r"<(/?)(" + "|".join(_WATCHED_TAGS) + r")(?=[\s>/])[^>]*>",
+    re.IGNORECASE,
+)
+_STRIP_TAGS_RE = re.compile(r"<[^>]+>")
+_WIDTH_ATTR_RE = re.compile(r'\s+width="(\d+)"')
+_SRC_ATTR_RE = re.compile(r'src="([^"]+)"')
+_IMG_OPEN_RE = re.compile(r"<img\b", re.IGNORECASE)
+
+SVG_DPI = 300
+ROUNDING_DPI = 150
+
+_PAGE_BREAK = Token(TEXT, None, '<div style="page-break-before: always;"></div>')
+
+
+def tokenize(html: str):
+    """Yield Tokens for watched tags and opaque text runs between them."""
+    pos = 0
+    for match in _TOKEN_RE.finditer(html):
+        start = match.start()
+        if start > pos:
+            yield Token(TEXT, None, html[pos:start])
+        kind = END if match.group(1) else START
+        yield Token(kind, match.group(2).lower(), match.group(0))
+        pos = match.end()
+    if pos < len(html):
+        yield Token(TEXT, None, html[pos:])
+
+
+def _apply_corner_radius(img_path: str, radius_pt: float, output_path: str, dpi: int = 150):
+    """Apply rounded corners to a raster image using Pillow.
+
+    Converts pt radius to pixels based on DPI, creates RGBA image with
+    transparent rounded corners. Only activates when radius_pt > 0.
+    """
+    from PIL import Image, ImageChops, ImageDraw
+
+    radius_px = int(radius_pt * dpi / 72)
+    if radius_px < 1:
+        return img_path
+
+    img = Image.open(img_path).convert("RGBA")
+    w, h = img.size
+
+    mask = Image.new("L", (w, h), 0)
+    draw = ImageDraw.Draw(mask)
+    draw.rounded_rectangle([(0, 0), (w, h)], radius=radius_px, fill=255)
+
+    # Multiply with original alpha to preserve existing transparency (e.g. logos)
+    original_alpha = img.split()[3]
+    combined = ImageChops.multiply(original_alpha, mask)
+    img.putalpha(combined)
+    img.save(output_path, "PNG")
+    return output_path
+
+
+def _svg_backend():
+    """Return (svg2rlg, renderPM) or None when svglib/reportlab are unavailable."""
+    try:
+        from svglib.svglib import svg2rlg
+        from reportlab.graphics import renderPM
+    except ImportError:
+        return None
+    return svg2rlg, renderPM
+
+
+def _rasterize_svg(svg_path: str, png_path: str, dpi: int = 300) -> bool:
+    """Rasterize an SVG file to PNG. Returns False if svglib cannot parse it."""
+    backend = _svg_backend()
+    if backend is None:
+        return False
+    svg2rlg, renderPM = backend
+    drawing = svg2rlg(svg_path)
+    if drawing is None:
+        return False
+    renderPM.drawToFile(drawing, png_path, fmt="PNG", dpi=dpi)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Visitors — each takes a token iterator and yields the transformed stream
+# ---------------------------------------------------------------------------
+
+def _visit_section_breaks(tokens, section_titles: set):
+    """Insert page breaks before h1 headings (except the first).
+
+    When section_titles is non-empty, h1s whose plain text matches a title
+    are replaced with invisible text markers that keep their outline entry,
+    which compose.py reads to find section pages.
+    """
+    h1_count = 0
+    buffered = None
+    for tok in tokens:
+        is_h1_start = tok.kind == START and tok.name == "h1"
+        if is_h1_start:
+            h1_count += 1
+            if h1_count > 1:
+                if buffered is not None:
+                    buffered.append(_PAGE_BREAK)
+                else:
+                    yield _PAGE_BREAK
+
+        if buffered is not None:
+            buffered.append(tok)
+            if tok.kind == END and tok.name == "h1":
+                yield from _section_marker(buffered, section_titles)
+                buffered = None
+            continue
+
+        if is_h1_start and section_titles:
+            buffered = [tok]
+            continue
+        yield tok
+
+    if buffered is not None:
+        yield from buffered
+
+
+def _section_marker(h1_tokens: list, section_titles: set):
+    """Collapse a buffered h1 into an invisible marker if it is a section title."""
+    inner_html = "".join(tok.raw for tok in h1_tokens[1:-1])
+    plain_text = _STRIP_TAGS_RE.sub("", inner_html).strip()
+    if plain_text in section_titles:
+        yield Token(TEXT, None, (
+            '<p style="font-size:1pt; line-height:1pt; margin:0; '
+            'padding:0; color:white; -pdf-outline: true; -pdf-outline-level: 0;">'
+            f'{plain_text}</p>'
+        ))
+    else:
+        yield from h1_tokens
+
+
+def _visit_figures(tokens):
+    """Convert <figure>/<figcaption> to <div>/<p> for xhtml2pdf block layout."""
+    for tok in tokens:
+        if tok.name == "figure":
+            if tok.kind == START:
+                tok = Token(START, "div", f'<div class="figure"{tok.raw[7:-1]}>')
+            else:
+                tok = Token(END, "div", "</div>")
+        elif tok.name == "figcaption":
+            if tok.kind == START:
+                tok = Token(START, "p", f'<p class="figcaption"{tok.raw[11:-1]}>')
+            else:
+                tok = Token(END, "p", "</p>")
+        yield tok
+
+
+def _visit_code_blocks(tokens):
+    """Replace newlines with <br/> inside <pre><code>...</code></pre> blocks.
+
+    Leading/trailing newlines of the block content are stripped first to
+    avoid spurious <br/> whitespace. Unterminated blocks pass through as-is.
+    """
+    pending = []   # tokens held while we look for the matching structure
+    content = None
+    for tok in tokens:
+        if content is None:
+            if pending:
+                if tok.kind == START and tok.name == "code":
+                    pending.append(tok)
+                    content = []
+                    continue
+                yield from pending
+                pending = []
+            if tok.kind == START and tok.name == "pre":
+                pending.append(tok)
+            else:
+                yield tok
+            continue
+
+        if len(pending) == 3:
+            # Saw </code>; the block only closes if </pre> follows directly
+            if tok.kind == END and tok.name == "pre":
+                yield from pending[:2]
+                yield from _fix_code_newlines(content)
+                yield pending[2]
+                yield tok
+                pending, content = [], None
+                continue
+            content.append(pending.pop())
+        if tok.kind == END and tok.name == "code":
+            pending.append(tok)
+        else:
+            content.append(tok)
+
+    yield from pending[:2]
+    if content:
+        yield from content
+    yield from pending[2:]
+
+
+def _fix_code_newlines(content: list):
+    """Strip outer newlines and turn inner newlines into <br/> tags."""
+    if content and content[0].kind == TEXT:
+        content[0] = content[0]._replace(raw=content[0].raw.lstrip("\n"))
+    if content and content[-1].kind == TEXT:
+        content[-1] = content[-1]._replace(raw=content[-1].raw.rstrip("\n"))
+    for tok in content:
+        if "\n" in tok.raw:
+            tok = tok._replace(raw=tok.raw.replace("\n", "<br/>"))
+        yield tok
+
+
+def _convert_img_width(tag: str) -> str:
+    """Move a bare numeric width attribute into a pt-based inline style."""
+    match = _WIDTH_ATTR_RE.search(tag)
+    if not match:
+        return tag
+    width_val = match.group(1)
+    tag = re.sub(r'\s+width="' + re.escape(width_val) + '"', "", tag)
+    if 'style="' in tag:
+        return tag.replace('style="', f'style="width: {width_val}pt; ', 1)
+    return _IMG_OPEN_RE.sub(f'<img style="width: {width_val}pt"', tag, count=1)
+
+
+def _unlink(path: str):
+    """Remove path if present."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _tmp_path(path: str) -> str:
+    """Process-private name next to path, keeping its extension.
+
+    Outputs are written there and renamed onto path, so another render
+    sharing the work dir (batch.py runs jobs in parallel) never reads a
+    half-written file, and a file hard-linked from the cache is replaced
+    rather than written through.
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}.tmp{ext}"
+
+
+def _run_image_job(job: dict) -> dict:
+    """Execute one image job. Plain data in and out, so it can run in a worker process.
+
+    Steps: rasterize job["svg"] to job["png"], then round job["png"] into
+    job["rounded"], adding each output to its DiskCache namespace. Jobs whose
+    rounded output was already materialized from the cache do nothing.
+    Returns which steps produced their output file.
+    """
+    done = {"png": job["svg"] is None, "rounded": job["rounded_ready"]}
+    if done["rounded"]:
+        return done
+    if job["svg"]:
+        tmp = _tmp_path(job["png"])
+        try:
+            done["png"] = _rasterize_svg(job["svg"], tmp, dpi=SVG_DPI)
+            if done["png"]:
+                os.replace(tmp, job["png"])
+        except Exception:
+            done["png"] = False
+        finally:
+            _unlink(tmp)
+        if done["png"] and job["cache_dir"]:
+            try:
+                DiskCache("svg", root=job["cache_dir"]).store(job["svg_key"], job["png"])
+            except OSError:
+                pass
+    if done["png"] and job["rounded"]:
+        tmp = _tmp_path(job["rounded"])
+        try:
+            result = _apply_corner_radius(job["png"], job["radius_pt"], tmp, dpi=ROUNDING_DPI)
+            if result == tmp:
+                os.replace(tmp, job["rounded"])
+                done["rounded"] = True
+        except Exception:
+            pass
+        finally:
+            _unlink(tmp)
+        if done["rounded"] and job["cache_dir"]:
+            try:
+                DiskCache("rounded", root=job["cache_dir"]).store(job["rounded_key"], job["rounded"])
+            except OSError:
+                pass
+    return done
+
+
+def run_image_jobs(jobs: list, workers: int = 1) -> list:
+    """Run image jobs serially, or across a process pool when workers > 1."""
+    pending = [i for i, job in enumerate(jobs) if not job["rounded_ready"]]
+    results = [{"png": True, "rounded": True} for _ in jobs]
+    if workers > 1 and len(pending) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            done = list(executor.map(_run_image_job, [jobs[i] for i in pending]))
+    else:
+        done = [_run_image_job(jobs[i]) for i in pending]
+    for i, result in zip(pending, done):
+        results[i] = result
+    return results
+
+
+class _ImageContext:
+    """Per-document image work, planned during the visit and executed afterwards.
+
+    Each distinct image source (SVG content hash + DPI, or raster file hash)
+    becomes one job, however often it appears. With a cache_dir, results are
+    looked up at planning time in two persistent DiskCache namespaces:
+    "rounded" (keyed by source hash + radius_pt + DPI) and "svg". A rounded
+    hit needs no work at all; an svg hit only needs rounding.
+
+    Generated files are named by their key, never by position in the
+    document, so renders sharing a work dir only ever write the same content
+    to the same name.
+    """
+
+    def __init__(self, manifest: dict, work_dir: str, cache_dir: str = None):
+        self.work_dir = work_dir
+        self.cache_dir = cache_dir
+        imagery = manifest.get("tokens", {}).get("imagery", {})
+        self.radius_pt = imagery.get("corner_radius_pt", 0)
+        self.svg_enabled = _svg_backend() is not None
+        self.svg_cache = DiskCache("svg", root=cache_dir) if cache_dir else None
+        self.rounded_cache = DiskCache("rounded", root=cache_dir) if cache_dir else None
+        self.jobs = []
+        self.job_ids = {}  # source identity → index into self.jobs
+        self.results = None
+
+    def resolve(self, src: str) -> str:
+        return src if os.path.isabs(src) else os.path.join(self.work_dir, src)
+
+    def _rounded_target(self, source_key: str) -> tuple:
+        """Return (rounded_path, rounded_key, ready) for a source, or Nones without a radius.
+
+        Rounded files are named by key, so repeated renders in the same work
+        directory overwrite rather than accumulate them.
+        """
+        if self.radius_pt <= 0:
+            return None, None, False
+        rounded_key = f"{content_hash(source_key, str(self.radius_pt), str(ROUNDING_DPI))}.png"
+        rounded = os.path.join(self.work_dir, f"_rounded_{rounded_key[:16]}.png")
+        ready = bool(self.rounded_cache and self.rounded_cache.materialize(rounded_key, rounded))
+        return rounded, rounded_key, ready
+
+    def _add_job(self, identity, svg, svg_key, png_path, converted, rounded_target) -> int:
+        rounded, rounded_key, ready = rounded_target
+        self.jobs.append({
+            "svg": svg, "svg_key": svg_key, "png": png_path, "converted": converted,
+            "rounded": rounded, "rounded_key": rounded_key, "rounded_ready": ready,
+            "radius_pt": self.radius_pt, "cache_dir": self.cache_dir,
+        })
+        self.job_ids[identity] = len(self.jobs) - 1
+        return self.job_ids[identity]
+
+    def _plan_svg(self, key: str, png_path: str, write_svg) -> int:
+        """Plan an SVG job: rounded hit → nothing to do; svg hit → rounding only;
+        miss → rasterize (if svglib is available) then round."""
+        rounded_target = self._rounded_target(key)
+        if rounded_target[2]:
+            return self._add_job(key, None, key, None, True, rounded_target)
+        if self.svg_cache and self.svg_cache.materialize(key, png_path):
+            return self._add_job(key, None, key, png_path, True, rounded_target)
+        if not self.svg_enabled:
+            return None
+        return self._add_job(key, write_svg(), key, png_path, True, rounded_target)
+
+    def plan_img(self, src: str):
+        """Register the work for an <img> source; return its job index or None."""
+        try:
+            if src.endswith(".svg"):
+                svg_path = self.resolve(src)
+                if not os.path.exists(svg_path):
+                    return None
+                with open(svg_path, "rb") as f:
+                    key = f"{content_hash(f.read(), str(SVG_DPI))}.png"
+                if key in self.job_ids:
+                    return self.job_ids[key]
+                png_path = os.path.join(self.work_dir, f"_svg2png_{key[:16]}.png")
+                return self._plan_svg(key, png_path, lambda: svg_path)
+
+            if self.radius_pt <= 0 or src.startswith("data:"):
+                return None
+            img_path = self.resolve(src)
+            if not os.path.exists(img_path):
+                return None
+            source_key = file_hash(img_path)
+            identity = ("img", source_key)
+            if identity in self.job_ids:
+                return self.job_ids[identity]
+            return self._add_job(identity, None, None, img_path, False,
+                                 self._rounded_target(source_key))
+        except Exception:
+            return None
+
+    def plan_inline_svg(self, svg_content: str):
+        """Register the work for an inline <svg> block; return its job index or None."""
+        key = f"{content_hash(svg_content, str(SVG_DPI))}.png"
+        if key in self.job_ids:
+            return self.job_ids[key]
+        try:
+            svg_file = os.path.join(self.work_dir, f"_inline_svg_{key[:16]}.svg")
+            png_path = os.path.join(self.work_dir, f"_inline_svg_{key[:16]}.png")
+
+            def write_svg():
+                tmp = _tmp_path(svg_file)
+                with open(tmp, "w") as f:
+                    f.write(svg_content)
+                os.replace(tmp, svg_file)
+                return svg_file
+
+            return self._plan_svg(key, png_path, write_svg)
+        except Exception:
+            return None
+
+    def final_src(self, job_id: int):
+        """Path that should replace the original src after the job ran, or None."""
+        job, done = self.jobs[job_id], self.results[job_id]
+        if done["rounded"]:
+            return job["rounded"]
+        if done["png"] and job["converted"]:
+            return job["png"]
+        return None
+
+
+class _PendingImage:
+    """Placeholder for an image tag whose src depends on a job result."""
+
+    def __init__(self, tag: str, src: str, job_id: int, fallback: str = None):
+        self.tag = tag
+        self.src = src
+        self.job_id = job_id
+        self.fallback = fallback  # original inline <svg> markup
+
+    def render(self, ctx: _ImageContext) -> str:
+        new_src = ctx.final_src(self.job_id)
+        if new_src is None:
+            return self.fallback if self.fallback is not None else self.tag
+        if self.fallback is not None:
+            return f'<img src="{new_src}" />'
+        return self.tag.replace(f'src="{self.src}"', f'src="{new_src}"')
+
+
+def _plan_img_tag(tag: str, ctx: _ImageContext):
+    """Convert the width attribute now; defer SVG/corner-radius src rewriting."""
+    tag = _convert_img_width(tag)
+    match = _SRC_ATTR_RE.search(tag)
+    if not match:
+        return tag
+    src = match.group(1)
+    job_id = ctx.plan_img(src)
+    if job_id is None:
+        return tag
+    return _PendingImage(tag, src, job_id)
+
+
+def _visit_images(tokens, ctx: _ImageContext):
+    """Plan <img> rewrites and inline <svg> replacements as image jobs."""
+    svg_buffer = None
+    for tok in tokens:
+        if svg_buffer is not None:
+            svg_buffer.append(tok)
+            if tok.kind == END and tok.name == "svg":
+                svg_content = "".join(t.raw for t in svg_buffer)
+                job_id = ctx.plan_inline_svg(svg_content)
+                if job_id is None:
+                    yield Token(TEXT, None, svg_content)
+                else:
+                    yield Token(START, "img", _PendingImage(None, None, job_id, fallback=svg_content))
+                svg_buffer = None
+            continue
+
+        if tok.kind == START and tok.name == "svg":
+            svg_buffer = [tok]
+        elif tok.kind == START and tok.name == "img":
+            yield tok._replace(raw=_plan_img_tag(tok.raw, ctx))
+        else:
+            yield tok
+
+    if svg_buffer is not None:
+        yield from svg_buffer
+
+
+def split_sections(html: str) -> list:
+    """Split preprocessed HTML at the page breaks inserted before each h1.
+
+    Each returned chunk starts on a fresh page when rendered, so rendering the
+    chunks separately and concatenating the PDFs gives the same page sequence.
+    Whitespace-only chunks are dropped. Assumes h1 headings are top-level
+    elements (as produced by markdown), so no chunk leaves a tag open.
+    """
+    return [chunk for chunk in html.split(_PAGE_BREAK.raw) if chunk.strip()]
+
+
+def preprocess_html(html: str, manifest: dict, work_dir: str, section_titles: list = None,
+                    cache_dir: str = None, workers: int = 1) -> str:
+    """Apply all xhtml2pdf compatibility transforms in a single pass.
+
+    Replaces the per-transform regex chain kept in _legacy_preprocess.py
+    (_insert_section_breaks → _preprocess_figures → _preprocess_code_blocks
+    → _preprocess_image_widths → _preprocess_svg_images → _preprocess_images).
+    The output is the same for markdown-generated HTML. It differs on purpose
+    in four cases, where the tokenizer matches tags and attributes as HTML
+    does rather than by regex:
+    - uppercase <H1> headings get a page break or section marker, like <h1>
+    - uppercase <IMG width=...> gets its width converted, like <img>; the
+      legacy chain left it alone
+    - a self-closing <figure/> is converted to <div class="figure"/>
+    - data-width (or any other *-width attribute) is left alone; only a real
+      width attribute is rewritten to a CSS width
+    With cache_dir, SVG rasterizations are reused across renders.
+
+    Image work (SVG rasterization, corner radius) is collected during the
+    visit and run afterwards — across a process pool when workers > 1 —
+    before the document is joined once with the final image paths.
+    """
+    ctx = _ImageContext(manifest, work_dir, cache_dir)
+    stream = tokenize(html)
+    stream = _visit_section_breaks(stream, set(section_titles or []))
+    stream = _visit_figures(stream)
+    stream = _visit_code_blocks(stream)
+    tokens = list(_visit_images(stream, ctx))
+    ctx.results = run_image_jobs(ctx.jobs, workers=workers)
+    return "".join(
+        tok.raw if isinstance(tok.raw, str) else tok.raw.render(ctx) for tok in tokens
+    )
@@ -13,116 +13,12 @@ import os
 import sys
 from pathlib import Path
 
-# Default tokens used by fallback mode and as a safety net
-_DEFAULT_TOKENS = {
-    "colors": {
-        "text-heading": "#1A1A1A",
-        "text-body": "#1A1A1A",
-        "text-muted": "#7A7A7A",
-        "text-inverse": "#FFFFFF",
-        "background-page": "#FFFFFF",
-        "background-alt": "#F0F0F0",
-        "border-default": "#B0B0B0",
-        "border-strong": "#4A4A4A",
-        "link": "#2E7D8C",
-        "highlight": "#E8A838",
-    },
-    "type_scale": {
-        "display-lg": {"size_pt": 72, "weight": "bold",  "font": "heading", "line_height": 1.0},
-        "display":  {"size_pt": 48, "weight": "bold",    "font": "heading", "line_height": 1.1},
-        "h1":       {"size_pt": 32, "weight": "bold",    "font": "heading", "line_height": 1.15},
-        "h2":       {"size_pt": 24, "weight": "bold",    "font": "heading", "line_height": 1.2},
-        "h3":       {"size_pt": 18, "weight": "bold",    "font": "heading", "line_height": 1.25},
-        "h4":       {"size_pt": 14, "weight": "bold",    "font": "heading", "line_height": 1.3},
-        "body":     {"size_pt": 11, "weight": "regular",  "font": "body",    "line_height": 1.5},
-        "body-sm":  {"size_pt": 9,  "weight": "regular",  "font": "body",    "line_height": 1.5},
-        "caption":  {"size_pt": 8,  "weight": "regular",  "font": "body",    "line_height": 1.4},
-        "overline": {"size_pt": 8,  "weight": "bold",    "font": "body",    "line_height": 1.4, "transform": "uppercase"},
-        "code":     {"size_pt": 10, "weight": "regular",  "font": "mono",    "line_height": 1.5},
-    },
-}
-
-
-def load_brand(brand_path: str) -> dict:
-    """Load brand manifest and resolve asset paths."""
-    brand_dir = Path(brand_path)
-    manifest_path = brand_dir / "assets" / "manifest.json"
-    if not manifest_path.exists():
-        print(f"Error: Brand manifest not found at {manifest_path}", file=sys.stderr)
-        sys.exit(1)
-    with open(manifest_path) as f:
-        manifest = json.load(f)
-    manifest["_base_path"] = str(brand_dir / "assets")
-    return manifest
-
-
-def load_fallback() -> dict:
-    """Load fallback defaults when no brand kit is specified."""
-    fallback_dir = Path(__file__).parent.parent / "assets" / "fallback"
-    return {
-        "brand": {"name": "Default", "slug": "default", "version": "1.0.0"},
-        "fonts": {
-            "body": {"regular": str(fallback_dir / "body.ttf"), "bold": str(fallback_dir / "body-bold.ttf"), "italic": str(fallback_dir / "body-italic.ttf")},
-            "mono": {"regular": str(fallback_dir / "mono.ttf")},
-        },
-        "tokens": _DEFAULT_TOKENS,
-        "defaults": {"page_format": "A4"},
-        "_base_path": str(fallback_dir),
-        "_fallback": True,
-    }
-
-
-def register_fonts(manifest: dict):
-    """Register all brand fonts with reportlab for direct canvas use (compose.py zones).
-
-    Returns dict of {role: {variant: font_name}} for registered fonts.
-    xhtml2pdf uses its own @font-face CSS mechanism (see build_stylesheet).
-    """
-    from reportlab.lib.fonts import addMapping
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-
-    base = manifest["_base_path"]
-    fonts = manifest.get("fonts", {})
-    registered = {}
-
-    for role, variants in fonts.items():
-        if isinstance(variants, dict):
-            registered[role] = {}
-            for variant, rel_path in variants.items():
-                font_path = os.path.join(base, rel_path) if not os.path.isabs(rel_path) else rel_path
-                if os.path.exists(font_path) and os.path.getsize(font_path) > 0:
-                    font_name = f"Brand-{role}-{variant}"
-                    try:
-                        pdfmetrics.registerFont(TTFont(font_name, font_path))
-                        registered[role][variant] = font_name
-                    except Exception as e:
-                        print(f"Warning: Could not register font {font_name}: {e}", file=sys.stderr)
-
-    for role, variants in registered.items():
-        family_name = f"Brand-{role}"
-        regular = variants.get("regular")
-        bold = variants.get("bold")
-        italic = variants.get("italic")
-        bold_italic = variants.get("bold_italic")
-
-        if regular:
-            addMapping(family_name, 0, 0, regular)
-        if bold:
-            addMapping(family_name, 1, 0, bold)
-        if italic:
-            addMapping(family_name, 0, 1, italic)
-        if bold_italic:
-            addMapping(family_name, 1, 1, bold_italic)
-
-    return registered
-
-
-def _resolve_font_name(font_role: str, weight: str) -> str:
-    """Map a font role + weight to the registered reportlab font name."""
-    if weight == "bold":
-        return f"Brand-{font_role}-bold"
-    return f"Brand-{font_role}-regular"
+sys.path.insert(0, str(Path(__file__).parent))
+from brand import _DEFAULT_TOKENS, load_brand, load_fallback, register_fonts
+from cache import DiskCache, content_hash, default_cache_dir, file_hash
+from font_index import font_fingerprints
+from preprocess import preprocess_html, split_sections
+from startup import RENDER_MODULES, add_profile_startup_argument
 
 
 def _build_font_face_css(manifest: dict) -> str:
@@ -161,8 +57,65 @@ def _build_font_face_css(manifest: dict) -> str:
     return "\n".join(rules)
 
 
-def build_stylesheet(manifest: dict, css_path: str = None) -> str:
-    """Build CSS stylesheet from brand tokens, with @font-face and token-derived overrides."""
+_STYLESHEETS = {}  # stylesheet key → assembled CSS, for repeat builds in one process
+
+# Bump when _assemble_stylesheet or _build_font_face_css change what they emit,
+# so stylesheets cached by an older render.py are not served again.
+_STYLESHEET_VERSION = "2"
+
+
+def _font_hashes(manifest: dict) -> str:
+    """Content hashes of the brand's font files, from its font index, as one string."""
+    font_paths = [rel_path for variants in manifest.get("fonts", {}).values() if isinstance(variants, dict)
+                  for rel_path in variants.values()]
+    fingerprints = font_fingerprints(manifest.get("_base_path", ""), font_paths)
+    return json.dumps({path: fp["hash"] for path, fp in fingerprints.items()}, sort_keys=True)
+
+
+def _stylesheet_key(manifest: dict, base_css_path: str) -> str:
+    """Key for an assembled stylesheet.
+
+    Covers the stylesheet code version, manifest content, base.css path and
+    mtime, and the content hash of every brand font file (from the brand's
+    font index), so a swapped font file yields a new stylesheet.
+    """
+    try:
+        base_mtime = str(os.stat(base_css_path).st_mtime_ns)
+    except OSError:
+        base_mtime = "missing"
+    manifest_json = json.dumps(manifest, sort_keys=True, default=str)
+    return (f"{content_hash(_STYLESHEET_VERSION, manifest_json, os.path.abspath(base_css_path), base_mtime, _font_hashes(manifest))}"
+            ".css")
+
+
+def build_stylesheet(manifest: dict, css_path: str = None, cache_dir: str = None) -> str:
+    """Build CSS stylesheet from brand tokens, with @font-face and token-derived overrides.
+
+    The assembled CSS is memoized in process and, when cache_dir is given,
+    in its "css" namespace, keyed by the stylesheet version, manifest
+    content, base.css mtime and brand font file hashes.
+    """
+    base_css_path = css_path or str(Path(__file__).parent.parent / "assets" / "css" / "base.css")
+    key = _stylesheet_key(manifest, base_css_path)
+    if key in _STYLESHEETS:
+        return _STYLESHEETS[key]
+
+    css_cache = DiskCache("css", root=cache_dir) if cache_dir else None
+    cached = css_cache.read_bytes(key) if css_cache else None
+    if cached is not None:
+        css = cached.decode("utf-8")
+    else:
+        css = _assemble_stylesheet(manifest, base_css_path)
+        if css_cache:
+            try:
+                css_cache.store_bytes(key, css.encode("utf-8"))
+            except OSError:
+                pass
+    _STYLESHEETS[key] = css
+    return css
+
+
+def _assemble_stylesheet(manifest: dict, base_css_path: str) -> str:
     tokens = manifest.get("tokens", _DEFAULT_TOKENS)
     colors = tokens.get("colors", _DEFAULT_TOKENS["colors"])
     type_scale = tokens.get("type_scale", _DEFAULT_TOKENS["type_scale"])
@@ -171,7 +124,6 @@ def build_stylesheet(manifest: dict, css_path: str = None) -> str:
     font_face_css = _build_font_face_css(manifest)
 
     # 2. Load base.css structural template
-    base_css_path = css_path or str(Path(__file__).parent.parent / "assets" / "css" / "base.css")
     base_css = ""
     if os.path.exists(base_css_path):
         with open(base_css_path) as f:
@@ -217,291 +169,173 @@ td {{ border-bottom-color: {colors.get("border-default", "#B0B0B0")}; }}
     return font_face_css + "\n" + base_css + "\n" + overrides
 
 
-def _insert_section_breaks(html: str, section_titles: list = None) -> str:
-    """Insert page breaks before h1 headings (except the first).
-
-    Without this, xhtml2pdf renders all content as a continuous flow and
-    section headings can land mid-page. Adding an explicit page-break-before
-    ensures each top-level section starts on a fresh page.
+def _html_document(css: str, body: str) -> str:
+    """Wrap preprocessed body HTML and the brand stylesheet into a full document."""
+    return f"""<!DOCTYPE html>
+<html>
+<head><style>{css}</style></head>
+<body>{body}</body>
+</html>"""
 
-    We skip the first h1 to avoid a blank leading page.
 
-    When section_titles is provided, h1s matching a section title are
-    replaced with invisible text markers (for compose.py detection)
-    since the section divider page already displays the title.
-    """
-    import re
+def _render_document(full_html: str) -> tuple:
+    """Render one HTML document with xhtml2pdf. Returns (pdf_bytes, error_count).
 
-    section_set = set(section_titles or [])
-
-    # First pass: insert page breaks before h1s (existing logic)
-    h1_re = re.compile(r'(<h1[\s>])')
-    parts = h1_re.split(html)
-    result = []
-    h1_count = 0
-    for part in parts:
-        if h1_re.match(part):
-            h1_count += 1
-            if h1_count > 1:
-                result.append('<div style="page-break-before: always;"></div>')
-        result.append(part)
-    html = ''.join(result)
-
-    # Second pass: replace matched h1s with invisible markers
-    if section_set:
-        h1_full_re = re.compile(r'<h1[^>]*>(.*?)</h1>', re.DOTALL)
-
-        def replace_h1(match):
-            inner_html = match.group(1)
-            plain_text = re.sub(r'<[^>]+>', '', inner_html).strip()
-            if plain_text in section_set:
-                return (
-                    '<p style="font-size:1pt; line-height:1pt; margin:0; '
-                    f'padding:0; color:white;">{plain_text}</p>'
-                )
-            return match.group(0)
-
-        html = h1_full_re.sub(replace_h1, html)
-
-    return html
-
-
-def _apply_corner_radius(img_path: str, radius_pt: float, output_path: str, dpi: int = 150):
-    """Apply rounded corners to a raster image using Pillow.
-
-    Converts pt radius to pixels based on DPI, creates RGBA image with
-    transparent rounded corners. Only activates when radius_pt > 0.
+    Module-level so it can run in a worker process.
     """
-    from PIL import Image, ImageChops, ImageDraw
-
-    radius_px = int(radius_pt * dpi / 72)
-    if radius_px < 1:
-        return img_path
+    import io
+    from xhtml2pdf import pisa
 
-    img = Image.open(img_path).convert("RGBA")
-    w, h = img.size
+    buf = io.BytesIO()
+    status = pisa.CreatePDF(full_html, dest=buf)
+    return buf.getvalue(), status.err
 
-    mask = Image.new("L", (w, h), 0)
-    draw = ImageDraw.Draw(mask)
-    draw.rounded_rectangle([(0, 0), (w, h)], radius=radius_px, fill=255)
 
-    # Multiply with original alpha to preserve existing transparency (e.g. logos)
-    original_alpha = img.split()[3]
-    combined = ImageChops.multiply(original_alpha, mask)
-    img.putalpha(combined)
-    img.save(output_path, "PNG")
-    return output_path
+def _render_sections(documents: list, jobs: int = 1) -> list:
+    """Render section documents serially or across a process pool, preserving order."""
+    if jobs > 1 and len(documents) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(jobs, len(documents))) as executor:
+            return list(executor.map(_render_document, documents))
+    return [_render_document(doc) for doc in documents]
 
 
-def _preprocess_svg_images(html: str, manifest: dict, work_dir: str) -> str:
-    """Convert SVG references in HTML to high-DPI PNG for xhtml2pdf compatibility.
+def _concatenate_pdfs(pdf_blobs: list, dest):
+    """Append section PDFs in order into dest (a path or binary stream).
 
-    Handles both <img src="*.svg"> references and inline <svg>...</svg> blocks.
-    Uses svglib + reportlab (already installed) for conversion at 2x scale.
-    Falls back gracefully on conversion failure (leaves original tag intact).
+    Every section is a separate xhtml2pdf document, so an image used in
+    several sections arrives once per section. Before a section is appended
+    its pages are pointed at identical objects already in the output (see
+    optimize.share_identical), which writer.append() then keeps instead of
+    cloning them again.
     """
+    import io
+    from pypdf import PdfReader, PdfWriter
+
+    from optimize import share_identical
+
+    writer = PdfWriter()
+    shared = {}
+    recorded = set()  # writer objects already in shared
+    for blob in pdf_blobs:
+        reader = PdfReader(io.BytesIO(blob))
+        seen = set()
+        for page in reader.pages:
+            share_identical(page, shared, seen, register=False)
+        first = len(writer.pages)
+        writer.append(reader)
+        for page in writer.pages[first:]:
+            share_identical(page, shared, recorded)
+    writer.write(dest)
+
+
+def _section_key(document: str, manifest: dict, work_dir: str) -> str:
+    """Cache key for a rendered section: its full HTML (which embeds the
+    generated stylesheet), the brand manifest, the brand font files'
+    content hashes (the stylesheet only names their paths), and the content
+    of every local image it references."""
     import re
-    import tempfile
-    from pathlib import Path
-
-    try:
-        from svglib.svglib import svg2rlg
-        from reportlab.graphics import renderPM
-    except ImportError:
-        return html
-
-    svg_count = 0
-
-    # Handle <img src="*.svg"> references
-    def replace_svg_img(match):
-        nonlocal svg_count
-        full_tag = match.group(0)
-        src = match.group(1)
-
-        svg_path = src
-        if not os.path.isabs(svg_path):
-            svg_path = os.path.join(work_dir, svg_path)
-
-        if not os.path.exists(svg_path):
-            return full_tag
-
-        try:
-            drawing = svg2rlg(svg_path)
-            if drawing is None:
-                return full_tag
-            svg_count += 1
-            png_path = os.path.join(work_dir, f"_svg2png_{svg_count}.png")
-            renderPM.drawToFile(drawing, png_path, fmt="PNG", dpi=300)
-            return full_tag.replace(src, png_path)
-        except Exception:
-            return full_tag
-
-    html = re.sub(r'<img\s[^>]*src="([^"]+\.svg)"[^>]*>', replace_svg_img, html)
-
-    # Handle inline <svg>...</svg> blocks
-    def replace_inline_svg(match):
-        nonlocal svg_count
-        svg_content = match.group(0)
-
-        try:
-            svg_count += 1
-            svg_tmp = os.path.join(work_dir, f"_inline_svg_{svg_count}.svg")
-            png_path = os.path.join(work_dir, f"_inline_svg_{svg_count}.png")
-
-            with open(svg_tmp, "w") as f:
-                f.write(svg_content)
-
-            drawing = svg2rlg(svg_tmp)
-            if drawing is None:
-                return svg_content
-            renderPM.drawToFile(drawing, png_path, fmt="PNG", dpi=300)
-            return f'<img src="{png_path}" />'
-        except Exception:
-            return svg_content
-
-    html = re.sub(r'<svg[\s>].*?</svg>', replace_inline_svg, html, flags=re.DOTALL)
-
-    return html
-
-
-def _preprocess_images(html: str, manifest: dict, work_dir: str) -> str:
-    """Apply corner radius to raster images based on brand imagery tokens."""
-    import re
-
-    tokens = manifest.get("tokens", {})
-    imagery = tokens.get("imagery", {})
-    radius_pt = imagery.get("corner_radius_pt", 0)
-
-    if radius_pt <= 0:
-        return html
-
-    img_count = 0
-
-    def apply_radius(match):
-        nonlocal img_count
-        full_tag = match.group(0)
-        src = match.group(1)
 
-        # Skip SVG placeholders and data URIs
-        if src.endswith(".svg") or src.startswith("data:"):
-            return full_tag
-
-        img_path = src if os.path.isabs(src) else os.path.join(work_dir, src)
-        if not os.path.exists(img_path):
-            return full_tag
-
-        try:
-            img_count += 1
-            rounded_path = os.path.join(work_dir, f"_rounded_{img_count}.png")
-            _apply_corner_radius(img_path, radius_pt, rounded_path)
-            return full_tag.replace(src, rounded_path)
-        except Exception:
-            return full_tag
-
-    html = re.sub(r'<img\s[^>]*src="([^"]+)"[^>]*>', apply_radius, html)
-    return html
-
-
-def _preprocess_figures(html: str) -> str:
-    """Convert <figure>/<figcaption> to <div>/<p> for xhtml2pdf compatibility.
+    parts = [document, json.dumps(manifest, sort_keys=True, default=str), _font_hashes(manifest)]
+    for src in re.findall(r'src="([^"]+)"', document):
+        path = src if os.path.isabs(src) else os.path.join(work_dir, src)
+        if os.path.isfile(path):
+            parts.append(file_hash(path))
+    return f"{content_hash(*parts)}.pdf"
+
+
+def _render_sections_incremental(documents: list, manifest: dict, work_dir: str, cache_dir: str, jobs: int = 1) -> list:
+    """Render only the sections whose key is not in the "sections" cache."""
+    section_cache = DiskCache("sections", root=cache_dir)
+    keys = [_section_key(doc, manifest, work_dir) for doc in documents]
+    results = [None] * len(documents)
+    misses = []
+    for i, key in enumerate(keys):
+        cached = section_cache.read_bytes(key)
+        if cached is not None:
+            results[i] = (cached, 0)
+        else:
+            misses.append(i)
 
-    xhtml2pdf does not treat HTML5 <figure> and <figcaption> as block-level
-    elements — it renders them inline regardless of CSS display rules.
-    Replacing with <div class="figure"> and <p class="figcaption"> ensures
-    block layout and allows CSS styling via class selectors.
+    rendered = _render_sections([documents[i] for i in misses], jobs=jobs)
+    for i, (pdf, err) in zip(misses, rendered):
+        results[i] = (pdf, err)
+        if not err:
+            try:
+                section_cache.store_bytes(keys[i], pdf)
+            except OSError:
+                pass
 
-    Uses regex to handle tags with optional attributes (e.g. <figure class="chart">).
-    """
-    import re
-    html = re.sub(r'<figure(\s[^>]*)?>',  r'<div class="figure"\1>', html)
-    html = html.replace("</figure>", "</div>")
-    html = re.sub(r'<figcaption(\s[^>]*)?>',  r'<p class="figcaption"\1>', html)
-    html = html.replace("</figcaption>", "</p>")
-    return html
+    print(f"Incremental render: {len(documents) - len(misses)}/{len(documents)} sections reused, {len(misses)} rendered")
+    return results
 
 
-def _preprocess_code_blocks(html: str) -> str:
-    """Replace newlines with <br/> inside <pre><code> blocks.
+def render_html_to_bytes(html: str, manifest: dict, work_dir: str, page_format: str = "A4", debug: bool = False, section_titles: list = None, cache_dir: str = None, jobs: int = 1, chunked: bool = False, incremental: bool = False) -> bytes:
+    """Render HTML content to PDF pages and return the PDF bytes.
 
-    xhtml2pdf's white-space: pre-wrap does not reliably preserve \\n inside
-    <code> elements. Converting newlines to explicit <br/> tags ensures
-    line-per-line formatting in rendered PDF output.
-
-    Preserves any attributes on <pre> and <code> tags, and strips leading/
-    trailing newlines to avoid spurious <br/> whitespace.
+    work_dir is where relative image paths resolve and where generated image
+    assets (rasterized SVGs, rounded corners) are written; the PDF itself is
+    never written to disk. Options are as for render_html_to_pdf. Raises
+    RuntimeError if xhtml2pdf reports errors and ValueError if incremental is
+    set without a cache_dir.
     """
-    import re
+    import io
 
-    def fix_newlines(match):
-        pre_attrs = match.group(1) or ""
-        code_attrs = match.group(2) or ""
-        content = match.group(3)
-        content = content.strip("\n")
-        content = content.replace("\n", "<br/>")
-        return f"<pre{pre_attrs}><code{code_attrs}>{content}</code></pre>"
+    if incremental and not cache_dir:
+        raise ValueError("incremental rendering needs a cache_dir for the section cache")
 
-    return re.sub(
-        r"<pre(\s[^>]*)?><code(\s[^>]*)?>(.*?)</code></pre>",
-        fix_newlines, html, flags=re.DOTALL,
-    )
+    from xhtml2pdf import pisa
 
+    # Section breaks, figures, code blocks, image widths, SVG conversion and
+    # image corner radius — one tokenizer pass over the document
+    html = preprocess_html(html, manifest, work_dir, section_titles=section_titles, cache_dir=cache_dir, workers=jobs)
 
-def _preprocess_image_widths(html: str) -> str:
-    """Convert HTML width attributes on img tags to pt-based inline styles.
+    css = build_stylesheet(manifest, cache_dir=cache_dir)
 
-    xhtml2pdf interprets bare numeric width attributes as pixels, but content
-    authors specify them in points (matching PDF page geometry). Converting to
-    explicit 'pt' units ensures images render at the intended size.
-    """
-    import re
-
-    def convert_width(match):
-        full_tag = match.group(0)
-        width_val = match.group(1)
-        # Remove the width attribute
-        tag = re.sub(r'\s+width="' + re.escape(width_val) + '"', '', full_tag)
-        # Add pt-based width as inline style
-        if 'style="' in tag:
-            tag = tag.replace('style="', f'style="width: {width_val}pt; ')
+    pdf = io.BytesIO()
+    if chunked or incremental:
+        # Each chunk starts where a page break was inserted, so page order and
+        # the invisible section markers compose.py looks for are unchanged.
+        documents = [_html_document(css, section) for section in split_sections(html)]
+        if incremental:
+            results = _render_sections_incremental(documents, manifest, work_dir, cache_dir, jobs=jobs)
         else:
-            tag = tag.replace("<img ", f'<img style="width: {width_val}pt" ')
-        return tag
+            results = _render_sections(documents, jobs=jobs)
+        errors = sum(err for _, err in results)
+        if not errors:
+            _concatenate_pdfs([blob for blob, _ in results], pdf)
+    else:
+        errors = pisa.CreatePDF(_html_document(css, html), dest=pdf).err
 
-    return re.sub(r'<img\s[^>]*width="(\d+)"[^>]*>', convert_width, html)
+    if errors:
+        raise RuntimeError(f"xhtml2pdf reported {errors} errors")
 
+    return pdf.getvalue()
 
-def render_html_to_pdf(html: str, output_path: str, manifest: dict, page_format: str = "A4", debug: bool = False, section_titles: list = None):
-    """Render HTML content to PDF pages."""
-    from xhtml2pdf import pisa
 
-    html = _insert_section_breaks(html, section_titles=section_titles)
-    html = _preprocess_figures(html)
-    html = _preprocess_code_blocks(html)
-    html = _preprocess_image_widths(html)
+def render_html_to_pdf(html: str, output_path: str, manifest: dict, page_format: str = "A4", debug: bool = False, section_titles: list = None, cache_dir: str = None, jobs: int = 1, chunked: bool = False, incremental: bool = False):
+    """Render HTML content to PDF pages.
 
-    # Preprocessing: SVG conversion and image corner radius
+    cache_dir enables the persistent asset caches (see cache.py); None disables them.
+    jobs > 1 runs image preprocessing (SVG rasterization, corner radius) in a process pool.
+    chunked renders each h1 section as its own document (in parallel when
+    jobs > 1) and concatenates them — faster on long documents, since
+    xhtml2pdf is single-threaded and slows down more than linearly with length.
+    incremental (implies chunked) reuses section PDFs from the "sections"
+    cache under cache_dir, which it requires, and re-renders only sections
+    whose content, stylesheet, brand manifest or referenced images changed.
+    """
     work_dir = os.path.dirname(os.path.abspath(output_path))
-    html = _preprocess_svg_images(html, manifest, work_dir)
-    html = _preprocess_images(html, manifest, work_dir)
-
-    css = build_stylesheet(manifest)
-    full_html = f"""<!DOCTYPE html>
-<html>
-<head><style>{css}</style></head>
-<body>{html}</body>
-</html>"""
-
-    with open(output_path, "wb") as out_file:
-        status = pisa.CreatePDF(full_html, dest=out_file)
-
-    if status.err:
-        print(f"Error: xhtml2pdf reported {status.err} errors", file=sys.stderr)
-        sys.exit(1)
+    pdf = render_html_to_bytes(html, manifest, work_dir, page_format=page_format, debug=debug,
+                               section_titles=section_titles, cache_dir=cache_dir, jobs=jobs,
+                               chunked=chunked, incremental=incremental)
+    with open(output_path, "wb") as f:
+        f.write(pdf)
 
     print(f"Rendered content pages to {output_path}")
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Render HTML content to styled PDF pages")
     parser.add_argument("--brand", required=False, help="Path to brand kit skill directory")
     parser.add_argument("--input", required=True, help="Path to HTML content file")
@@ -509,24 +343,45 @@ def main():
     parser.add_argument("--format", default="A4", choices=["A4", "Letter"], help="Page format")
     parser.add_argument("--debug", action="store_true", help="Show grid lines and zone boundaries")
     parser.add_argument("--sections", default=None, help="JSON array of section titles to hide from content pages (shown on divider pages instead)")
-    args = parser.parse_args()
+    parser.add_argument("--cache-dir", default=None, help="Asset cache directory (default: $PDF_FACTORY_CACHE or ~/.cache/pdf-factory)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the persistent asset caches")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes for image preprocessing and --chunked rendering (default 1 = serial)")
+    parser.add_argument("--chunked", action="store_true", help="Render each h1 section separately and concatenate (faster for long documents)")
+    parser.add_argument("--incremental", action="store_true", help="Re-render only h1 sections that changed since the last render (implies --chunked; uses the cache)")
+    add_profile_startup_argument(parser, RENDER_MODULES)
+    args = parser.parse_args(argv)
+
+    # Validate arguments before anything imports reportlab or xhtml2pdf
+    if args.jobs < 1:
+        print(f"Error: --jobs must be at least 1, got {args.jobs}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.incremental and args.no_cache:
+        print("Error: --incremental needs the section cache; remove --no-cache", file=sys.stderr)
+        sys.exit(1)
+
+    if not os.path.exists(args.input):
+        print(f"Error: Input file not found: {args.input}", file=sys.stderr)
+        sys.exit(1)
+
+    cache_dir = None if args.no_cache else (args.cache_dir or default_cache_dir())
 
     if args.brand:
         manifest = load_brand(args.brand)
     else:
         manifest = load_fallback()
 
-    register_fonts(manifest)
-
-    if not os.path.exists(args.input):
-        print(f"Error: Input file not found: {args.input}", file=sys.stderr)
-        sys.exit(1)
+    register_fonts(manifest, cache_dir=cache_dir)
 
     with open(args.input) as f:
         html = f.read()
 
     section_titles = json.loads(args.sections) if args.sections else None
-    render_html_to_pdf(html, args.output, manifest, page_format=args.format, debug=args.debug, section_titles=section_titles)
+    try:
+        render_html_to_pdf(html, args.output, manifest, page_format=args.format, debug=args.debug, section_titles=section_titles, cache_dir=cache_dir, jobs=args.jobs, chunked=args.chunked, incremental=args.incremental)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
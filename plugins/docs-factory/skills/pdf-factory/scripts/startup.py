@@ -0,0 +1,56 @@
+"""Cold-start import profiling for the pdf-factory CLIs (--profile-startup).
+
+Imports each heavy library a script depends on, in pipeline order, and
+prints how long each import took. Libraries share dependencies (xhtml2pdf
+pulls in reportlab, svglib pulls in lxml), so every line is the incremental
+cost on top of the lines above it and the total is the real cold-start cost.
+
+Uses only Python stdlib.
+"""
+import argparse
+import importlib
+import sys
+import time
+
+RENDER_MODULES = ("reportlab.pdfbase.ttfonts", "PIL.Image", "svglib.svglib",
+                  "reportlab.graphics.renderPM", "xhtml2pdf.pisa", "pypdf")
+COMPOSE_MODULES = ("reportlab.pdfbase.ttfonts", "reportlab.pdfgen.canvas",
+                   "svglib.svglib", "reportlab.graphics.renderPDF", "pypdf")
+
+
+def profile_imports(modules) -> list:
+    """Import modules in order; return [(name, seconds or None if unavailable)]."""
+    timings = []
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception:
+            timings.append((name, None))
+            continue
+        timings.append((name, time.perf_counter() - start))
+    return timings
+
+
+def print_import_profile(modules, file=None):
+    file = file or sys.stdout
+    timings = profile_imports(modules)
+    print("Import time (incremental, in pipeline order):", file=file)
+    for name, seconds in timings:
+        shown = "not installed" if seconds is None else f"{seconds * 1000:9.1f} ms"
+        print(f"  {name:<30}{shown:>14}", file=file)
+    total = sum(seconds for _, seconds in timings if seconds is not None)
+    total_shown = f"{total * 1000:9.1f} ms"
+    print(f"  {'total':<30}{total_shown:>14}", file=file)
+
+
+def add_profile_startup_argument(parser: argparse.ArgumentParser, modules):
+    """Add --profile-startup: print the import breakdown and exit, like --help."""
+
+    class ProfileStartupAction(argparse.Action):
+        def __call__(self, parser, namespace, values, option_string=None):
+            print_import_profile(modules)
+            parser.exit()
+
+    parser.add_argument("--profile-startup", action=ProfileStartupAction, nargs=0,
+                        help="Print an import-time breakdown of the heavy libraries and exit")
@@ -2,7 +2,8 @@
 """Post-render QA checks for generated PDFs.
 
 Usage:
-    python validate_output.py <pdf-path> [--brand <brand-kit-path>]
+    python validate_output.py <pdf-path> [--brand <brand-kit-path>] [--stream]
+    python validate_output.py <dir|glob|pdf ...> [--brand <brand-kit-path>] [--workers N] [--report <report.jsonl>] [--stream]
 
 Checks:
 - File exists and is valid PDF
@@ -12,50 +13,247 @@ Checks:
 - PDF metadata contains title and author
 - If --brand: verify brand fonts appear in embedded font list
 
-Exit code 0 on all pass, 1 on any failure.
+Bulk mode (several files, a directory — searched recursively for *.pdf — or a
+glob pattern) validates across a process pool. The brand manifest and its font
+names (from the brand's font index) are read once and shared with every
+worker. Each file's result, including per-check timings, is appended to a
+JSONL report as it finishes.
+
+--stream validates large files in bounded memory: the PDF is read through
+the xref table as needed rather than loaded whole, and the page tree is walked
+lazily, checking each page's fonts and releasing its objects before the next.
+
+Exit code 0 on all pass, 1 on any failure (in bulk mode: any file failing).
 """
 import argparse
+import io
 import json
 import os
-import struct
+import re
 import sys
+import time
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent))
+from font_index import font_fingerprints, manifest_font_paths
+
+
+def _open(pdf_path):
+    """PdfReader source for a path or in-memory PDF bytes."""
+    return io.BytesIO(pdf_path) if isinstance(pdf_path, (bytes, bytearray)) else pdf_path
+
+
+def _size(pdf_path) -> int:
+    return len(pdf_path) if isinstance(pdf_path, (bytes, bytearray)) else os.path.getsize(pdf_path)
+
+
+def _page_fonts(page, seen: set, resources=None):
+    """Yield (key, font dictionary) for each font a page uses that is not yet in seen.
+
+    Fonts inside Form XObjects count too: compose.py places content pages and
+    static zones as forms, so their fonts live in the form's /Resources rather
+    than the page's. seen holds the object numbers of fonts and forms already
+    visited, so anything shared by many pages is walked once per document.
+    resources overrides the page's own /Resources (inherited from the page tree).
+    """
+    stack = [resources if resources is not None else page.get("/Resources")]
+    while stack:
+        resources = stack.pop()
+        resources = resources.get_object() if resources is not None else None
+        if not resources:
+            continue
+        fonts = resources["/Font"] if "/Font" in resources else {}
+        for font_name in fonts:
+            ref = fonts.raw_get(font_name)
+            key = ("font", ref.idnum) if hasattr(ref, "idnum") else None
+            if key not in seen:
+                if key:
+                    seen.add(key)
+                yield key, ref.get_object()
+        xobjects = resources["/XObject"] if "/XObject" in resources else {}
+        for name in xobjects:
+            ref = xobjects.raw_get(name)
+            key = ("form", ref.idnum) if hasattr(ref, "idnum") else None
+            if key in seen:
+                continue
+            if key:
+                seen.add(key)  # images too, so each dictionary is read once
+            if _xobject_subtype(ref) == "/Form":
+                stack.append(ref.get_object().get("/Resources"))
+
+
+_OBJ_HEADER = re.compile(rb"\s*\d+\s+\d+\s+obj\s*")
+_DICT_END = re.compile(rb">>\s*stream\b")
+
+
+def _xobject_subtype(ref):
+    """Return an XObject's /Subtype, reading only its dictionary when possible.
+
+    ref.get_object() would load the whole stream, which for images means
+    pulling every image's data into memory just to learn it is an image.
+    Instead the object's dictionary is parsed from its xref offset up to the
+    stream keyword; anything unexpected falls back to resolving the object.
+    """
+    from pypdf.generic import DictionaryObject, read_object
+
+    reader = getattr(ref, "pdf", None)
+    if reader is None:
+        return ref.get_object().get("/Subtype")
+    cached = reader.cache_get_indirect_object(ref.generation, ref.idnum)
+    offset = reader.xref.get(ref.generation, {}).get(ref.idnum)
+    if cached is None and offset is not None:
+        try:
+            reader.stream.seek(offset)
+            head = b""
+            while len(head) < 65536:
+                chunk = reader.stream.read(4096)
+                head += chunk
+                header = _OBJ_HEADER.match(head)
+                end = _DICT_END.search(head, header.end()) if header else None
+                if not header or end or not chunk:
+                    break
+            if header and end:
+                obj = read_object(io.BytesIO(head[header.end():end.start() + 2]), reader)
+                if isinstance(obj, DictionaryObject):
+                    subtype = obj.get("/Subtype")
+                    if subtype is not None and not hasattr(subtype, "idnum"):
+                        return subtype
+        except Exception:
+            pass
+    return ref.get_object().get("/Subtype")
+
+
+def _iter_pages_lazily(reader):
+    """Yield (page, inherited /Resources) walking the page tree in document order.
+
+    Unlike reader.pages, no page list is built and pypdf's resolved-object
+    cache is emptied after each page, so only the current page's objects (and
+    the page tree nodes above it) stay in memory; anything needed again is
+    re-read through the xref table.
+    """
+    root = reader.trailer["/Root"].get_object()
+    stack = [(root.raw_get("/Pages"), None)]
+    visited = set()
+    while stack:
+        ref, inherited = stack.pop()
+        if hasattr(ref, "idnum"):
+            if ref.idnum in visited:
+                continue  # malformed tree with a cycle
+            visited.add(ref.idnum)
+        node = ref.get_object()
+        resources = node.raw_get("/Resources") if "/Resources" in node else inherited
+        if "/Kids" in node:
+            stack.extend((kid, resources) for kid in reversed(node["/Kids"]))
+            continue
+        yield node, resources
+        reader.resolved_objects.clear()
+
+
+class PdfDocument:
+    """A PDF parsed once, with everything the checks need collected in one pass.
+
+    Built from a path or in-memory PDF bytes. error is set (and the other
+    fields left empty) when the file cannot be parsed.
+
+    With stream=True the file is read through an open handle instead of
+    being loaded whole, and pages are checked one at a time as the page tree
+    is walked (_iter_pages_lazily), so peak memory does not grow with page
+    count or image payload.
+    """
+
+    def __init__(self, pdf_path, stream: bool = False):
+        self.source = pdf_path
+        self.in_memory = isinstance(pdf_path, (bytes, bytearray))
+        self.exists = self.in_memory or os.path.exists(pdf_path)
+        self.size = _size(pdf_path) if self.exists else 0
+        self.error = None
+        self.page_count = 0
+        self.metadata = None
+        self.embedded_fonts = set()  # BaseFont names embedded (or standard 14)
+        self.referenced_fonts = set()  # BaseFont names used but not embedded
+        if not self.size:
+            return
+
+        from pypdf import PdfReader
 
-def check_file_exists(pdf_path: str) -> tuple:
+        try:
+            if stream and not self.in_memory:
+                with open(pdf_path, "rb") as f:
+                    self._scan_streaming(PdfReader(f))
+            else:
+                reader = PdfReader(_open(pdf_path))
+                self.page_count = len(reader.pages)
+                self.metadata = reader.metadata
+                seen = set()
+                for page in reader.pages:
+                    for _, font_obj in _page_fonts(page, seen):
+                        self._add_font(font_obj)
+        except Exception as e:
+            self.error = e
+
+    def _scan_streaming(self, reader):
+        self.metadata = reader.metadata
+        seen = set()
+        for page, resources in _iter_pages_lazily(reader):
+            self.page_count += 1
+            for _, font_obj in _page_fonts(page, seen, resources):
+                self._add_font(font_obj)
+
+    def _add_font(self, font_obj):
+        base_font = str(font_obj.get("/BaseFont", "unknown"))
+        if "/FontDescriptor" in font_obj:
+            descriptor = font_obj["/FontDescriptor"].get_object()
+            if "/FontFile" in descriptor or "/FontFile2" in descriptor or "/FontFile3" in descriptor:
+                self.embedded_fonts.add(base_font)
+            else:
+                self.referenced_fonts.add(base_font)
+        else:
+            # Standard 14 fonts don't need embedding
+            self.embedded_fonts.add(base_font)
+
+    @property
+    def fonts(self) -> set:
+        return self.embedded_fonts | self.referenced_fonts
+
+
+def _document(pdf, stream: bool = False) -> PdfDocument:
+    """Accept a PdfDocument, path or PDF bytes; parse only if not already parsed."""
+    return pdf if isinstance(pdf, PdfDocument) else PdfDocument(pdf, stream=stream)
+
+
+def check_file_exists(pdf_path) -> tuple:
     """Check that the file exists and has content."""
-    if not os.path.exists(pdf_path):
-        return False, f"File not found: {pdf_path}"
-    size = os.path.getsize(pdf_path)
-    if size == 0:
+    doc = _document(pdf_path)
+    if doc.in_memory:
+        if not doc.size:
+            return False, "PDF is empty (0 bytes)"
+        return True, f"In-memory PDF ({doc.size} bytes)"
+    if not doc.exists:
+        return False, f"File not found: {doc.source}"
+    if doc.size == 0:
         return False, "File is empty (0 bytes)"
-    return True, f"File exists ({size} bytes)"
+    return True, f"File exists ({doc.size} bytes)"
 
 
-def check_valid_pdf(pdf_path: str) -> tuple:
+def check_valid_pdf(pdf_path) -> tuple:
     """Check that the file is a valid PDF."""
-    try:
-        from pypdf import PdfReader
-        reader = PdfReader(pdf_path)
-        _ = len(reader.pages)
-        return True, "Valid PDF file"
-    except Exception as e:
-        return False, f"Invalid PDF: {e}"
+    doc = _document(pdf_path)
+    if doc.error is not None:
+        return False, f"Invalid PDF: {doc.error}"
+    return True, "Valid PDF file"
 
 
-def check_page_count(pdf_path: str) -> tuple:
+def check_page_count(pdf_path) -> tuple:
     """Check page count is greater than 0."""
-    from pypdf import PdfReader
-    reader = PdfReader(pdf_path)
-    count = len(reader.pages)
-    if count == 0:
+    doc = _document(pdf_path)
+    if doc.page_count == 0:
         return False, "Page count 0"
-    return True, f"Page count: {count}"
+    return True, f"Page count: {doc.page_count}"
 
 
-def check_file_size(pdf_path: str) -> tuple:
+def check_file_size(pdf_path) -> tuple:
     """Check file size is within reasonable bounds."""
-    size = os.path.getsize(pdf_path)
+    size = _document(pdf_path).size
     size_mb = size / (1024 * 1024)
     if size < 1024:
         return False, f"File too small ({size} bytes) — may be corrupted"
@@ -64,41 +262,19 @@ def check_file_size(pdf_path: str) -> tuple:
     return True, f"File size: {size_mb:.2f} MB"
 
 
-def check_fonts_embedded(pdf_path: str) -> tuple:
+def check_fonts_embedded(pdf_path) -> tuple:
     """Check that all fonts are embedded, not just referenced."""
-    from pypdf import PdfReader
-    reader = PdfReader(pdf_path)
-    embedded_fonts = set()
-    referenced_only = set()
-
-    for page in reader.pages:
-        if "/Resources" in page and "/Font" in page["/Resources"]:
-            fonts = page["/Resources"]["/Font"]
-            for font_name in fonts:
-                font_obj = fonts[font_name].get_object()
-                base_font = str(font_obj.get("/BaseFont", "unknown"))
-                if "/FontDescriptor" in font_obj:
-                    descriptor = font_obj["/FontDescriptor"].get_object()
-                    if "/FontFile" in descriptor or "/FontFile2" in descriptor or "/FontFile3" in descriptor:
-                        embedded_fonts.add(base_font)
-                    else:
-                        referenced_only.add(base_font)
-                else:
-                    # Standard 14 fonts don't need embedding
-                    embedded_fonts.add(base_font)
-
-    if referenced_only:
-        return False, f"Font not embedded: {', '.join(referenced_only)}"
-    if embedded_fonts:
-        return True, f"All fonts embedded: {', '.join(sorted(embedded_fonts))}"
+    doc = _document(pdf_path)
+    if doc.referenced_fonts:
+        return False, f"Font not embedded: {', '.join(doc.referenced_fonts)}"
+    if doc.embedded_fonts:
+        return True, f"All fonts embedded: {', '.join(sorted(doc.embedded_fonts))}"
     return True, "No custom fonts used"
 
 
-def check_metadata(pdf_path: str) -> tuple:
+def check_metadata(pdf_path) -> tuple:
     """Check that PDF metadata contains title and author."""
-    from pypdf import PdfReader
-    reader = PdfReader(pdf_path)
-    meta = reader.metadata
+    meta = _document(pdf_path).metadata
     if not meta:
         return False, "Missing metadata — no PDF info dictionary"
     issues = []
@@ -111,92 +287,65 @@ def check_metadata(pdf_path: str) -> tuple:
     return True, f"Metadata OK — title: {meta.get('/Title')}, author: {meta.get('/Author')}"
 
 
-def _read_ttf_names(font_path: str) -> set:
-    """Read family (nameID 1) and full name (nameID 4) from a TTF name table.
+_BRAND_FONTS = {}  # brand path → load_brand_fonts() result, per process
+
 
-    Returns a set of lowercased name strings. Uses only stdlib struct —
-    no fonttools or other dependencies required.
+def load_brand_fonts(brand_path: str) -> dict:
+    """Read what check_brand_fonts expects from a brand kit, memoized per process.
+
+    Returns {"name", "roles", "typefaces": {role: TTF names}}, or
+    {"error": message} when the manifest is missing. The result is plain data,
+    so bulk validation computes it once and hands it to every worker.
     """
-    names = set()
-    try:
-        with open(font_path, "rb") as f:
-            # Read the offset table header (sfVersion:u32 numTables:u16 ...)
-            header = f.read(12)
-            if len(header) < 12:
-                return names
-            num_tables = struct.unpack(">H", header[4:6])[0]
-            # Scan table directory for 'name'
-            name_offset = name_length = 0
-            for _ in range(num_tables):
-                entry = f.read(16)
-                if len(entry) < 16:
-                    return names
-                tag = entry[:4]
-                if tag == b"name":
-                    _, name_offset, name_length = struct.unpack(">III", entry[4:16])
-                    break
-            if not name_offset:
-                return names
-            # Read the name table
-            f.seek(name_offset)
-            table_data = f.read(name_length)
-            if len(table_data) < 6:
-                return names
-            _, count, string_offset = struct.unpack(">HHH", table_data[:6])
-            for i in range(count):
-                rec_start = 6 + i * 12
-                if rec_start + 12 > len(table_data):
-                    break
-                platform_id, encoding_id, _, name_id, str_length, str_offset = struct.unpack(
-                    ">HHHHHH", table_data[rec_start : rec_start + 12]
-                )
-                if name_id not in (1, 4):
-                    continue
-                abs_offset = string_offset + str_offset
-                raw = table_data[abs_offset : abs_offset + str_length]
-                # Decode: platform 3 (Windows) uses UTF-16-BE, others use latin-1
-                try:
-                    if platform_id == 3 or (platform_id == 0 and encoding_id > 0):
-                        text = raw.decode("utf-16-be")
-                    else:
-                        text = raw.decode("latin-1")
-                except Exception:
-                    continue
-                cleaned = text.strip().lower()
-                if cleaned:
-                    names.add(cleaned)
-    except (OSError, struct.error):
-        pass
-    return names
-
-
-def check_brand_fonts(pdf_path: str, brand_path: str) -> tuple:
-    """Verify brand fonts appear in embedded font list."""
+    if brand_path in _BRAND_FONTS:
+        return _BRAND_FONTS[brand_path]
+
     manifest_path = Path(brand_path) / "assets" / "manifest.json"
     if not manifest_path.exists():
-        return False, f"Brand manifest not found at {manifest_path}"
+        return {"error": f"Brand manifest not found at {manifest_path}"}
 
     with open(manifest_path) as f:
         manifest = json.load(f)
 
-    brand_name = manifest.get("brand", {}).get("name", "Unknown")
     # Expect at least one font per role to appear in the PDF
     expected_roles = set()
     for role, variants in manifest.get("fonts", {}).items():
         if isinstance(variants, dict) and variants:
             expected_roles.add(role)
 
-    from pypdf import PdfReader
-    reader = PdfReader(pdf_path)
-    found_fonts = set()
-    for page in reader.pages:
-        if "/Resources" in page and "/Font" in page["/Resources"]:
-            fonts = page["/Resources"]["/Font"]
-            for font_name in fonts:
-                font_obj = fonts[font_name].get_object()
-                base_font = str(font_obj.get("/BaseFont", ""))
-                found_fonts.add(base_font)
+    # Build role → expected typeface names from the brand's font index
+    fonts_by_role = manifest_font_paths(manifest)
+    fingerprints = font_fingerprints(
+        str(Path(brand_path) / "assets"), [p for paths in fonts_by_role.values() for p in paths]
+    )
+    role_typefaces = {}
+    for role, paths in fonts_by_role.items():
+        role_typefaces[role] = set()
+        for variant_path in paths:
+            if variant_path in fingerprints:
+                role_typefaces[role].update(fingerprints[variant_path]["names"])
+
+    _BRAND_FONTS[brand_path] = {
+        "name": manifest.get("brand", {}).get("name", "Unknown"),
+        "roles": expected_roles,
+        "typefaces": role_typefaces,
+    }
+    return _BRAND_FONTS[brand_path]
 
+
+def check_brand_fonts(pdf_path, brand_path) -> tuple:
+    """Verify brand fonts appear in embedded font list.
+
+    brand_path may also be a load_brand_fonts() result.
+    """
+    brand = brand_path if isinstance(brand_path, dict) else load_brand_fonts(brand_path)
+    if "error" in brand:
+        return False, brand["error"]
+    brand_name = brand["name"]
+    expected_roles = brand["roles"]
+    role_typefaces = brand["typefaces"]
+
+    found_fonts = _document(pdf_path).fonts
     found_lower = {f.lower().lstrip("/").replace("aaaaaa+", "") for f in found_fonts}
     # Standard 14 fonts that indicate a role was NOT embedded
     standard_fonts = {"helvetica", "times-roman", "courier"}
@@ -205,18 +354,6 @@ def check_brand_fonts(pdf_path: str, brand_path: str) -> tuple:
     if not custom_fonts:
         return False, f"No custom brand fonts embedded for {brand_name} — only standard fonts found"
 
-    # Build role → expected typeface names from actual font files
-    role_typefaces = {}
-    assets_dir = Path(brand_path) / "assets"
-    for role, variants in manifest.get("fonts", {}).items():
-        names = set()
-        if isinstance(variants, dict):
-            for variant_path in variants.values():
-                full_path = assets_dir / variant_path
-                if full_path.exists():
-                    names.update(_read_ttf_names(str(full_path)))
-        role_typefaces[role] = names
-
     # Check role coverage: each role should map to at least one custom font
     matched_roles = set()
     unused_roles = set()
@@ -241,27 +378,161 @@ def check_brand_fonts(pdf_path: str, brand_path: str) -> tuple:
     return True, f"Brand fonts verified for {brand_name}: {', '.join(sorted(matched_roles))}"
 
 
-def main():
-    parser = argparse.ArgumentParser(description="Validate generated PDF output")
-    parser.add_argument("pdf_path", help="Path to PDF file to validate")
-    parser.add_argument("--brand", required=False, help="Path to brand kit for font verification")
-    args = parser.parse_args()
+def timed_checks(pdf_path, brand_path=None, stream: bool = False) -> tuple:
+    """Run all checks, timing each; returns (parse seconds, [(name, (passed, message), seconds)]).
+
+    brand_path may be a brand kit path or a load_brand_fonts() result;
+    stream selects the bounded-memory PdfDocument scan.
+    """
+    start = time.perf_counter()
+    doc = _document(pdf_path, stream=stream)
+    parse_seconds = time.perf_counter() - start
+
+    checks = []
 
-    checks = [
-        ("File exists", check_file_exists(args.pdf_path)),
-    ]
+    def timed(name, check):
+        start = time.perf_counter()
+        result = check(doc)
+        checks.append((name, result, time.perf_counter() - start))
+        return result
 
     # Only run further checks if file exists
-    if checks[0][1][0]:
-        checks.extend([
-            ("Valid PDF", check_valid_pdf(args.pdf_path)),
-            ("Page count", check_page_count(args.pdf_path)),
-            ("File size", check_file_size(args.pdf_path)),
-            ("Fonts embedded", check_fonts_embedded(args.pdf_path)),
-            ("Metadata", check_metadata(args.pdf_path)),
-        ])
-        if args.brand:
-            checks.append(("Brand fonts", check_brand_fonts(args.pdf_path, args.brand)))
+    if timed("File exists", check_file_exists)[0]:
+        timed("Valid PDF", check_valid_pdf)
+        timed("Page count", check_page_count)
+        timed("File size", check_file_size)
+        timed("Fonts embedded", check_fonts_embedded)
+        timed("Metadata", check_metadata)
+        if brand_path:
+            timed("Brand fonts", lambda d: check_brand_fonts(d, brand_path))
+    return parse_seconds, checks
+
+
+def run_checks(pdf_path, brand_path: str = None, stream: bool = False) -> list:
+    """Run all checks on a PDF path or in-memory PDF bytes.
+
+    The PDF is parsed once into a PdfDocument and every check reads from it.
+    Returns [(name, (passed, message))] in report order.
+    """
+    _, checks = timed_checks(pdf_path, brand_path, stream)
+    return [(name, result) for name, result, _ in checks]
+
+
+# --- Bulk mode ----------------------------------------------------------------
+
+_WORKER_BRAND = None  # load_brand_fonts() result shared with pool workers
+_WORKER_STREAM = False
+
+
+def _init_worker(brand, stream=False):
+    global _WORKER_BRAND, _WORKER_STREAM
+    _WORKER_BRAND = brand
+    _WORKER_STREAM = stream
+
+
+def validate_file(pdf_path: str, brand=None, stream: bool = None) -> dict:
+    """Validate one PDF into a JSON-serializable report record; never raises."""
+    brand = brand if brand is not None else _WORKER_BRAND
+    stream = stream if stream is not None else _WORKER_STREAM
+    start = time.perf_counter()
+    try:
+        parse_seconds, checks = timed_checks(pdf_path, brand, stream)
+    except Exception as e:
+        parse_seconds, checks = 0.0, [("Validator", (False, f"Validator error: {e}"), 0.0)]
+    return {
+        "file": pdf_path,
+        "status": "pass" if all(passed for _, (passed, _), _ in checks) else "fail",
+        "seconds": round(time.perf_counter() - start, 4),
+        "parse_seconds": round(parse_seconds, 4),
+        "checks": [{"name": name, "passed": passed, "message": message, "seconds": round(seconds, 6)}
+                   for name, (passed, message), seconds in checks],
+    }
+
+
+def expand_inputs(inputs: list) -> list:
+    """Resolve files, directories (every *.pdf below them) and glob patterns to PDF paths."""
+    import glob
+
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(str(p) for p in Path(item).rglob("*.pdf")))
+        elif glob.has_magic(item):
+            paths.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            paths.append(item)  # a missing file is reported as a failure
+    return list(dict.fromkeys(paths))
+
+
+def validate_many(paths: list, brand_path: str = None, workers: int = 1, report_path: str = None,
+                  stream: bool = False) -> list:
+    """Validate paths (in a process pool when workers > 1), appending each record to report_path."""
+    brand = load_brand_fonts(brand_path) if brand_path else None
+    results = []
+    report = open(report_path, "w") if report_path else None
+    try:
+        def record(result):
+            results.append(result)
+            if report:
+                report.write(json.dumps(result) + "\n")
+                report.flush()
+            if result["status"] == "pass":
+                print(f"  [PASS] {result['file']} ({result['seconds']:.2f}s)")
+            else:
+                failures = "; ".join(f"{c['name']}: {c['message']}" for c in result["checks"] if not c["passed"])
+                print(f"  [FAIL] {result['file']} — {failures}")
+
+        if workers <= 1 or len(paths) <= 1:
+            for path in paths:
+                record(validate_file(path, brand, stream))
+            return results
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(brand, stream)) as pool:
+            for result in pool.map(validate_file, paths, chunksize=max(1, len(paths) // (workers * 4))):
+                record(result)
+    finally:
+        if report:
+            report.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate generated PDF output")
+    parser.add_argument("pdf_path", nargs="+", help="PDF file(s), directories or glob patterns to validate")
+    parser.add_argument("--brand", required=False, help="Path to brand kit for font verification")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for bulk validation (default: CPU count)")
+    parser.add_argument("--report", default=None,
+                        help="JSONL report path for bulk validation (default: validation-report.jsonl)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Bounded-memory mode for large PDFs: read lazily, check fonts page by page")
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        print(f"Error: --workers must be at least 1, got {args.workers}", file=sys.stderr)
+        sys.exit(1)
+
+    import glob
+
+    target = args.pdf_path[0]
+    single = len(args.pdf_path) == 1 and not os.path.isdir(target) and not glob.has_magic(target) and not args.report
+    if not single:
+        paths = expand_inputs(args.pdf_path)
+        if not paths:
+            print(f"Error: No PDF files found in: {', '.join(args.pdf_path)}", file=sys.stderr)
+            sys.exit(1)
+        report_path = args.report or "validation-report.jsonl"
+        print(f"Validating {len(paths)} PDFs with {min(args.workers, len(paths))} worker(s)")
+        start = time.perf_counter()
+        results = validate_many(paths, args.brand, workers=args.workers, report_path=report_path,
+                                stream=args.stream)
+        failed = sum(1 for r in results if r["status"] != "pass")
+        print(f"\n{len(results) - failed}/{len(results)} passed in {time.perf_counter() - start:.1f}s — report: {report_path}")
+        sys.exit(1 if failed else 0)
+
+    checks = run_checks(args.pdf_path[0], args.brand, stream=args.stream)
 
     # Report results
     all_pass = True
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""Visual regression checks for composed PDFs against a stored golden set.
+
+Usage:
+    python visual_diff.py update <pdf-path> --golden <dir> [--dpi 50] [--jobs N]
+    python visual_diff.py check <pdf-path> --golden <dir> [--out <dir>] [--threshold 0.1]
+                                [--max-changed 0.001] [--jobs N]
+
+update rasterizes every page at low DPI into <dir> (page-001.png, ...) and
+records each page's content hash in <dir>/golden.json. Pages whose hash is
+unchanged keep their stored image and are not rasterized again.
+
+check compares a PDF against the golden set:
+- pages whose content hash (content stream plus everything it draws: fonts,
+  images, forms, annotation appearances) matches the golden page are
+  reported unchanged without rasterizing
+- remaining pages are rasterized in parallel across --jobs worker processes
+  and compared pixel by pixel with a perceptual (YIQ) color difference,
+  vectorized with NumPy
+- a page is changed when more than --max-changed of its pixels differ by
+  more than --threshold (0–1); a heatmap of the differences is written to
+  --out (default visual-diff/) as diff-page-NNN.png, next to the new render
+
+A JSON report (report.json) lists every page's status. Use it after changing
+base.css, zones.json or brand tokens: render a reference document before the
+change with `update`, then `check` after it.
+
+Requires pypdfium2 and numpy (pip install pypdfium2 numpy), which the rest
+of pdf-factory does not need.
+
+Exit code 0 if no page changed, 1 on changed, added or removed pages or errors.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from optimize import encoded_data
+
+GOLDEN_MANIFEST = "golden.json"
+DEFAULT_DPI = 50
+
+# Dictionary keys that point back up or across the document rather than at
+# something the page draws; following them would hash other pages.
+_SKIP_KEYS = frozenset({"/Parent", "/P", "/Dest", "/A", "/StructParent", "/StructParents"})
+# Page attributes that affect rendering (after pypdf resolves inheritance).
+_PAGE_KEYS = ("/Contents", "/Resources", "/MediaBox", "/CropBox", "/Rotate", "/UserUnit", "/Group", "/Annots")
+# pixelmatch's maximum YIQ delta; threshold t flags pixels with delta > _MAX_DELTA * t²
+_MAX_DELTA = 35215.0
+
+
+def _require_raster_deps():
+    try:
+        import numpy  # noqa: F401
+        import pypdfium2  # noqa: F401
+    except ImportError:
+        print("Error: visual_diff.py needs pypdfium2 and numpy: pip install pypdfium2 numpy", file=sys.stderr)
+        sys.exit(1)
+
+
+def _object_digest(obj, memo: dict, active: set) -> bytes:
+    """Hash a PDF object and everything it references, memoized by object number."""
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+    if isinstance(obj, IndirectObject):
+        key = obj.idnum
+        if key in memo:
+            return memo[key]
+        if key in active:
+            return b"cycle"
+        active.add(key)
+        digest = _object_digest(obj.get_object(), memo, active)
+        active.discard(key)
+        memo[key] = digest
+        return digest
+
+    h = hashlib.sha256()
+    if isinstance(obj, DictionaryObject):
+        h.update(b"stream" if isinstance(obj, StreamObject) else b"dict")
+        for name in sorted(obj):
+            if name in _SKIP_KEYS or name == "/Length":
+                continue
+            h.update(name.encode())
+            h.update(_object_digest(obj.raw_get(name), memo, active))
+        if isinstance(obj, StreamObject):
+            h.update(encoded_data(obj))  # no decompression needed
+    elif isinstance(obj, ArrayObject):
+        h.update(b"array")
+        for item in obj:
+            h.update(_object_digest(item, memo, active))
+    else:
+        h.update(repr(obj).encode())
+    return h.digest()
+
+
+def page_hashes(pdf_path: str) -> list:
+    """Return one hex content hash per page: equal hashes mean identical rendering input."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    memo = {}
+    hashes = []
+    for page in reader.pages:
+        h = hashlib.sha256()
+        for name in _PAGE_KEYS:
+            if name in page:
+                h.update(name.encode())
+                h.update(_object_digest(page.raw_get(name), memo, set()))
+        hashes.append(h.hexdigest())
+    return hashes
+
+
+def _page_png(index: int) -> str:
+    return f"page-{index + 1:03d}.png"
+
+
+def _rasterize_pages(pdf_path: str, indexes: list, dpi: int, out_dir: str) -> list:
+    """Render the given page indexes to PNGs in out_dir; runs in a worker process."""
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        written = []
+        for index in indexes:
+            page = pdf[index]
+            image = page.render(scale=dpi / 72).to_pil().convert("RGB")
+            image.save(os.path.join(out_dir, _page_png(index)), optimize=False)
+            page.close()
+            written.append(index)
+        return written
+    finally:
+        pdf.close()
+
+
+def rasterize(pdf_path: str, indexes: list, dpi: int, out_dir: str, jobs: int = 1):
+    """Rasterize pages into out_dir, split into contiguous chunks across jobs processes."""
+    os.makedirs(out_dir, exist_ok=True)
+    if not indexes:
+        return
+    jobs = max(1, min(jobs, len(indexes)))
+    if jobs == 1:
+        _rasterize_pages(pdf_path, indexes, dpi, out_dir)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    size = -(-len(indexes) // jobs)
+    chunks = [indexes[i:i + size] for i in range(0, len(indexes), size)]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for future in [pool.submit(_rasterize_pages, pdf_path, chunk, dpi, out_dir) for chunk in chunks]:
+            future.result()
+
+
+def _yiq(rgb):
+    """Convert an HxWx3 float array to YIQ (the color space pixelmatch measures in)."""
+    import numpy as np
+
+    matrix = np.array([[0.29889531, 0.58662247, 0.11448223],
+                       [0.59597799, -0.27417610, -0.32180189],
+                       [0.21147017, -0.52261711, 0.31114694]], dtype=np.float32)
+    return rgb @ matrix.T
+
+
+def diff_images(golden_path: str, candidate_path: str, threshold: float) -> tuple:
+    """Return (fraction of pixels changed, per-pixel delta in 0–1 or None if sizes differ)."""
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(golden_path) as a, Image.open(candidate_path) as b:
+        golden = np.asarray(a.convert("RGB"), dtype=np.float32)
+        candidate = np.asarray(b.convert("RGB"), dtype=np.float32)
+    if golden.shape != candidate.shape:
+        return 1.0, None
+    d = _yiq(golden) - _yiq(candidate)
+    delta = 0.5053 * d[..., 0] ** 2 + 0.299 * d[..., 1] ** 2 + 0.1957 * d[..., 2] ** 2
+    changed = delta > _MAX_DELTA * threshold * threshold
+    return float(changed.mean()), np.sqrt(delta / _MAX_DELTA)
+
+
+def write_heatmap(golden_path: str, delta, path: str):
+    """Save the golden page faded to grey with differences painted red by intensity."""
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(golden_path) as im:
+        base = np.asarray(im.convert("L"), dtype=np.float32)
+    base = 255 - (255 - base) * 0.3  # fade to light grey so the overlay stands out
+    alpha = np.clip(delta * 4, 0, 1)
+    heat = np.empty(base.shape + (3,), dtype=np.float32)
+    heat[..., 0] = base * (1 - alpha) + 255 * alpha
+    heat[..., 1] = base * (1 - alpha)
+    heat[..., 2] = base * (1 - alpha)
+    Image.fromarray(heat.astype(np.uint8), "RGB").save(path)
+
+
+def _load_golden(golden_dir: str) -> dict:
+    manifest_path = os.path.join(golden_dir, GOLDEN_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def update_golden(pdf_path: str, golden_dir: str, dpi: int = DEFAULT_DPI, jobs: int = 1) -> dict:
+    """Store page renders and hashes of pdf_path as the golden set; returns the manifest."""
+    hashes = page_hashes(pdf_path)
+    previous = _load_golden(golden_dir) or {}
+    old = previous.get("pages", []) if previous.get("dpi") == dpi else []
+    stale = [i for i, h in enumerate(hashes)
+             if i >= len(old) or old[i]["hash"] != h
+             or not os.path.exists(os.path.join(golden_dir, old[i]["png"]))]
+    rasterize(pdf_path, stale, dpi, golden_dir, jobs)
+    for index in range(len(hashes), len(old)):
+        try:
+            os.remove(os.path.join(golden_dir, old[index]["png"]))
+        except OSError:
+            pass
+
+    manifest = {
+        "source": os.path.basename(pdf_path),
+        "dpi": dpi,
+        "pages": [{"page": i + 1, "hash": h, "png": _page_png(i)} for i, h in enumerate(hashes)],
+    }
+    tmp = os.path.join(golden_dir, f"{GOLDEN_MANIFEST}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, os.path.join(golden_dir, GOLDEN_MANIFEST))
+    print(f"Golden set: {golden_dir} ({len(hashes)} pages, {len(stale)} rasterized at {dpi} DPI)")
+    return manifest
+
+
+def check_against_golden(pdf_path: str, golden: dict, golden_dir: str, out_dir: str,
+                         threshold: float = 0.1, max_changed: float = 0.001, jobs: int = 1) -> list:
+    """Compare pdf_path with a golden set; returns one status record per page."""
+    hashes = page_hashes(pdf_path)
+    golden_pages = golden["pages"]
+    results = []
+    to_compare = []
+    for index, h in enumerate(hashes):
+        if index >= len(golden_pages):
+            results.append({"page": index + 1, "status": "added"})
+        elif golden_pages[index]["hash"] == h:
+            results.append({"page": index + 1, "status": "unchanged", "method": "hash"})
+        else:
+            results.append(None)
+            to_compare.append(index)
+    for index in range(len(hashes), len(golden_pages)):
+        results.append({"page": index + 1, "status": "removed"})
+
+    pages_dir = os.path.join(out_dir, "pages")
+    rasterize(pdf_path, to_compare, golden["dpi"], pages_dir, jobs)
+    for index in to_compare:
+        golden_png = os.path.join(golden_dir, golden_pages[index]["png"])
+        candidate_png = os.path.join(pages_dir, _page_png(index))
+        ratio, delta = diff_images(golden_png, candidate_png, threshold)
+        record = {"page": index + 1, "changed_ratio": round(ratio, 6), "render": candidate_png}
+        if delta is None:
+            record.update(status="changed", reason="page size differs")
+        elif ratio > max_changed:
+            heatmap = os.path.join(out_dir, f"diff-{_page_png(index)}")
+            write_heatmap(golden_png, delta, heatmap)
+            record.update(status="changed", heatmap=heatmap)
+        else:
+            record.update(status="unchanged", method="pixels")
+        results[index] = record
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Visual regression checks for composed PDFs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("update", help="Store page renders of a PDF as the golden set")
+    p.add_argument("pdf", help="Reference PDF")
+    p.add_argument("--golden", required=True, help="Golden set directory")
+    p.add_argument("--dpi", type=int, default=DEFAULT_DPI, help=f"Rasterization DPI (default: {DEFAULT_DPI})")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Rasterizer processes (default: CPU count)")
+
+    p = sub.add_parser("check", help="Compare a PDF against the golden set")
+    p.add_argument("pdf", help="PDF to check")
+    p.add_argument("--golden", required=True, help="Golden set directory")
+    p.add_argument("--out", default="visual-diff", help="Directory for renders, heatmaps and report.json")
+    p.add_argument("--threshold", type=float, default=0.1,
+                   help="Per-pixel perceptual difference (0-1) that counts as changed (default: 0.1)")
+    p.add_argument("--max-changed", type=float, default=0.001,
+                   help="Fraction of changed pixels tolerated per page (default: 0.001)")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Rasterizer processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.pdf):
+        print(f"Error: PDF not found: {args.pdf}", file=sys.stderr)
+        sys.exit(1)
+    if args.jobs < 1:
+        print(f"Error: --jobs must be at least 1, got {args.jobs}", file=sys.stderr)
+        sys.exit(1)
+    _require_raster_deps()
+
+    if args.command == "update":
+        if args.dpi < 1:
+            print(f"Error: --dpi must be at least 1, got {args.dpi}", file=sys.stderr)
+            sys.exit(1)
+        os.makedirs(args.golden, exist_ok=True)
+        update_golden(args.pdf, args.golden, args.dpi, args.jobs)
+        sys.exit(0)
+
+    golden = _load_golden(args.golden)
+    if golden is None:
+        print(f"Error: No golden set at {args.golden} — create one with: visual_diff.py update", file=sys.stderr)
+        sys.exit(1)
+    os.makedirs(args.out, exist_ok=True)
+    results = check_against_golden(args.pdf, golden, args.golden, args.out,
+                                   args.threshold, args.max_changed, args.jobs)
+
+    counts = {}
+    for record in results:
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+        if record["status"] == "changed":
+            detail = record.get("reason") or f"{record['changed_ratio']:.2%} of pixels, heatmap {record['heatmap']}"
+            print(f"  [CHANGED] page {record['page']}: {detail}")
+        elif record["status"] in ("added", "removed"):
+            print(f"  [{record['status'].upper()}] page {record['page']}")
+    report_path = os.path.join(args.out, "report.json")
+    with open(report_path, "w") as f:
+        json.dump({"pdf": args.pdf, "golden": args.golden, "dpi": golden["dpi"], "pages": results}, f, indent=2)
+        f.write("\n")
+
+    by_hash = sum(1 for r in results if r.get("method") == "hash")
+    failed = len(results) - counts.get("unchanged", 0)
+    print(f"\n{counts.get('unchanged', 0)}/{len(results)} pages unchanged "
+          f"({by_hash} by content hash, {counts.get('unchanged', 0) - by_hash} by pixels) — report: {report_path}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Tests for the font face cache in brand.py."""
+import io
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+import brand
+from cache import DiskCache
+from font_index import font_fingerprints
+
+FALLBACK_ASSETS = Path(__file__).resolve().parents[1] / "assets" / "fallback"
+FONTS = sorted(p.name for p in FALLBACK_ASSETS.glob("*.ttf"))
+TEXT = "Hamburgefonstiv 0123456789 café ßøå €"
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setenv("PDF_FACTORY_CACHE", str(tmp_path / "root"))
+    monkeypatch.setattr(brand, "_FONT_FACES", {})
+    monkeypatch.setattr(brand, "_FACE_CACHE_OFF", [])
+
+
+def _signature(name):
+    fingerprint = font_fingerprints(str(FALLBACK_ASSETS), [name])[name]
+    return brand._font_signature(str(FALLBACK_ASSETS / name), fingerprint)
+
+
+def _draw(font) -> bytes:
+    from reportlab import rl_config
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfgen import canvas
+
+    pdfmetrics.registerFont(font)
+    buf = io.BytesIO()
+    invariant, rl_config.invariant = rl_config.invariant, 1
+    try:
+        c = canvas.Canvas(buf, pagesize=(595, 842))
+        c.setFont(font.fontName, 11)
+        c.drawString(72, 780, TEXT)
+        c.drawString(72, 760, str(font.stringWidth(TEXT, 11)))
+        c.save()
+    finally:
+        rl_config.invariant = invariant
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("name", FONTS)
+def test_cached_face_matches_a_fresh_parse(name, tmp_path):
+    """Fails when a reportlab release changes the TTFontFace internals the cache rebuilds."""
+    from reportlab.pdfbase import ttfonts
+
+    path = str(FALLBACK_ASSETS / name)
+    signature = _signature(name)
+    parsed = ttfonts.TTFont("Test-parsed", path)
+    assert brand._face_entry(parsed) is not None, "parsed face does not survive the cache round trip"
+
+    cache_dir = str(tmp_path / "cache")
+    brand._ttfont("Test-first", path, signature, cache_dir)
+    brand._FONT_FACES.clear()
+    face = brand._read_face(DiskCache("fonts", root=cache_dir), signature)
+    assert face is not None
+    cached = brand._cached_font_classes()[1]("Test-cached", face)
+
+    assert cached.stringWidth(TEXT, 11) == parsed.stringWidth(TEXT, 11)
+    assert face.makeSubset(brand._SUBSET_PROBE) == parsed.face.makeSubset(brand._SUBSET_PROBE)
+    assert _draw(cached).replace(b"Test-cached", b"Test-parsed") == _draw(parsed)
+
+
+def test_read_face_skips_hashing_an_unchanged_file(tmp_path, monkeypatch):
+    path = str(FALLBACK_ASSETS / FONTS[0])
+    signature = _signature(FONTS[0])
+    cache_dir = str(tmp_path / "cache")
+    brand._ttfont("Test-first", path, signature, cache_dir)
+
+    def no_hash(*args):
+        raise AssertionError("file re-hashed although size and mtime match")
+
+    monkeypatch.setattr(brand, "hashlib", SimpleNamespace(sha256=no_hash))
+    assert brand._read_face(DiskCache("fonts", root=cache_dir), signature) is not None
+
+
+def test_read_face_rejects_a_changed_file(tmp_path):
+    copy = tmp_path / FONTS[0]
+    copy.write_bytes((FALLBACK_ASSETS / FONTS[0]).read_bytes())
+    fingerprint = font_fingerprints(str(tmp_path), [FONTS[0]])[FONTS[0]]
+    signature = brand._font_signature(str(copy), fingerprint)
+    cache_dir = str(tmp_path / "cache")
+    brand._ttfont("Test-first", str(copy), signature, cache_dir)
+
+    copy.write_bytes(copy.read_bytes()[:-4] + b"\0\0\0\0")
+    os.utime(copy, ns=(0, 1))
+    assert brand._read_face(DiskCache("fonts", root=cache_dir), signature) is None
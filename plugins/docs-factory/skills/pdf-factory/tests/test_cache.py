@@ -0,0 +1,39 @@
+"""Tests for cache.py."""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from cache import DiskCache
+
+
+def test_materialize_twice_leaves_no_temp_files(tmp_path):
+    cache = DiskCache("test", root=str(tmp_path / "cache"))
+    cache.store_bytes("entry.png", b"image bytes")
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    dest = str(work_dir / "_rounded_entry.png")
+
+    assert cache.materialize("entry.png", dest)
+    assert cache.materialize("entry.png", dest)
+
+    assert os.listdir(work_dir) == ["_rounded_entry.png"]
+    assert Path(dest).read_bytes() == b"image bytes"
+
+
+def test_materialize_replaces_a_different_file(tmp_path):
+    cache = DiskCache("test", root=str(tmp_path / "cache"))
+    cache.store_bytes("entry.png", b"new")
+    dest = tmp_path / "out.png"
+    dest.write_bytes(b"old")
+
+    assert cache.materialize("entry.png", str(dest))
+
+    assert dest.read_bytes() == b"new"
+    assert sorted(os.listdir(tmp_path)) == ["cache", "out.png"]
+
+
+def test_materialize_miss(tmp_path):
+    cache = DiskCache("test", root=str(tmp_path / "cache"))
+    assert not cache.materialize("missing.png", str(tmp_path / "out.png"))
+    assert not (tmp_path / "out.png").exists()
@@ -0,0 +1,107 @@
+"""Tests for compose.py."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+import compose
+from brand import load_brand
+
+BRAND = Path(__file__).resolve().parents[2] / "brand-bluewaves"
+PAGE_SIZE = (595, 842)
+TITLE = {"x": 50, "y": 700, "width": 495, "height": 40, "style": "h1", "color_role": "text-heading"}
+LOGO = {"x": 430, "y": 690, "width": 120, "height": 40, "type": "image", "source": "logo-full-color.svg"}
+
+
+def _drawing_order(zones: dict) -> list:
+    """Apply zones to a blank page; return "text"/"image" per painted overlay, in content order."""
+    from pypdf import PageObject
+
+    manifest = load_brand(str(BRAND))
+    page = PageObject.create_blank_page(width=PAGE_SIZE[0], height=PAGE_SIZE[1])
+    compose._apply_zones(page, {"zones": zones}, {"title": "Report"}, PAGE_SIZE, manifest,
+                         manifest["_base_path"])
+    data = page.get_contents().get_data()
+    marks = sorted((data.find(op), kind) for op, kind in ((b" Tj", "text"), (b" Do", "image")) if op in data)
+    return [kind for _, kind in marks]
+
+
+@pytest.mark.parametrize("order", [("title", "logo"), ("logo", "title")])
+def test_zones_are_drawn_in_manifest_order(order):
+    specs = {"title": TITLE, "logo": LOGO}
+    expected = ["text" if name == "title" else "image" for name in order]
+    assert _drawing_order({name: specs[name] for name in order}) == expected
+
+
+def test_zone_runs_group_consecutive_zones():
+    zones = {"a": LOGO, "b": LOGO, "title": TITLE, "c": LOGO}
+    runs = compose._zone_runs({"zones": zones})
+    assert [(is_image, list(run["zones"])) for is_image, run in runs] == [
+        (True, ["a", "b"]), (False, ["title"]), (True, ["c"])]
+
+
+def _linked_content() -> bytes:
+    """Three content pages: page 1 links to page 3 explicitly, page 3 to page 1 by name,
+    and page 2 to a name that does not exist."""
+    import io
+
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import ArrayObject, DictionaryObject, NameObject, NumberObject, TextStringObject
+    from reportlab.pdfgen import canvas
+
+    rect = (72, 700, 200, 720)
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=PAGE_SIZE)
+    c.bookmarkPage("intro")
+    c.addOutlineEntry("Intro", "intro", level=0)
+    for page in range(1, 4):
+        c.bookmarkPage(f"page{page}")
+        c.drawString(72, 780, f"Content page {page}")
+        if page == 1:
+            c.linkRect("", "page3", rect)
+        c.showPage()
+    c.save()
+
+    writer = PdfWriter(clone_from=PdfReader(io.BytesIO(buf.getvalue())))
+    writer.add_named_destination("start", 0)
+    for page, name in ((1, "missing"), (2, "start")):
+        writer.add_annotation(page, DictionaryObject({
+            NameObject("/Type"): NameObject("/Annot"),
+            NameObject("/Subtype"): NameObject("/Link"),
+            NameObject("/Rect"): ArrayObject([NumberObject(v) for v in rect]),
+            NameObject("/A"): DictionaryObject({NameObject("/S"): NameObject("/GoTo"),
+                                                NameObject("/D"): TextStringObject(name)}),
+        }))
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("form_pages", [False, True])
+@pytest.mark.parametrize("toc", [False, True])
+def test_internal_links_target_output_pages(form_pages, toc):
+    import contextlib
+    import io
+    import re
+
+    from pypdf import PdfReader
+
+    metadata = {"title": "Report", "author": "pdf-factory", "sections": [{"title": "Intro", "page": 1}]}
+    out = io.BytesIO()
+    with contextlib.redirect_stdout(io.StringIO()):
+        compose.compose_document(str(BRAND), _linked_content(), metadata, out, form_pages=form_pages, toc=toc)
+
+    reader = PdfReader(out)
+    index = {page.indirect_reference.idnum: i for i, page in enumerate(reader.pages)}
+    first = 3 if toc else 2  # front cover, [TOC,] divider, then the content pages
+    links = []
+    for i, page in enumerate(reader.pages):
+        for annot in page.get("/Annots") or []:
+            annot = annot.get_object()
+            dest = annot["/Dest"] if "/Dest" in annot else annot["/A"]["/D"]
+            links.append((i, index.get(dest[0].idnum)))
+    content_links = [(i - first, target - first) for i, target in links if i >= first]
+    assert content_links == [(0, 2), (2, 0)]
+    assert all(target is not None for _, target in links)
+    assert len(re.findall(rb"/Type\s*/Page\b(?!s)", out.getvalue())) == len(reader.pages)
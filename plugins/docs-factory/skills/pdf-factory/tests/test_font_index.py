@@ -0,0 +1,22 @@
+"""Tests for font_index.py."""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+import font_index
+
+FALLBACK_ASSETS = Path(__file__).resolve().parents[1] / "assets" / "fallback"
+
+
+def test_index_is_kept_in_the_cache_root(tmp_path, monkeypatch):
+    monkeypatch.setenv("PDF_FACTORY_CACHE", str(tmp_path))
+    fonts = sorted(str(p.relative_to(FALLBACK_ASSETS)) for p in FALLBACK_ASSETS.rglob("*.ttf"))[:2]
+    before = sorted(os.listdir(FALLBACK_ASSETS))
+
+    fingerprints = font_index.font_fingerprints(str(FALLBACK_ASSETS), fonts)
+
+    assert set(fingerprints) == set(fonts)
+    assert sorted(os.listdir(FALLBACK_ASSETS)) == before
+    assert os.path.isfile(font_index.index_path(str(FALLBACK_ASSETS)))
+    assert font_index.index_path(str(FALLBACK_ASSETS)).startswith(str(tmp_path))
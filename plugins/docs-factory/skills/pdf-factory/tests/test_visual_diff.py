@@ -0,0 +1,63 @@
+"""Tests for visual_diff.py page content hashes."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from optimize import encoded_data
+from visual_diff import page_hashes
+
+
+def _content_pdf(path, lines):
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(str(path), pagesize=(595, 842))
+    for line in lines:
+        c.setFont("Helvetica", 11)
+        c.drawString(72, 780, line)
+        c.showPage()
+    c.save()
+
+
+def test_encoded_data_is_the_stored_stream(tmp_path):
+    from pypdf import PdfReader
+
+    path = tmp_path / "doc.pdf"
+    _content_pdf(path, ["first page"])
+    raw = path.read_bytes()
+    stream = PdfReader(str(path)).pages[0]["/Contents"].get_object()
+
+    data = encoded_data(stream)
+    assert b"stream\n" + data in raw
+
+
+def test_encoded_data_ignores_stream_keywords_in_the_dictionary():
+    from pypdf.generic import DecodedStreamObject, NameObject, TextStringObject
+
+    stream = DecodedStreamObject()
+    stream[NameObject("/Note")] = TextStringObject(">>\nstream\n")
+    stream.set_data(b"q 1 0 0 1 0 0 cm Q")
+    assert encoded_data(stream) == b"q 1 0 0 1 0 0 cm Q"
+
+
+def test_page_hashes_ignore_object_numbering(tmp_path):
+    from pypdf import PdfReader, PdfWriter
+
+    original = tmp_path / "original.pdf"
+    _content_pdf(original, ["first page", "second page"])
+    writer = PdfWriter()
+    writer.add_blank_page(595, 842)
+    writer.append(PdfReader(str(original)))
+    renumbered = tmp_path / "renumbered.pdf"
+    with open(renumbered, "wb") as f:
+        writer.write(f)
+
+    assert page_hashes(str(renumbered))[1:] == page_hashes(str(original))
+
+
+def test_page_hashes_change_with_content(tmp_path):
+    a, b = tmp_path / "a.pdf", tmp_path / "b.pdf"
+    _content_pdf(a, ["same", "before"])
+    _content_pdf(b, ["same", "after"])
+    hashes_a, hashes_b = page_hashes(str(a)), page_hashes(str(b))
+    assert hashes_a[0] == hashes_b[0]
+    assert hashes_a[1] != hashes_b[1]
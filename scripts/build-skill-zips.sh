@@ -65,7 +65,7 @@ for skill_dir in "$REPO_ROOT"/plugins/*/skills/*/; do
 
     # Remove files that must never ship in ZIPs
     find "$tmp_dir" -type d -name "__pycache__" -exec rm -rf {} + 2>/dev/null || true
-    find "$tmp_dir" \( -name "*.pyc" -o -name "*.pyo" -o -name ".DS_Store" -o -name "credentials.example.json" -o -name "credentials.json" \) -delete 2>/dev/null || true
+    find "$tmp_dir" \( -name "*.pyc" -o -name "*.pyo" -o -name ".DS_Store" -o -name "credentials.example.json" -o -name "credentials.json" -o -name "font-index.json" \) -delete 2>/dev/null || true
 
     # Create the ZIP from inside the temp dir so the path is skill-name/SKILL.md
     (cd "$tmp_dir" && zip -q -r "$DIST_DIR/$output_name.skill" "$skill_name")